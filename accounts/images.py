@@ -0,0 +1,114 @@
+"""
+Profile picture processing, run by the ``accounts.profile_picture`` job.
+
+The upload is decoded once, rotated according to its EXIF orientation,
+capped at ``PROFILE_PICTURE_MAX_DIMENSION`` and re-encoded as JPEG, then
+square-cropped into the fixed ``PROFILE_PICTURE_VARIANTS``. Every file is
+named after a hash of the normalized picture, so a URL never changes content
+and can be cached indefinitely.
+"""
+import hashlib
+import io
+import re
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+from .models import User
+
+# Square avatar sizes in pixels, by variant name
+PROFILE_PICTURE_VARIANTS = {
+    'thumbnail': 64,
+    'small': 160,
+    'medium': 320,
+}
+JPEG_QUALITY = 85
+
+
+def _encode(image):
+    buffer = io.BytesIO()
+    image.save(buffer, format='JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True)
+    return buffer.getvalue()
+
+
+def _to_rgb(image):
+    """Flatten transparency onto white, JPEG has no alpha channel"""
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.split()[-1])
+        return background
+    return image.convert('RGB')
+
+
+def render_variants(source):
+    """
+    Normalize the image in the ``source`` file object and return
+    ``(digest, {variant name: JPEG bytes})`` including ``'original'``
+    """
+    max_dimension = getattr(settings, 'PROFILE_PICTURE_MAX_DIMENSION', 1024)
+    with Image.open(source) as image:
+        # Let the JPEG decoder downscale by a power of two while decoding
+        image.draft('RGB', (max_dimension, max_dimension))
+        image = ImageOps.exif_transpose(image)
+        image = _to_rgb(image)
+    image.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+
+    original = _encode(image)
+    rendered = {'original': original}
+    for name, size in PROFILE_PICTURE_VARIANTS.items():
+        variant = ImageOps.fit(image, (size, size), Image.LANCZOS)
+        rendered[name] = _encode(variant)
+    return hashlib.sha256(original).hexdigest()[:20], rendered
+
+
+def _referenced_elsewhere(name, user_pk):
+    """Whether another user shows the same picture (identical uploads share files)"""
+    original = re.sub(r'-\d+\.jpg$', '.jpg', name)
+    return User.objects.exclude(pk=user_pk).filter(profile_picture__in={name, original}).exists()
+
+
+def process_profile_picture(user_pk, source_name):
+    """
+    Process ``source_name`` for the user, unless a newer upload replaced it.
+    Returns the stored variant names, or None when there was nothing to do.
+    """
+    user = User.objects.filter(pk=user_pk).first()
+    if user is None or user.profile_picture.name != source_name:
+        return None
+
+    with default_storage.open(source_name, 'rb') as source:
+        digest, rendered = render_variants(source)
+
+    variants = {}
+    for name, content in rendered.items():
+        suffix = '' if name == 'original' else f'-{PROFILE_PICTURE_VARIANTS[name]}'
+        target = f'profiles/{digest}{suffix}.jpg'
+        # Same content, same name: an existing file is already correct
+        if not default_storage.exists(target):
+            target = default_storage.save(target, ContentFile(content))
+        variants[name] = target
+
+    # Only swap in the result if the picture did not change meanwhile
+    updated = User.objects.filter(pk=user_pk, profile_picture=source_name).update(
+        profile_picture=variants['original'],
+        profile_picture_variants=variants,
+    )
+    if not updated:
+        return None
+
+    stale = set(user.profile_picture_variants.values()) | {source_name}
+    for name in stale - set(variants.values()):
+        if not _referenced_elsewhere(name, user_pk):
+            default_storage.delete(name)
+    return variants
+
+
+def variant_urls(user):
+    """``{variant name: URL}`` for the user's processed picture, None while pending"""
+    variants = user.profile_picture_variants
+    if not user.profile_picture or variants.get('original') != user.profile_picture.name:
+        return None
+    return {name: default_storage.url(path) for name, path in variants.items()}
@@ -1,7 +1,14 @@
-from django.contrib.auth.models import AbstractUser
+from django.contrib.auth.models import AbstractUser, UserManager
 from django.db import models
 
 
+class StaffManager(UserManager):
+    """Hides staff members that are deleted but not yet purged (core/purge.py)"""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
 class User(AbstractUser):
     """
     Custom User model with role-based access control
@@ -18,9 +25,17 @@ class User(AbstractUser):
     role = models.CharField(max_length=20, choices=ROLE_CHOICES, default='receptionist')
     phone_number = models.CharField(max_length=20, blank=True, null=True)
     profile_picture = models.ImageField(upload_to='profiles/', blank=True, null=True)
+    # Storage names of the processed picture and its resized variants, keyed by
+    # variant name (see accounts/images.py); empty until the upload is processed
+    profile_picture_variants = models.JSONField(default=dict, blank=True)
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Set by the delete endpoint; the purge job then removes the row
+    deleted_at = models.DateTimeField(blank=True, null=True, editable=False)
+    
+    objects = StaffManager()
+    all_objects = UserManager()
     
     class Meta:
         db_table = 'users'
@@ -1,20 +1,52 @@
 from rest_framework import serializers
 from django.contrib.auth import authenticate
+from .images import variant_urls
 from .models import User
+from core.metrics import TimedSerializerMixin
 
 
-class UserSerializer(serializers.ModelSerializer):
+def validate_unique_username(value, instance=None):
+    """
+    Username uniqueness across every user row, including deleted staff the
+    purge job has not removed yet: the database still holds their username
+    """
+    others = User.all_objects.filter(username=value)
+    if instance is not None:
+        others = others.exclude(pk=instance.pk)
+    deleted_at = list(others.values_list('deleted_at', flat=True))
+    if not deleted_at:
+        return value
+    if all(deleted_at):
+        raise serializers.ValidationError(
+            "A deleted staff member with this username is still being removed. Try again once the deletion has finished."
+        )
+    raise serializers.ValidationError("A user with that username already exists.")
+
+
+class UserSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Serializer for User model"""
     full_name = serializers.ReadOnlyField()
+    profile_picture_variants = serializers.SerializerMethodField()
     
     class Meta:
         model = User
         fields = ('id', 'username', 'email', 'first_name', 'last_name', 'full_name', 
-                  'role', 'phone_number', 'profile_picture', 'is_active', 'created_at')
+                  'role', 'phone_number', 'profile_picture', 'profile_picture_variants',
+                  'is_active', 'created_at')
         read_only_fields = ('id', 'created_at', 'is_active')
 
+    def validate_username(self, value):
+        return validate_unique_username(value, self.instance)
+    
+    def get_profile_picture_variants(self, obj):
+        urls = variant_urls(obj)
+        request = self.context.get('request')
+        if urls and request is not None:
+            urls = {name: request.build_absolute_uri(url) for name, url in urls.items()}
+        return urls
 
-class LoginSerializer(serializers.Serializer):
+
+class LoginSerializer(TimedSerializerMixin, serializers.Serializer):
     """Serializer for login"""
     email = serializers.EmailField(required=True, allow_blank=False)
     password = serializers.CharField(write_only=True, required=True, allow_blank=False)
@@ -54,7 +86,7 @@ class LoginSerializer(serializers.Serializer):
         return attrs
 
 
-class RegisterSerializer(serializers.ModelSerializer):
+class RegisterSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Serializer for user registration"""
     password = serializers.CharField(write_only=True, min_length=8)
     password_confirm = serializers.CharField(write_only=True, min_length=8)
@@ -64,6 +96,9 @@ class RegisterSerializer(serializers.ModelSerializer):
         fields = ('username', 'email', 'password', 'password_confirm', 
                   'first_name', 'last_name', 'role', 'phone_number')
     
+    def validate_username(self, value):
+        return validate_unique_username(value)
+    
     def validate(self, attrs):
         if attrs['password'] != attrs['password_confirm']:
             raise serializers.ValidationError("Passwords don't match.")
@@ -0,0 +1,18 @@
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from jobs.queue import enqueue
+from .models import User
+
+
+@receiver(post_save, sender=User)
+def queue_profile_picture_processing(sender, instance, update_fields=None, **kwargs):
+    """Process a newly uploaded profile picture in the background worker"""
+    if update_fields is not None and 'profile_picture' not in update_fields:
+        return
+    picture = instance.profile_picture
+    if not picture or picture.name == instance.profile_picture_variants.get('original'):
+        return
+    params = {'user_id': instance.pk, 'source': picture.name}
+    transaction.on_commit(lambda: enqueue('accounts.profile_picture', params, priority=10))
@@ -0,0 +1,20 @@
+from core.purge import purge
+from jobs.queue import report_progress
+from jobs.registry import register
+from .images import process_profile_picture
+from .models import User
+
+
+@register('accounts.profile_picture')
+def profile_picture_job(params, job):
+    process_profile_picture(params['user_id'], params['source'])
+
+
+@register('accounts.purge_staff', max_attempts=5)
+def purge_staff_job(params, job):
+    user = User.all_objects.filter(pk=params['user_id'], deleted_at__isnull=False).first()
+    if user is None:
+        # Already purged by an earlier attempt
+        return None
+    counts = purge(user, on_progress=lambda **progress: report_progress(job, **progress))
+    return {'user_id': params['user_id'], 'purged': counts}
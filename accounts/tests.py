@@ -0,0 +1,33 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+User = get_user_model()
+
+
+class DeletedStaffUsernameTests(TestCase):
+    """A deleted staff member keeps their username in the table until the purge job runs"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            username='admin', email='admin@example.com', password='secret-pass', role='admin'
+        )
+
+    def setUp(self):
+        token = RefreshToken.for_user(self.admin).access_token
+        self.client.defaults.update(HTTP_HOST='localhost', HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def test_recreating_a_deleted_staff_member_before_the_purge_is_a_400(self):
+        doctor = User.objects.create_user(
+            username='drobi', email='obi@example.com', password='secret-pass', role='doctor'
+        )
+        response = self.client.delete(f'/api/auth/staff/{doctor.pk}/delete/')
+        self.assertEqual(response.status_code, 202)
+
+        response = self.client.post('/api/auth/staff/create/', {
+            'username': 'drobi', 'email': 'obi@example.com', 'password': 'secret-pass',
+            'password_confirm': 'secret-pass', 'first_name': 'Ngozi', 'last_name': 'Obi', 'role': 'doctor',
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('still being removed', str(response.json()))
@@ -1,17 +1,24 @@
 from rest_framework import status, generics
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, throttle_classes
 from rest_framework.permissions import AllowAny, IsAuthenticated, IsAdminUser
 from rest_framework.response import Response
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import get_user_model
 from django.db.models import Q
+from django.utils import timezone
 from .serializers import UserSerializer, LoginSerializer, RegisterSerializer
+from core.throttling import LoginThrottle, LoginAccountThrottle
+from core.replicas import replica_reads
+from core.response_cache import cached_response
+from jobs.queue import enqueue
+from jobs.serializers import JobSerializer
 
 User = get_user_model()
 
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes([LoginThrottle, LoginAccountThrottle])
 def login_view(request):
     """
     Login endpoint
@@ -205,6 +212,8 @@ def staff_list_view(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@cached_response(models=[User])
+@replica_reads
 def staff_stats_view(request):
     """
     Get staff statistics
@@ -306,7 +315,8 @@ def staff_update_view(request, pk):
 @permission_classes([IsAuthenticated])
 def staff_delete_view(request, pk):
     """
-    Delete staff member
+    Delete staff member. They can no longer sign in; the records that
+    reference them are updated by a background job whose progress can be polled.
     DELETE /api/auth/staff/<id>/
     """
     # Check if user is admin
@@ -326,11 +336,15 @@ def staff_delete_view(request, pk):
                 'message': 'You cannot delete your own account'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        staff_member.delete()
+        staff_member.deleted_at = timezone.now()
+        staff_member.is_active = False
+        staff_member.save(update_fields=['deleted_at', 'is_active', 'updated_at'])
+        job = enqueue('accounts.purge_staff', {'user_id': staff_member.pk}, user=request.user)
         return Response({
             'success': True,
-            'message': 'Staff member deleted successfully'
-        }, status=status.HTTP_200_OK)
+            'message': 'Staff member deleted successfully',
+            'job': JobSerializer(job).data
+        }, status=status.HTTP_202_ACCEPTED)
     except User.DoesNotExist:
         return Response({
             'success': False,
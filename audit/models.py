@@ -0,0 +1,50 @@
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.contrib.auth import get_user_model
+
+User = get_user_model()
+
+
+class AuditEntry(models.Model):
+    """
+    Who created, changed or deleted a record, with the changed fields.
+    Append-only: rows are written in batches by audit/recorder.py and only
+    ever removed by ``manage.py prune_audit``.
+    """
+    ACTION_CHOICES = [
+        ('create', 'Create'),
+        ('update', 'Update'),
+        ('delete', 'Delete'),
+    ]
+
+    entity = models.CharField(max_length=100)
+    entity_id = models.BigIntegerField()
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES)
+    # {field: [old, new]}; old is None on create, new is None on delete
+    changes = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    # No database constraint: entries outlive the users they name
+    actor = models.ForeignKey(
+        User, on_delete=models.DO_NOTHING, db_constraint=False, null=True, blank=True, related_name='+'
+    )
+    timestamp = models.DateTimeField()
+
+    class Meta:
+        db_table = 'audit_entries'
+        verbose_name = 'Audit Entry'
+        verbose_name_plural = 'Audit Entries'
+        ordering = ['-timestamp', '-id']
+        indexes = [
+            models.Index(fields=['entity', 'entity_id', 'timestamp'], name='audit_entity_time_idx'),
+            models.Index(fields=['timestamp'], name='audit_timestamp_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.action} {self.entity}#{self.entity_id} at {self.timestamp:%Y-%m-%d %H:%M:%S}"
+
+    def save(self, *args, **kwargs):
+        if self.pk is not None:
+            raise ValueError('Audit entries are append-only')
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise ValueError('Audit entries are append-only, use manage.py prune_audit')
@@ -0,0 +1,128 @@
+"""
+Audit capture.
+
+Audited instances keep a snapshot of their field values from when they were
+loaded (``post_init``), so a save can be diffed in memory without reading
+the old row again. Each change becomes an unsaved ``AuditEntry`` that is
+only released by ``transaction.on_commit``, so changes rolled back with
+their transaction (or savepoint) are never recorded.
+
+Released entries are collected in the active ``batch()``, which
+``AuditMiddleware`` opens around every request, and written with a single
+``bulk_create`` when the batch closes. Outside a batch (shell, scripts)
+each entry is written as soon as its transaction commits.
+"""
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import partial
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import AuditEntry
+
+logger = logging.getLogger(__name__)
+
+_batch = ContextVar('audit_batch', default=None)
+_request = ContextVar('audit_request', default=None)
+
+SNAPSHOT_ATTR = '_audit_snapshot'
+
+
+def tracked_fields(model):
+    """Concrete fields worth diffing; ``auto_now`` timestamps change on every save"""
+    return [
+        field for field in model._meta.concrete_fields
+        if not getattr(field, 'auto_now', False)
+    ]
+
+
+def take_snapshot(instance):
+    values = instance.__dict__
+    snapshot = {}
+    for field in tracked_fields(type(instance)):
+        # Deferred fields are missing from __dict__ and are left out of the diff
+        if field.attname in values:
+            snapshot[field.attname] = values[field.attname]
+    setattr(instance, SNAPSHOT_ATTR, snapshot)
+
+
+def diff(instance, created):
+    before = {} if created else getattr(instance, SNAPSHOT_ATTR, {})
+    values = instance.__dict__
+    changes = {}
+    for field in tracked_fields(type(instance)):
+        name = field.attname
+        if name not in values or (not created and name not in before):
+            continue
+        old, new = before.get(name), values[name]
+        if created or old != new:
+            changes[name] = [old, new]
+    return changes
+
+
+def _current_actor_id():
+    request = _request.get()
+    if request is None:
+        return None
+    # DRF copies the authenticated user onto the Django request
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return user.pk
+    return None
+
+
+def record(instance, action, changes, using):
+    entry = AuditEntry(
+        entity=instance._meta.label_lower,
+        entity_id=instance.pk,
+        action=action,
+        changes=changes,
+        actor_id=_current_actor_id(),
+        timestamp=timezone.now(),
+    )
+    transaction.on_commit(partial(_committed, entry), using=using)
+
+
+def _committed(entry):
+    entries = _batch.get()
+    if entries is not None:
+        entries.append(entry)
+    else:
+        AuditEntry.objects.bulk_create([entry])
+
+
+def flush(entries):
+    if not entries:
+        return
+    try:
+        AuditEntry.objects.bulk_create(entries, batch_size=500)
+    except Exception:
+        # Never turn an already committed change into an error response
+        logger.exception('Failed to write %d audit entries', len(entries))
+
+
+@contextmanager
+def batch(request=None):
+    """Collect committed entries and write them in one go on exit"""
+    entries = []
+    batch_token = _batch.set(entries)
+    request_token = _request.set(request)
+    try:
+        yield entries
+    finally:
+        _batch.reset(batch_token)
+        _request.reset(request_token)
+        flush(entries)
+
+
+class AuditMiddleware:
+    """Write the request's audit entries with one bulk insert once it is done"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with batch(request):
+            return self.get_response(request)
@@ -0,0 +1,15 @@
+from rest_framework import serializers
+from .models import AuditEntry
+from core.metrics import TimedSerializerMixin
+
+
+class AuditEntrySerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    actor_name = serializers.SerializerMethodField()
+
+    class Meta:
+        model = AuditEntry
+        fields = ['id', 'entity', 'entity_id', 'action', 'changes', 'actor', 'actor_name', 'timestamp']
+
+    def get_actor_name(self, obj):
+        names = self.context.get('actor_names', {})
+        return names.get(obj.actor_id)
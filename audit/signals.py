@@ -0,0 +1,57 @@
+from django.apps import apps
+from django.db.models.signals import post_delete, post_init, post_save
+
+from .recorder import SNAPSHOT_ATTR, diff, record, take_snapshot
+
+AUDITED_MODELS = (
+    'patients.Patient',
+    'lab_tests.LabTest',
+    'lab_tests.LabTestResult',
+    'billing.Invoice',
+    'billing.InvoiceItem',
+    'billing.Payment',
+)
+
+
+def snapshot_on_init(sender, instance, **kwargs):
+    take_snapshot(instance)
+
+
+def audit_save(sender, instance, created, raw=False, using=None, **kwargs):
+    if raw:
+        # Fixture loading
+        return
+    changes = diff(instance, created)
+    if created or changes:
+        record(instance, 'create' if created else 'update', changes, using)
+    take_snapshot(instance)
+
+
+def audit_delete(sender, instance, using=None, **kwargs):
+    snapshot = getattr(instance, SNAPSHOT_ATTR, {})
+    record(instance, 'delete', {name: [value, None] for name, value in snapshot.items()}, using)
+
+
+def _refreshing(refresh_from_db):
+    """refresh_from_db() copies fields from a fresh instance, keep the snapshot in step"""
+    def wrapper(self, using=None, fields=None, **kwargs):
+        refresh_from_db(self, using=using, fields=fields, **kwargs)
+        snapshot = getattr(self, SNAPSHOT_ATTR, {})
+        take_snapshot(self)
+        if fields is not None:
+            # Accepts field names and attnames (patient / patient_id)
+            refreshed = set(fields) | {self._meta.get_field(name).attname for name in fields}
+            snapshot.update({name: value for name, value in getattr(self, SNAPSHOT_ATTR).items() if name in refreshed})
+            setattr(self, SNAPSHOT_ATTR, snapshot)
+    wrapper.audit_wrapped = True
+    return wrapper
+
+
+def connect():
+    for label in AUDITED_MODELS:
+        model = apps.get_model(label)
+        if not getattr(model.refresh_from_db, 'audit_wrapped', False):
+            model.refresh_from_db = _refreshing(model.refresh_from_db)
+        post_init.connect(snapshot_on_init, sender=model, dispatch_uid=f'audit_init_{label}')
+        post_save.connect(audit_save, sender=model, dispatch_uid=f'audit_save_{label}')
+        post_delete.connect(audit_delete, sender=model, dispatch_uid=f'audit_delete_{label}')
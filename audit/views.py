@@ -0,0 +1,110 @@
+from datetime import datetime, time
+
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from core.replicas import replica_reads
+from .models import AuditEntry
+from .serializers import AuditEntrySerializer
+
+User = get_user_model()
+
+
+def _parse_moment(value, end_of_day=False):
+    """ISO datetime, or a YYYY-MM-DD date (start or end of that day); None if malformed"""
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            return None
+        moment = datetime.combine(day, time.max if end_of_day else time.min)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@replica_reads
+def audit_list_view(request):
+    """
+    Audit trail, newest first (admin only)
+    GET /api/audit/
+    Query Params:
+        entity (str): Model label, e.g. patients.patient
+        entity_id (int): Record id, use with entity
+        actor (int): User id
+        action (str): create, update or delete
+        since (str): ISO datetime or YYYY-MM-DD
+        until (str): ISO datetime or YYYY-MM-DD (inclusive)
+        page (int): Page number
+        page_size (int): Items per page
+    """
+    if request.user.role != 'admin' and not request.user.is_superuser:
+        return Response({
+            'success': False,
+            'message': 'Permission denied. Admin access required.'
+        }, status=status.HTTP_403_FORBIDDEN)
+
+    entries = AuditEntry.objects.all()
+
+    entity = request.query_params.get('entity')
+    if entity:
+        entries = entries.filter(entity=entity.lower())
+
+    for name, lookup in (('entity_id', 'entity_id'), ('actor', 'actor_id')):
+        value = request.query_params.get(name)
+        if value:
+            if not value.isdigit():
+                return Response({
+                    'success': False,
+                    'message': f'{name} must be an integer'
+                }, status=status.HTTP_400_BAD_REQUEST)
+            entries = entries.filter(**{lookup: int(value)})
+
+    action = request.query_params.get('action')
+    if action:
+        entries = entries.filter(action=action)
+
+    for name, lookup in (('since', 'timestamp__gte'), ('until', 'timestamp__lte')):
+        value = request.query_params.get(name)
+        if value:
+            moment = _parse_moment(value, end_of_day=name == 'until')
+            if moment is None:
+                return Response({
+                    'success': False,
+                    'message': f'Invalid {name}. Use an ISO datetime or YYYY-MM-DD'
+                }, status=status.HTTP_400_BAD_REQUEST)
+            entries = entries.filter(**{lookup: moment})
+
+    page_number = int(request.query_params.get('page', 1))
+    page_size = int(request.query_params.get('page_size', 50))
+    start_index = (page_number - 1) * page_size
+    end_index = start_index + page_size
+
+    total_entries = entries.count()
+    paginated_entries = list(entries[start_index:end_index])
+
+    # Actors are not joined (no FK constraint), resolve the page's names in one query
+    actor_ids = {entry.actor_id for entry in paginated_entries if entry.actor_id}
+    actor_names = {
+        row['id']: f"{row['first_name']} {row['last_name']}".strip() or row['username']
+        for row in User.objects.filter(id__in=actor_ids).values('id', 'first_name', 'last_name', 'username')
+    }
+
+    serializer = AuditEntrySerializer(paginated_entries, many=True, context={'actor_names': actor_names})
+    return Response({
+        'success': True,
+        'entries': serializer.data,
+        'pagination': {
+            'total': total_entries,
+            'page': page_number,
+            'page_size': page_size,
+            'total_pages': (total_entries + page_size - 1) // page_size,
+        }
+    }, status=status.HTTP_200_OK)
@@ -0,0 +1,100 @@
+"""
+Accounts-receivable aging.
+
+Outstanding invoices (pending or partially paid, with a balance) are
+bucketed by how many days past ``due_date`` they are on the ``as_of`` date.
+Each bucket is a ``due_date`` range, so a whole report is a single
+conditional-aggregation query that the (status, due_date) index on
+``invoices`` can serve, with no per-row date arithmetic in SQL.
+"""
+from datetime import timedelta
+
+from django.db.models import Count, Q, Sum
+
+from .models import Invoice
+
+OUTSTANDING_STATUSES = ('pending', 'partial')
+
+# (key, label, min days past due, max days past due)
+AGING_BUCKETS = (
+    ('current', 'Current', None, 0),
+    ('1_30', '1-30 days', 1, 30),
+    ('31_60', '31-60 days', 31, 60),
+    ('61_90', '61-90 days', 61, 90),
+    ('90_plus', '90+ days', 91, None),
+)
+BUCKET_KEYS = tuple(key for key, _, _, _ in AGING_BUCKETS)
+
+
+def outstanding_invoices():
+    return Invoice.objects.filter(status__in=OUTSTANDING_STATUSES, balance__gt=0)
+
+
+def bucket_q(key, as_of):
+    """``due_date`` condition for invoices in bucket ``key`` on ``as_of``"""
+    for bucket_key, _, min_days, max_days in AGING_BUCKETS:
+        if bucket_key == key:
+            q = Q()
+            if min_days is not None:
+                # At least min_days overdue: due on or before as_of - min_days
+                q &= Q(due_date__lte=as_of - timedelta(days=min_days))
+            if max_days is not None:
+                q &= Q(due_date__gte=as_of - timedelta(days=max_days))
+            return q
+    raise ValueError(f'Unknown aging bucket "{key}"')
+
+
+def bucket_aggregates(as_of):
+    """``aggregate()``/``annotate()`` kwargs: count and balance per bucket plus totals"""
+    aggregates = {
+        'total_count': Count('id'),
+        'total_balance': Sum('balance'),
+    }
+    for key in BUCKET_KEYS:
+        q = bucket_q(key, as_of)
+        aggregates[f'{key}_count'] = Count('id', filter=q)
+        aggregates[f'{key}_balance'] = Sum('balance', filter=q)
+    return aggregates
+
+
+def format_buckets(row):
+    """Aggregate row -> ``({key: {label, count, balance}}, total)``"""
+    buckets = {}
+    for key, label, _, _ in AGING_BUCKETS:
+        buckets[key] = {
+            'label': label,
+            'count': row[f'{key}_count'],
+            'balance': float(row[f'{key}_balance'] or 0),
+        }
+    total = {
+        'count': row['total_count'],
+        'balance': float(row['total_balance'] or 0),
+    }
+    return buckets, total
+
+
+def aging_summary(as_of):
+    """Overall buckets, one query"""
+    return format_buckets(outstanding_invoices().aggregate(**bucket_aggregates(as_of)))
+
+
+def aging_by_patient(as_of):
+    """Per-patient bucket rows, largest outstanding balance first, one query"""
+    return (
+        outstanding_invoices()
+        .values('patient_id')
+        .annotate(**bucket_aggregates(as_of))
+        .order_by('-total_balance', 'patient_id')
+    )
+
+
+def days_past_due(due_date, as_of):
+    return max(0, (as_of - due_date).days)
+
+
+def bucket_for(due_date, as_of):
+    days = (as_of - due_date).days
+    for key, _, min_days, max_days in AGING_BUCKETS:
+        if (min_days is None or days >= min_days) and (max_days is None or days <= max_days):
+            return key
+    return None
@@ -0,0 +1,87 @@
+# Generated by Django 5.0.3 on 2026-10-19 01:38
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('billing', '0002_invoice_invoices_status_due_idx'),
+        ('patients', '0004_patient_match_keys'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedInvoice',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('invoice_number', models.CharField(max_length=50, unique=True)),
+                ('status', models.CharField(choices=[('draft', 'Draft'), ('pending', 'Pending'), ('partial', 'Partially Paid'), ('paid', 'Paid'), ('cancelled', 'Cancelled')], default='draft', max_length=20)),
+                ('invoice_date', models.DateField()),
+                ('due_date', models.DateField()),
+                ('subtotal', models.DecimalField(decimal_places=2, default=0.0, max_digits=10)),
+                ('tax_rate', models.DecimalField(decimal_places=2, default=0.0, max_digits=5)),
+                ('tax_amount', models.DecimalField(decimal_places=2, default=0.0, max_digits=10)),
+                ('discount', models.DecimalField(decimal_places=2, default=0.0, max_digits=10)),
+                ('total_amount', models.DecimalField(decimal_places=2, default=0.0, max_digits=10)),
+                ('paid_amount', models.DecimalField(decimal_places=2, default=0.0, max_digits=10)),
+                ('balance', models.DecimalField(decimal_places=2, default=0.0, max_digits=10)),
+                ('notes', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('created_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_invoices_created', to=settings.AUTH_USER_MODEL)),
+                ('patient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_invoices', to='patients.patient')),
+            ],
+            options={
+                'verbose_name': 'Archived Invoice',
+                'verbose_name_plural': 'Archived Invoices',
+                'db_table': 'invoices_archive',
+                'ordering': ['-invoice_date', '-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedInvoiceItem',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('description', models.CharField(blank=True, max_length=500, null=True)),
+                ('quantity', models.DecimalField(decimal_places=2, default=1.0, max_digits=10)),
+                ('unit_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('total', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('invoice', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='billing.archivedinvoice')),
+                ('service', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='billing.service')),
+            ],
+            options={
+                'verbose_name': 'Archived Invoice Item',
+                'verbose_name_plural': 'Archived Invoice Items',
+                'db_table': 'invoice_items_archive',
+                'ordering': [],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedPayment',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('payment_method', models.CharField(choices=[('cash', 'Cash'), ('card', 'Credit/Debit Card'), ('check', 'Check'), ('bank_transfer', 'Bank Transfer'), ('insurance', 'Insurance'), ('other', 'Other')], default='cash', max_length=20)),
+                ('payment_date', models.DateField()),
+                ('reference_number', models.CharField(blank=True, max_length=100, null=True)),
+                ('notes', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField()),
+                ('invoice', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='payments', to='billing.archivedinvoice')),
+                ('processed_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_payments_processed', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Archived Payment',
+                'verbose_name_plural': 'Archived Payments',
+                'db_table': 'payments_archive',
+                'ordering': ['-payment_date', '-created_at'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='archivedinvoice',
+            index=models.Index(fields=['invoice_date'], name='invoices_arch_date_idx'),
+        ),
+    ]
@@ -2,6 +2,7 @@ from django.db import models
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 from decimal import Decimal
+from core.archive import archive_model
 from patients.models import Patient
 
 User = get_user_model()
@@ -69,6 +70,12 @@ class Invoice(models.Model):
         verbose_name = 'Invoice'
         verbose_name_plural = 'Invoices'
         ordering = ['-invoice_date', '-created_at']
+        indexes = [
+            # Accounts-receivable aging (billing/aging.py)
+            models.Index(fields=['status', 'due_date'], name='invoices_status_due_idx'),
+            # Delta sync (core/sync.py)
+            models.Index(fields=['updated_at', 'id'], name='invoices_updated_idx'),
+        ]
     
     def __str__(self):
         return f"Invoice {self.invoice_number} - {self.patient.full_name}"
@@ -81,7 +88,6 @@ class Invoice(models.Model):
                 last_num = int(last_invoice.invoice_number.split('-')[-1]) if '-' in last_invoice.invoice_number else 0
                 self.invoice_number = f"INV-{timezone.now().strftime('%Y%m%d')}-{last_num + 1:04d}"
             else:
-                from django.utils import timezone
                 self.invoice_number = f"INV-{timezone.now().strftime('%Y%m%d')}-0001"
         
         # Ensure all values are Decimal for calculations
@@ -155,12 +161,17 @@ class Payment(models.Model):
     notes = models.TextField(blank=True, null=True)
     processed_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='payments_processed')
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         db_table = 'payments'
         verbose_name = 'Payment'
         verbose_name_plural = 'Payments'
         ordering = ['-payment_date', '-created_at']
+        indexes = [
+            # Delta sync (core/sync.py)
+            models.Index(fields=['updated_at', 'id'], name='payments_updated_idx'),
+        ]
     
     def __str__(self):
         return f"Payment of ${self.amount} for {self.invoice.invoice_number}"
@@ -171,3 +182,16 @@ class Payment(models.Model):
         self.invoice.paid_amount = sum(payment.amount for payment in self.invoice.payments.all())
         self.invoice.save()
 
+
+
+# Paid invoices moved out of the hot tables by manage.py archive_records (core/archive.py)
+ArchivedInvoice = archive_model(
+    Invoice, 'ArchivedInvoice', 'invoices_archive',
+    indexes=[models.Index(fields=['invoice_date'], name='invoices_arch_date_idx')],
+)
+ArchivedInvoiceItem = archive_model(
+    InvoiceItem, 'ArchivedInvoiceItem', 'invoice_items_archive', relations={'invoice': ArchivedInvoice},
+)
+ArchivedPayment = archive_model(
+    Payment, 'ArchivedPayment', 'payments_archive', relations={'invoice': ArchivedInvoice},
+)
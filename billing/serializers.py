@@ -2,11 +2,13 @@ from rest_framework import serializers
 from .models import Invoice, InvoiceItem, Payment, Service
 from patients.models import Patient
 from django.contrib.auth import get_user_model
+from core.rows import RowSerializer, Computed, Nested, user_name_column
+from core.metrics import TimedSerializerMixin
 
 User = get_user_model()
 
 
-class ServiceSerializer(serializers.ModelSerializer):
+class ServiceSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Serializer for Service model"""
     
     class Meta:
@@ -15,7 +17,7 @@ class ServiceSerializer(serializers.ModelSerializer):
         read_only_fields = ('id', 'created_at', 'updated_at')
 
 
-class InvoiceItemSerializer(serializers.ModelSerializer):
+class InvoiceItemSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Serializer for InvoiceItem model"""
     service_name = serializers.CharField(source='service.name', read_only=True)
     
@@ -25,7 +27,7 @@ class InvoiceItemSerializer(serializers.ModelSerializer):
         read_only_fields = ('id', 'total')
 
 
-class PaymentSerializer(serializers.ModelSerializer):
+class PaymentSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Serializer for Payment model"""
     processed_by_name = serializers.SerializerMethodField()
     
@@ -41,7 +43,7 @@ class PaymentSerializer(serializers.ModelSerializer):
         return None
 
 
-class InvoiceSerializer(serializers.ModelSerializer):
+class InvoiceSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Serializer for Invoice model"""
     patient_name = serializers.CharField(source='patient.full_name', read_only=True)
     patient_email = serializers.CharField(source='patient.email', read_only=True)
@@ -67,7 +69,23 @@ class InvoiceSerializer(serializers.ModelSerializer):
         return None
 
 
-class InvoiceCreateSerializer(serializers.ModelSerializer):
+# Fast read paths, same output as the serializers above
+invoice_item_rows = RowSerializer(InvoiceItemSerializer)
+payment_rows = RowSerializer(PaymentSerializer, computed={
+    'processed_by_name': user_name_column('processed_by'),
+})
+invoice_rows = RowSerializer(InvoiceSerializer, computed={
+    'patient_name': Computed(
+        ('patient__first_name', 'patient__last_name'),
+        lambda first, last: f"{first} {last}".strip(),
+    ),
+    'created_by_name': user_name_column('created_by'),
+    'items': Nested(invoice_item_rows, 'invoice'),
+    'payments': Nested(payment_rows, 'invoice'),
+})
+
+
+class InvoiceCreateSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Serializer for creating an invoice"""
     items = InvoiceItemSerializer(many=True, required=False)
     
@@ -94,7 +112,7 @@ class InvoiceCreateSerializer(serializers.ModelSerializer):
         return invoice
 
 
-class PaymentCreateSerializer(serializers.ModelSerializer):
+class PaymentCreateSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Serializer for creating a payment"""
     
     class Meta:
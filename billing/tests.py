@@ -0,0 +1,64 @@
+from datetime import date
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from core.replicas import REPLICA_ALIAS, ReplicaRouter, current_read_alias
+from patients.models import Patient
+from .models import Invoice
+
+User = get_user_model()
+
+
+class AgingExportReplicaTests(TestCase):
+    """The export streams its rows after the view returns; they must still be read from the replica"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            username='admin', email='admin@example.com', password='secret-pass', role='admin'
+        )
+        patient = Patient.objects.create(
+            first_name='Ada', last_name='Obi', date_of_birth=date(1990, 1, 1),
+            gender='female', phone_number='0800000000',
+        )
+        Invoice.objects.create(
+            invoice_number='INV-1', patient=patient, status='pending',
+            invoice_date=date(2025, 1, 1), due_date=date(2025, 1, 31),
+            subtotal=Decimal('100.00'),
+        )
+
+    def setUp(self):
+        token = RefreshToken.for_user(self.admin).access_token
+        self.client.defaults.update(HTTP_HOST='localhost', HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def export_read_aliases(self, level):
+        aliases = []
+
+        def db_for_read(router, model, **hints):
+            aliases.append(current_read_alias())
+            # There is no replica database in tests; record the routing and read the primary
+            return None
+
+        with mock.patch('core.replicas.should_use_replica', return_value=True), \
+                mock.patch.object(ReplicaRouter, 'db_for_read', db_for_read):
+            response = self.client.get('/api/billing/aging/export/', {'level': level, 'as_of': '2025-06-01'})
+            self.assertEqual(response.status_code, 200)
+            aliases.clear()
+            content = b''.join(response.streaming_content).decode()
+        return aliases, content
+
+    def test_invoice_export_reads_replica(self):
+        aliases, content = self.export_read_aliases('invoice')
+        self.assertIn('INV-1', content)
+        self.assertTrue(aliases)
+        self.assertEqual(set(aliases), {REPLICA_ALIAS})
+
+    def test_patient_export_reads_replica(self):
+        aliases, content = self.export_read_aliases('patient')
+        self.assertIn('Ada Obi', content)
+        self.assertTrue(aliases)
+        self.assertEqual(set(aliases), {REPLICA_ALIAS})
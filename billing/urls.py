@@ -12,5 +12,8 @@ urlpatterns = [
     path('payments/create/', views.payment_create_view, name='payment_create'),
     path('services/', views.service_list_view, name='service_list'),
     path('stats/', views.billing_stats_view, name='billing_stats'),
+    path('aging/', views.aging_report_view, name='aging_report'),
+    path('aging/invoices/', views.aging_invoices_view, name='aging_invoices'),
+    path('aging/export/', views.aging_export_view, name='aging_export'),
 ]
 
@@ -1,15 +1,27 @@
 from rest_framework import status
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, throttle_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from django.db.models import Sum, Count, Q
+import csv
+from django.http import StreamingHttpResponse
 from django.utils import timezone
-from datetime import timedelta
-from .models import Invoice, InvoiceItem, Payment, Service
+from datetime import datetime
+from patients.models import Patient
+from .aging import (
+    BUCKET_KEYS, aging_by_patient, aging_summary, bucket_for, bucket_q,
+    days_past_due, format_buckets, outstanding_invoices,
+)
+from .models import ArchivedInvoice, Invoice, InvoiceItem, Payment, Service
 from .serializers import (
     InvoiceSerializer, InvoiceCreateSerializer, InvoiceItemSerializer,
     PaymentSerializer, PaymentCreateSerializer, ServiceSerializer
 )
+from core.throttling import ExpensiveEndpointThrottle, UserTokenBucketThrottle
+from core.replicas import REPLICA_ALIAS, current_read_alias, replica_iterator, replica_reads
+from core.archive import get_with_archive, include_archived, page_with_archive
+from reports.dashboard import billing_section
+from core.response_cache import cached_response
+from core.idempotency import idempotent
 
 
 @api_view(['GET'])
@@ -23,31 +35,29 @@ def invoice_list_view(request):
         patient_id (int): Filter by patient
         start_date (YYYY-MM-DD): Start date
         end_date (YYYY-MM-DD): End date
+        include_archived (bool): true to list archived invoices after the current ones
         page (int): Page number
         page_size (int): Items per page
     """
-    invoices = Invoice.objects.all().order_by('-invoice_date', '-created_at')
+    filters = {}
     
-    # Filters
     status_filter = request.query_params.get('status')
     if status_filter:
-        invoices = invoices.filter(status=status_filter)
+        filters['status'] = status_filter
     
     patient_id = request.query_params.get('patient_id')
     if patient_id:
-        invoices = invoices.filter(patient_id=patient_id)
+        filters['patient_id'] = patient_id
     
     start_date = request.query_params.get('start_date')
     if start_date:
-        from datetime import datetime
-        start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
-        invoices = invoices.filter(invoice_date__gte=start_date)
+        filters['invoice_date__gte'] = datetime.strptime(start_date, '%Y-%m-%d').date()
     
     end_date = request.query_params.get('end_date')
     if end_date:
-        from datetime import datetime
-        end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
-        invoices = invoices.filter(invoice_date__lte=end_date)
+        filters['invoice_date__lte'] = datetime.strptime(end_date, '%Y-%m-%d').date()
+    
+    invoices = Invoice.objects.filter(**filters).order_by('-invoice_date', '-created_at')
     
     # Pagination
     page_number = int(request.query_params.get('page', 1))
@@ -55,8 +65,15 @@ def invoice_list_view(request):
     start_index = (page_number - 1) * page_size
     end_index = start_index + page_size
     
-    total_invoices = invoices.count()
-    paginated_invoices = invoices[start_index:end_index]
+    if include_archived(request):
+        archived_invoices = ArchivedInvoice.objects.filter(**filters).order_by('-invoice_date', '-created_at')
+        hot_page, archived_page, total_invoices = page_with_archive(
+            invoices, archived_invoices, start_index, end_index
+        )
+        paginated_invoices = list(hot_page) + list(archived_page)
+    else:
+        total_invoices = invoices.count()
+        paginated_invoices = invoices[start_index:end_index]
     
     serializer = InvoiceSerializer(paginated_invoices, many=True)
     return Response({
@@ -73,6 +90,7 @@ def invoice_list_view(request):
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@idempotent
 def invoice_create_view(request):
     """
     Create a new invoice
@@ -99,11 +117,11 @@ def invoice_create_view(request):
 @permission_classes([IsAuthenticated])
 def invoice_detail_view(request, pk):
     """
-    Get invoice details
+    Get invoice details, including archived invoices
     GET /api/billing/invoices/<id>/
     """
     try:
-        invoice = Invoice.objects.get(pk=pk)
+        invoice = get_with_archive(Invoice.objects, ArchivedInvoice.objects, pk)
         serializer = InvoiceSerializer(invoice)
         return Response({
             'success': True,
@@ -169,6 +187,7 @@ def invoice_delete_view(request, pk):
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@idempotent
 def payment_create_view(request):
     """
     Create a payment for an invoice
@@ -208,6 +227,9 @@ def service_list_view(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@throttle_classes([UserTokenBucketThrottle, ExpensiveEndpointThrottle])
+@cached_response(models=[Invoice])
+@replica_reads
 def billing_stats_view(request):
     """
     Get billing statistics
@@ -219,51 +241,265 @@ def billing_stats_view(request):
             'message': 'Permission denied. Admin access required.'
         }, status=status.HTTP_403_FORBIDDEN)
     
-    # Overall statistics
-    total_invoices = Invoice.objects.count()
-    total_revenue = Invoice.objects.aggregate(Sum('total_amount'))['total_amount__sum'] or 0
-    total_paid = Invoice.objects.aggregate(Sum('paid_amount'))['paid_amount__sum'] or 0
-    total_pending = total_revenue - total_paid
-    
-    # Status breakdown
-    invoices_by_status = Invoice.objects.values('status').annotate(count=Count('status'))
-    status_stats = {}
-    for item in invoices_by_status:
-        status_stats[item['status']] = {
-            'name': dict(Invoice.STATUS_CHOICES).get(item['status'], item['status']),
-            'count': item['count']
+    # Shared with the dashboard; includes archived invoices
+    return Response({
+        'success': True,
+        'stats': billing_section()
+    }, status=status.HTTP_200_OK)
+
+
+
+def _aging_params(request):
+    """``(as_of, error response)`` from the query string"""
+    as_of = request.query_params.get('as_of')
+    if not as_of:
+        return timezone.now().date(), None
+    try:
+        return datetime.strptime(as_of, '%Y-%m-%d').date(), None
+    except ValueError:
+        return None, Response({
+            'success': False,
+            'message': 'as_of must use the YYYY-MM-DD format'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+
+def _admin_required(request):
+    if request.user.role != 'admin' and not request.user.is_superuser:
+        return Response({
+            'success': False,
+            'message': 'Permission denied. Admin access required.'
+        }, status=status.HTTP_403_FORBIDDEN)
+    return None
+
+
+def _patient_names(patient_ids):
+    names = {}
+    for row in Patient.objects.filter(pk__in=patient_ids).values('id', 'first_name', 'last_name'):
+        names[row['id']] = f"{row['first_name']} {row['last_name']}".strip()
+    return names
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@throttle_classes([UserTokenBucketThrottle, ExpensiveEndpointThrottle])
+@cached_response(models=[Invoice, Patient])
+@replica_reads
+def aging_report_view(request):
+    """
+    Accounts-receivable aging: outstanding balances by days past due, overall and by patient
+    GET /api/billing/aging/
+    Query Params:
+        as_of (YYYY-MM-DD): Date to age against (default: today)
+        page (int): Page number of the patient breakdown
+        page_size (int): Patients per page
+    """
+    denied = _admin_required(request)
+    if denied:
+        return denied
+
+    as_of, error = _aging_params(request)
+    if error:
+        return error
+
+    buckets, total = aging_summary(as_of)
+
+    page_number = int(request.query_params.get('page', 1))
+    page_size = int(request.query_params.get('page_size', 20))
+    start_index = (page_number - 1) * page_size
+    end_index = start_index + page_size
+
+    # Every patient with an outstanding invoice appears once in the breakdown
+    total_patients = outstanding_invoices().values('patient_id').distinct().count()
+    rows = list(aging_by_patient(as_of)[start_index:end_index])
+    names = _patient_names([row['patient_id'] for row in rows])
+
+    patients = []
+    for row in rows:
+        patient_buckets, patient_total = format_buckets(row)
+        patients.append({
+            'patient_id': row['patient_id'],
+            'patient_name': names.get(row['patient_id']),
+            'buckets': patient_buckets,
+            'total': patient_total,
+        })
+
+    return Response({
+        'success': True,
+        'aging': {
+            'as_of': as_of.strftime('%Y-%m-%d'),
+            'buckets': buckets,
+            'total': total,
+        },
+        'patients': patients,
+        'pagination': {
+            'total': total_patients,
+            'page': page_number,
+            'page_size': page_size,
+            'total_pages': (total_patients + page_size - 1) // page_size,
         }
-    
-    # Recent revenue (last 30 days)
-    thirty_days_ago = timezone.now().date() - timedelta(days=30)
-    recent_revenue = Invoice.objects.filter(
-        invoice_date__gte=thirty_days_ago
-    ).aggregate(Sum('total_amount'))['total_amount__sum'] or 0
-    
-    # Monthly revenue trend (last 6 months)
-    monthly_revenue = []
-    for i in range(5, -1, -1):
-        month_start = timezone.now().date().replace(day=1) - timedelta(days=30*i)
-        month_end = (month_start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
-        revenue = Invoice.objects.filter(
-            invoice_date__gte=month_start,
-            invoice_date__lte=month_end
-        ).aggregate(Sum('total_amount'))['total_amount__sum'] or 0
-        monthly_revenue.append({
-            'month': month_start.strftime('%Y-%m'),
-            'revenue': float(revenue)
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@throttle_classes([UserTokenBucketThrottle, ExpensiveEndpointThrottle])
+@cached_response(models=[Invoice, Patient])
+@replica_reads
+def aging_invoices_view(request):
+    """
+    Outstanding invoices behind an aging bucket (drill-down)
+    GET /api/billing/aging/invoices/
+    Query Params:
+        bucket (str): current, 1_30, 31_60, 61_90 or 90_plus (default: all)
+        patient (int): Only this patient's invoices
+        as_of (YYYY-MM-DD): Date to age against (default: today)
+        page (int): Page number
+        page_size (int): Items per page
+    """
+    denied = _admin_required(request)
+    if denied:
+        return denied
+
+    as_of, error = _aging_params(request)
+    if error:
+        return error
+
+    invoices = outstanding_invoices()
+
+    bucket = request.query_params.get('bucket')
+    if bucket:
+        if bucket not in BUCKET_KEYS:
+            return Response({
+                'success': False,
+                'message': f"bucket must be one of: {', '.join(BUCKET_KEYS)}"
+            }, status=status.HTTP_400_BAD_REQUEST)
+        invoices = invoices.filter(bucket_q(bucket, as_of))
+
+    patient_id = request.query_params.get('patient')
+    if patient_id:
+        invoices = invoices.filter(patient_id=patient_id)
+
+    # Oldest debt first
+    invoices = invoices.order_by('due_date', 'id')
+
+    page_number = int(request.query_params.get('page', 1))
+    page_size = int(request.query_params.get('page_size', 20))
+    start_index = (page_number - 1) * page_size
+    end_index = start_index + page_size
+
+    total_invoices = invoices.count()
+    rows = invoices[start_index:end_index].values(
+        'id', 'invoice_number', 'patient_id', 'patient__first_name', 'patient__last_name',
+        'status', 'invoice_date', 'due_date', 'total_amount', 'paid_amount', 'balance',
+    )
+
+    data = []
+    for row in rows:
+        data.append({
+            'id': row['id'],
+            'invoice_number': row['invoice_number'],
+            'patient': row['patient_id'],
+            'patient_name': f"{row['patient__first_name']} {row['patient__last_name']}".strip(),
+            'status': row['status'],
+            'invoice_date': row['invoice_date'].strftime('%Y-%m-%d'),
+            'due_date': row['due_date'].strftime('%Y-%m-%d'),
+            'days_past_due': days_past_due(row['due_date'], as_of),
+            'bucket': bucket_for(row['due_date'], as_of),
+            'total_amount': float(row['total_amount']),
+            'paid_amount': float(row['paid_amount']),
+            'balance': float(row['balance']),
         })
-    
+
     return Response({
         'success': True,
-        'stats': {
-            'total_invoices': total_invoices,
-            'total_revenue': float(total_revenue),
-            'total_paid': float(total_paid),
-            'total_pending': float(total_pending),
-            'recent_revenue': float(recent_revenue),
-            'by_status': status_stats,
-            'monthly_revenue': monthly_revenue,
+        'as_of': as_of.strftime('%Y-%m-%d'),
+        'invoices': data,
+        'pagination': {
+            'total': total_invoices,
+            'page': page_number,
+            'page_size': page_size,
+            'total_pages': (total_invoices + page_size - 1) // page_size,
         }
     }, status=status.HTTP_200_OK)
 
+
+class _Echo:
+    """File-like object whose write() hands the line back, for streaming csv.writer output"""
+
+    def write(self, value):
+        return value
+
+
+def _aging_invoice_rows(as_of):
+    writer = csv.writer(_Echo())
+    yield writer.writerow([
+        'invoice_number', 'patient_id', 'patient_name', 'status', 'invoice_date', 'due_date',
+        'days_past_due', 'bucket', 'total_amount', 'paid_amount', 'balance',
+    ])
+    rows = outstanding_invoices().order_by('due_date', 'id').values_list(
+        'invoice_number', 'patient_id', 'patient__first_name', 'patient__last_name', 'status',
+        'invoice_date', 'due_date', 'total_amount', 'paid_amount', 'balance',
+    )
+    for number, patient_id, first_name, last_name, status_code, invoice_date, due_date, total, paid, balance in rows.iterator(chunk_size=2000):
+        yield writer.writerow([
+            number, patient_id, f'{first_name} {last_name}'.strip(), status_code, invoice_date, due_date,
+            days_past_due(due_date, as_of), bucket_for(due_date, as_of), total, paid, balance,
+        ])
+
+
+def _aging_patient_rows(as_of):
+    writer = csv.writer(_Echo())
+    bucket_columns = [f'{key}_balance' for key in BUCKET_KEYS]
+    yield writer.writerow(['patient_id', 'patient_name', 'invoice_count', 'total_balance'] + bucket_columns)
+    chunk = []
+    for row in aging_by_patient(as_of).iterator(chunk_size=2000):
+        chunk.append(row)
+        if len(chunk) == 2000:
+            yield from _patient_chunk(writer, chunk)
+            chunk = []
+    yield from _patient_chunk(writer, chunk)
+
+
+def _patient_chunk(writer, rows):
+    names = _patient_names([row['patient_id'] for row in rows])
+    for row in rows:
+        yield writer.writerow(
+            [row['patient_id'], names.get(row['patient_id']), row['total_count'], row['total_balance']]
+            + [row[f'{key}_balance'] or 0 for key in BUCKET_KEYS]
+        )
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@throttle_classes([UserTokenBucketThrottle, ExpensiveEndpointThrottle])
+@replica_reads
+def aging_export_view(request):
+    """
+    Stream the aging report as CSV
+    GET /api/billing/aging/export/
+    Query Params:
+        level (str): invoice (default, one row per outstanding invoice) or patient
+        as_of (YYYY-MM-DD): Date to age against (default: today)
+    """
+    denied = _admin_required(request)
+    if denied:
+        return denied
+
+    as_of, error = _aging_params(request)
+    if error:
+        return error
+
+    level = request.query_params.get('level', 'invoice')
+    if level not in ('invoice', 'patient'):
+        return Response({
+            'success': False,
+            'message': 'level must be invoice or patient'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    rows = _aging_patient_rows(as_of) if level == 'patient' else _aging_invoice_rows(as_of)
+    if current_read_alias() == REPLICA_ALIAS:
+        # The rows are read while the response streams, after @replica_reads has returned
+        rows = replica_iterator(rows)
+    response = StreamingHttpResponse(rows, content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="ar-aging-{level}-{as_of:%Y-%m-%d}.csv"'
+    return response
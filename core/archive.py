@@ -0,0 +1,170 @@
+"""
+Hot/cold archival.
+
+Completed lab tests and paid invoices that nobody has touched for
+``ARCHIVE_AFTER_DAYS`` are moved, with their results, items and payments,
+into archive tables of the same shape (``lab_tests_archive``,
+``invoices_archive``, ...). The hot tables then only hold recent and open
+records, so their list queries and indexes stay small however long the
+clinic has been running.
+
+Rows keep their primary keys, which are never reused by the hot tables, so
+a detail lookup can fall back to the archive (``get_with_archive``). List
+endpoints only read the archive when asked to (``include_archived=true``)
+and then page through the hot rows first and the archived rows after them.
+
+Rows are moved in batches with ``INSERT ... SELECT`` and ``DELETE`` inside
+one transaction per batch, by ``manage.py archive_records``. Model signals
+are not sent: archiving is neither an audited change nor a change to any
+counter.
+"""
+from django.db import connections, models, transaction
+from django.utils.module_loading import import_string
+
+
+def archive_model(model, name, db_table, relations=None, indexes=()):
+    """
+    Cold copy of ``model`` with the same columns. Foreign keys named in
+    ``relations`` point at other archive models and keep their
+    ``related_name``. Other foreign keys get an ``archived_`` prefix on
+    theirs. Timestamps are copied as they are, not set automatically.
+    """
+    relations = relations or {}
+    attrs = {
+        '__module__': model.__module__,
+        '__str__': model.__str__,
+        'is_archived': True,
+    }
+    for field in model._meta.concrete_fields:
+        if field.primary_key:
+            attrs[field.name] = models.BigIntegerField(primary_key=True)
+            continue
+        if field.is_relation:
+            # deconstruct() of a relation needs the app registry, which is
+            # still loading while models are defined
+            related_name = field.remote_field.related_name
+            if field.name in relations:
+                to = relations[field.name]
+            else:
+                to = field.remote_field.model
+                related_name = f'archived_{related_name}' if related_name else '+'
+            attrs[field.name] = models.ForeignKey(
+                to, on_delete=field.remote_field.on_delete, related_name=related_name,
+                null=field.null, blank=field.blank, editable=field.editable,
+            )
+            continue
+        _, path, args, kwargs = field.deconstruct()
+        kwargs.pop('auto_now', None)
+        kwargs.pop('auto_now_add', None)
+        attrs[field.name] = import_string(path)(*args, **kwargs)
+
+    attrs['Meta'] = type('Meta', (), {
+        'db_table': db_table,
+        'verbose_name': f'Archived {model._meta.verbose_name}',
+        'verbose_name_plural': f'Archived {model._meta.verbose_name_plural}',
+        'ordering': list(model._meta.ordering),
+        'indexes': list(indexes),
+    })
+    return type(name, (models.Model,), attrs)
+
+
+class ArchiveSpec:
+    """
+    A root model whose old rows are archived together with their children
+
+    ``children`` is ``[(hot child, archived child, foreign key to the root)]``
+    and ``condition(cutoff)`` returns the Q selecting archivable roots.
+    """
+
+    def __init__(self, name, hot, archived, children, condition):
+        self.name = name
+        self.hot = hot
+        self.archived = archived
+        self.children = children
+        self.condition = condition
+
+    def candidates(self, cutoff):
+        return self.hot.objects.filter(self.condition(cutoff))
+
+
+def archive_specs():
+    """The archivable record types, by name"""
+    from billing.models import (
+        ArchivedInvoice, ArchivedInvoiceItem, ArchivedPayment, Invoice, InvoiceItem, Payment,
+    )
+    from lab_tests.models import ArchivedLabTest, ArchivedLabTestResult, LabTest, LabTestResult
+
+    return {
+        'lab_tests': ArchiveSpec(
+            'lab_tests', LabTest, ArchivedLabTest,
+            [(LabTestResult, ArchivedLabTestResult, 'test')],
+            lambda cutoff: models.Q(status='completed', completed_date__lt=cutoff, updated_at__lt=cutoff),
+        ),
+        'invoices': ArchiveSpec(
+            'invoices', Invoice, ArchivedInvoice,
+            [(InvoiceItem, ArchivedInvoiceItem, 'invoice'), (Payment, ArchivedPayment, 'invoice')],
+            lambda cutoff: models.Q(status='paid', invoice_date__lt=cutoff.date(), updated_at__lt=cutoff),
+        ),
+    }
+
+
+def _copy_rows(cursor, connection, hot, archived, column, ids):
+    quote = connection.ops.quote_name
+    columns = ', '.join(quote(field.column) for field in hot._meta.concrete_fields)
+    placeholders = ', '.join(['%s'] * len(ids))
+    cursor.execute(
+        f'INSERT INTO {quote(archived._meta.db_table)} ({columns}) '
+        f'SELECT {columns} FROM {quote(hot._meta.db_table)} WHERE {quote(column)} IN ({placeholders})',
+        ids,
+    )
+    cursor.execute(
+        f'DELETE FROM {quote(hot._meta.db_table)} WHERE {quote(column)} IN ({placeholders})',
+        ids,
+    )
+    return cursor.rowcount
+
+
+def archive_batch(spec, ids, using='default'):
+    """Move the roots ``ids`` and their children; returns ``{table: rows moved}``"""
+    connection = connections[using]
+    moved = {}
+    with transaction.atomic(using=using), connection.cursor() as cursor:
+        # Children first, so their foreign keys never point at a missing row
+        for hot_child, archived_child, parent_field in spec.children:
+            column = hot_child._meta.get_field(parent_field).column
+            moved[hot_child._meta.db_table] = _copy_rows(cursor, connection, hot_child, archived_child, column, ids)
+        moved[spec.hot._meta.db_table] = _copy_rows(
+            cursor, connection, spec.hot, spec.archived, spec.hot._meta.pk.column, ids,
+        )
+    return moved
+
+
+def get_with_archive(hot_queryset, archived_queryset, pk):
+    """The row ``pk`` from the hot table or else the archive; raises the hot ``DoesNotExist``"""
+    instance = hot_queryset.filter(pk=pk).first()
+    if instance is None:
+        instance = archived_queryset.filter(pk=pk).first()
+    if instance is None:
+        raise hot_queryset.model.DoesNotExist
+    return instance
+
+
+def include_archived(request):
+    return request.query_params.get('include_archived') == 'true'
+
+
+def page_with_archive(hot_queryset, archived_queryset, start, end):
+    """
+    ``(hot page, archived page, total)`` for rows ``start:end`` of the hot
+    rows followed by the archived rows
+    """
+    hot_total = hot_queryset.count()
+    total = hot_total + archived_queryset.count()
+    hot_page = hot_queryset[start:end] if start < hot_total else hot_queryset.none()
+    archived_start = max(0, start - hot_total)
+    archived_end = max(0, end - hot_total)
+    if archived_end > archived_start:
+        archived_page = archived_queryset[archived_start:archived_end]
+    else:
+        archived_page = archived_queryset.none()
+    return hot_page, archived_page, total
@@ -0,0 +1,146 @@
+"""
+Request multiplexing for ``/api/batch/``.
+
+A batch is a list of relative GET requests that are resolved and run
+through their views inside the one HTTP request. The outer request has
+already been authenticated, so each sub-request is handed to DRF with that
+user forced (the same hook ``APIRequestFactory.force_authenticate`` uses)
+and the JWT is not decoded again; the middleware stack also runs only
+once. Permissions and throttles still apply per sub-request, so a batch
+cannot reach what its requests could not reach one by one.
+
+Sub-requests run one after the other, or on a small thread pool when the
+client asks for ``concurrent``; each pool thread uses and then closes its
+own database connections.
+"""
+import contextvars
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.http import HttpRequest, QueryDict
+from django.urls import Resolver404, resolve
+
+logger = logging.getLogger(__name__)
+
+# Outer request headers that sub-requests see
+FORWARDED_META = (
+    'HTTP_AUTHORIZATION', 'HTTP_ACCEPT_LANGUAGE', 'HTTP_USER_AGENT',
+    'HTTP_HOST', 'REMOTE_ADDR', 'SERVER_NAME', 'SERVER_PORT', 'wsgi.url_scheme',
+)
+
+
+class BatchError(ValueError):
+    """A malformed batch; the message is returned to the client"""
+
+
+def parse_batch(data):
+    """Request body -> ``([(id, path)], concurrent)``"""
+    if not isinstance(data, dict) or not isinstance(data.get('requests'), list):
+        raise BatchError('Expected {"requests": [...]}')
+    items = data['requests']
+    if not items:
+        raise BatchError('No requests given')
+    limit = getattr(settings, 'BATCH_MAX_REQUESTS', 20)
+    if len(items) > limit:
+        raise BatchError(f'At most {limit} requests per batch')
+
+    parsed = []
+    for index, item in enumerate(items):
+        if isinstance(item, str):
+            item = {'path': item}
+        if not isinstance(item, dict) or not isinstance(item.get('path'), str):
+            raise BatchError(f'Request {index} needs a "path"')
+        method = str(item.get('method', 'GET')).upper()
+        if method != 'GET':
+            raise BatchError(f'Request {index}: only GET requests can be batched')
+        path = item['path']
+        parts = urlsplit(path)
+        if parts.scheme or parts.netloc or not parts.path.startswith('/api/'):
+            raise BatchError(f'Request {index}: path must be a relative /api/ URL')
+        parsed.append((item.get('id', index), path))
+    return parsed, bool(data.get('concurrent'))
+
+
+def _sub_request(request, path):
+    parts = urlsplit(path)
+    sub = HttpRequest()
+    sub.method = 'GET'
+    sub.path = sub.path_info = parts.path
+    sub.META = {key: request.META[key] for key in FORWARDED_META if key in request.META}
+    sub.META.update({
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': parts.path,
+        'QUERY_STRING': parts.query,
+        'CONTENT_LENGTH': '0',
+    })
+    sub.GET = QueryDict(parts.query)
+    sub._body = b''
+    sub.user = request.user
+    # Read by rest_framework.request.Request in place of the authenticators
+    sub._force_auth_user = request.user
+    sub._force_auth_token = request.auth
+    return sub
+
+
+def _result(request_id, status_code, body):
+    return {'id': request_id, 'status': status_code, 'body': body}
+
+
+def _response_result(request_id, response):
+    if hasattr(response, 'data'):
+        # DRF Response: embed the data and render everything once
+        return _result(request_id, response.status_code, response.data)
+    if response.streaming:
+        return _result(request_id, 400, {'success': False, 'message': 'Streaming responses cannot be batched'})
+    body = response.content.decode(response.charset, 'replace')
+    if response.get('Content-Type', '').startswith('application/json') and body:
+        body = json.loads(body)
+    return _result(request_id, response.status_code, body)
+
+
+def run_one(request, request_id, path):
+    parts = urlsplit(path)
+    try:
+        match = resolve(parts.path)
+    except Resolver404:
+        return _result(request_id, 404, {'success': False, 'message': 'Not found'})
+    if match.view_name == 'core:batch':
+        return _result(request_id, 400, {'success': False, 'message': 'Batches cannot be nested'})
+    if iscoroutinefunction(match.func):
+        # e.g. the lab test event stream; there is no event loop to run it on here
+        return _result(request_id, 400, {'success': False, 'message': 'Async views cannot be batched'})
+
+    sub = _sub_request(request, path)
+    sub.resolver_match = match
+    try:
+        return _response_result(request_id, match.func(sub, *match.args, **match.kwargs))
+    except Exception:
+        logger.exception('Batched request to %s failed', path)
+        return _result(request_id, 500, {'success': False, 'message': 'Internal server error'})
+
+
+def _run_in_thread(context, request, request_id, path):
+    try:
+        return context.run(run_one, request, request_id, path)
+    finally:
+        connections.close_all()
+
+
+def run_batch(request, items, concurrent=False):
+    """Results in request order"""
+    workers = min(getattr(settings, 'BATCH_MAX_WORKERS', 4), len(items))
+    if not concurrent or workers < 2:
+        return [run_one(request, request_id, path) for request_id, path in items]
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            # Each task gets a copy of the request's context (metrics, replica routing)
+            pool.submit(_run_in_thread, contextvars.copy_context(), request, request_id, path)
+            for request_id, path in items
+        ]
+        return [future.result() for future in futures]
@@ -0,0 +1,112 @@
+"""
+Helpers for the ``run_benchmark`` management command: discovering the
+GET endpoints in the URLconf, filling in sample ids and summarising the
+measured latencies.
+"""
+import math
+import re
+
+from django.urls import URLPattern, URLResolver, get_resolver
+
+# Views that are not request/response endpoints or have side effects on GET
+SKIPPED_NAMESPACES = {'admin'}
+# Long-lived Server-Sent Events stream, and the load balancer probes
+SKIPPED_VIEWS = {'lab_tests:lab_test_events', 'core:healthz', 'core:readyz'}
+
+_SERVER_TIMING_QUERIES = re.compile(r'db;[^,]*desc="(\d+) queries"')
+_ROUTE_PARAM = re.compile(r'<(?:(?P<converter>[^>:]+):)?(?P<name>[^>]+)>')
+
+
+def iter_patterns(patterns=None, prefix='', namespace=None):
+    """Yield ``(route, view_name, callback)`` for every URL pattern"""
+    if patterns is None:
+        patterns = get_resolver().url_patterns
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            child_namespace = pattern.namespace or namespace
+            if child_namespace in SKIPPED_NAMESPACES:
+                continue
+            yield from iter_patterns(pattern.url_patterns, prefix + str(pattern.pattern), child_namespace)
+        elif isinstance(pattern, URLPattern):
+            view_name = f'{namespace}:{pattern.name}' if namespace and pattern.name else pattern.name
+            yield prefix + str(pattern.pattern), view_name, pattern.callback
+
+
+def allows_get(callback):
+    """True for DRF ``@api_view`` views that accept GET and for plain Django views"""
+    view_class = getattr(callback, 'cls', None)
+    if view_class is not None:
+        return hasattr(view_class, 'get')
+    return True
+
+
+def build_path(route, sample_ids):
+    """
+    Turn ``api/patients/<int:pk>/`` into ``/api/patients/12/`` using
+    ``sample_ids`` (parameter name -> value). Returns None for regex routes
+    or parameters without a sample value.
+    """
+    if route.startswith('^'):
+        return None
+    missing = []
+
+    def replace(match):
+        value = sample_ids.get(match.group('name'))
+        if value is None:
+            missing.append(match.group('name'))
+            return ''
+        return str(value)
+
+    path = _ROUTE_PARAM.sub(replace, route)
+    if missing:
+        return None
+    return '/' + path
+
+
+def discover_endpoints(sample_ids_for):
+    """
+    List ``(view_name, path)`` for every GET endpoint. ``sample_ids_for``
+    maps a view name to the parameter values to use for it.
+    """
+    endpoints = []
+    for route, view_name, callback in iter_patterns():
+        if view_name in SKIPPED_VIEWS or not allows_get(callback):
+            continue
+        path = build_path(route, sample_ids_for(view_name or ''))
+        if path is not None:
+            endpoints.append((view_name or path, path))
+    return endpoints
+
+
+def queries_from_server_timing(header):
+    """Query count from the ``Server-Timing`` header set by PerformanceMiddleware"""
+    match = _SERVER_TIMING_QUERIES.search(header or '')
+    return int(match.group(1)) if match else None
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies, statuses, query_counts, wall_time):
+    """Latency percentiles (ms), throughput and query counts for one endpoint"""
+    ordered = sorted(latencies)
+    counts = [count for count in query_counts if count is not None]
+    status_counts = {}
+    for code in statuses:
+        status_counts[str(code)] = status_counts.get(str(code), 0) + 1
+    return {
+        'requests': len(ordered),
+        'statuses': status_counts,
+        'p50_ms': round(percentile(ordered, 0.50) * 1000, 2) if ordered else None,
+        'p95_ms': round(percentile(ordered, 0.95) * 1000, 2) if ordered else None,
+        'p99_ms': round(percentile(ordered, 0.99) * 1000, 2) if ordered else None,
+        'mean_ms': round(sum(ordered) / len(ordered) * 1000, 2) if ordered else None,
+        'throughput_rps': round(len(ordered) / wall_time, 2) if wall_time else None,
+        'queries_per_request': round(sum(counts) / len(counts), 2) if counts else None,
+        'max_queries': max(counts) if counts else None,
+    }
@@ -0,0 +1,113 @@
+"""
+Reference data for client start-up (``/api/bootstrap/``).
+
+Active services, active lab test categories, active doctors and the choice
+lists rarely change, so each worker renders them to JSON once and keeps the
+bytes in memory together with a version hash. The version is derived from
+the row count, latest ``updated_at`` and highest id of the three tables,
+which moves on every insert, edit and delete. Checking it costs three small
+aggregate queries and is done at most every ``BOOTSTRAP_CHECK_INTERVAL``
+seconds per worker. Writes made in this worker are seen at once through
+the signal handlers below.
+"""
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import Count, Max
+from django.db.models.signals import post_delete, post_save
+from rest_framework.renderers import JSONRenderer
+
+from billing.models import Invoice, Payment, Service
+from billing.serializers import ServiceSerializer
+from lab_tests.models import LabTest, LabTestCategory
+from lab_tests.serializers import LabTestCategorySerializer
+from patients.models import Patient
+
+User = get_user_model()
+
+_lock = threading.Lock()
+_state = {'version': None, 'body': None, 'checked_at': 0.0}
+
+
+def _choices(choices):
+    return [{'value': value, 'label': label} for value, label in choices]
+
+
+def choice_lists():
+    return {
+        'roles': _choices(User.ROLE_CHOICES),
+        'genders': _choices(Patient.GENDER_CHOICES),
+        'blood_types': _choices(Patient.BLOOD_TYPE_CHOICES),
+        'lab_test_statuses': _choices(LabTest.STATUS_CHOICES),
+        'lab_test_priorities': _choices(LabTest.PRIORITY_CHOICES),
+        'invoice_statuses': _choices(Invoice.STATUS_CHOICES),
+        'payment_methods': _choices(Payment.PAYMENT_METHOD_CHOICES),
+    }
+
+
+def _sources():
+    return (
+        Service.objects.all(),
+        LabTestCategory.objects.all(),
+        User.objects.filter(role='doctor'),
+    )
+
+
+def current_version():
+    """Hash of (count, latest updated_at, highest id) of the reference tables"""
+    digest = hashlib.sha256()
+    for queryset in _sources():
+        row = queryset.aggregate(count=Count('id'), updated=Max('updated_at'), last_id=Max('id'))
+        digest.update(f"{row['count']}:{row['updated']}:{row['last_id']};".encode('utf-8'))
+    return digest.hexdigest()[:32]
+
+
+def build_payload(version):
+    doctors = User.objects.filter(role='doctor', is_active=True).order_by('first_name', 'last_name', 'id').values(
+        'id', 'username', 'first_name', 'last_name', 'email', 'phone_number',
+    )
+    payload = {
+        'success': True,
+        'version': version,
+        'services': ServiceSerializer(Service.objects.filter(is_active=True).order_by('name'), many=True).data,
+        'lab_categories': LabTestCategorySerializer(
+            LabTestCategory.objects.filter(is_active=True).order_by('name'), many=True
+        ).data,
+        'doctors': [
+            {**doctor, 'full_name': f"{doctor['first_name']} {doctor['last_name']}".strip() or doctor['username']}
+            for doctor in doctors
+        ],
+        'choices': choice_lists(),
+    }
+    return JSONRenderer().render(payload)
+
+
+def get_bootstrap():
+    """``(version, JSON bytes)``, rebuilt only when the version has moved"""
+    interval = getattr(settings, 'BOOTSTRAP_CHECK_INTERVAL', 5)
+    now = time.monotonic()
+    if _state['body'] is not None and now - _state['checked_at'] < interval:
+        return _state['version'], _state['body']
+
+    with _lock:
+        if _state['body'] is not None and time.monotonic() - _state['checked_at'] < interval:
+            return _state['version'], _state['body']
+        version = current_version()
+        if version != _state['version'] or _state['body'] is None:
+            _state['body'] = build_payload(version)
+            _state['version'] = version
+        _state['checked_at'] = time.monotonic()
+        return _state['version'], _state['body']
+
+
+def invalidate(**kwargs):
+    """Force a version check on the next request"""
+    _state['checked_at'] = 0.0
+
+
+for _model in (Service, LabTestCategory, User):
+    post_save.connect(invalidate, sender=_model, dispatch_uid=f'bootstrap_save_{_model.__name__}')
+    post_delete.connect(invalidate, sender=_model, dispatch_uid=f'bootstrap_delete_{_model.__name__}')
@@ -0,0 +1,154 @@
+"""
+``Idempotency-Key`` support for create endpoints.
+
+The first request with a given key claims it by inserting an
+``in_progress`` row (the unique (user, key) constraint decides the race),
+runs the view and stores the status and data of its response. A retry
+with the same key and the same request gets the stored response back
+without the view running again. A duplicate arriving while the first
+attempt is still in flight waits up to ``IDEMPOTENCY_WAIT_SECONDS`` for it
+to finish and is answered with 409 if it does not.
+
+Server errors are not stored: the key is released so the client can retry.
+Keys expire after ``IDEMPOTENCY_KEY_TTL_HOURS`` and are removed by
+``manage.py prune_idempotency_keys``.
+"""
+import hashlib
+import json
+import time
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+POLL_INTERVAL = 0.1
+# An in-flight claim this old belongs to a worker that died mid-request
+ABANDONED_AFTER = timedelta(minutes=5)
+
+
+def request_fingerprint(request):
+    digest = hashlib.sha256()
+    digest.update(f'{request.method} {request.get_full_path()}\n'.encode('utf-8'))
+    digest.update(request.body)
+    return digest.hexdigest()
+
+
+def _error(message, status_code, **headers):
+    response = Response({'success': False, 'message': message}, status=status_code)
+    for name, value in headers.items():
+        response[name] = value
+    return response
+
+
+def _in_flight():
+    return _error(
+        f'A request with this {HEADER} is still being processed',
+        status.HTTP_409_CONFLICT,
+        **{'Retry-After': '1'},
+    )
+
+
+def _replay(entry):
+    response = Response(entry.response_data, status=entry.response_status)
+    response['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def _claim(user_id, key, fingerprint):
+    """``(entry, claimed)``; ``claimed`` is False when another request holds the key"""
+    now = timezone.now()
+    ttl = timedelta(hours=getattr(settings, 'IDEMPOTENCY_KEY_TTL_HOURS', 24))
+    entry = None
+    for _ in range(3):
+        try:
+            with transaction.atomic():
+                entry = IdempotencyKey.objects.create(
+                    user_id=user_id, key=key, fingerprint=fingerprint,
+                    created_at=now, expires_at=now + ttl,
+                )
+            return entry, True
+        except IntegrityError:
+            entry = IdempotencyKey.objects.filter(user_id=user_id, key=key).first()
+            if entry is None:
+                # Released between the insert and the read
+                continue
+            abandoned = entry.status == 'in_progress' and entry.created_at <= now - ABANDONED_AFTER
+            if entry.expires_at <= now or abandoned:
+                IdempotencyKey.objects.filter(pk=entry.pk, status=entry.status, created_at=entry.created_at).delete()
+                continue
+            return entry, False
+    return entry, False
+
+
+def _wait_for(entry):
+    """Poll an in-flight entry until it completes, is released or the wait runs out"""
+    deadline = time.monotonic() + getattr(settings, 'IDEMPOTENCY_WAIT_SECONDS', 5)
+    while time.monotonic() < deadline:
+        time.sleep(POLL_INTERVAL)
+        entry = IdempotencyKey.objects.filter(pk=entry.pk).first()
+        if entry is None or entry.status == 'completed':
+            return entry
+    return IdempotencyKey.objects.filter(pk=entry.pk).first()
+
+
+def idempotent(view_func):
+    """
+    Honour the ``Idempotency-Key`` header. Put it directly above the
+    function so it runs after DRF has authenticated the request; requests
+    without the header run as before.
+    """
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if not key:
+            return view_func(request, *args, **kwargs)
+        key = key.strip()
+        if not key or len(key) > MAX_KEY_LENGTH:
+            return _error(f'{HEADER} must be 1 to {MAX_KEY_LENGTH} characters', status.HTTP_400_BAD_REQUEST)
+
+        fingerprint = request_fingerprint(request)
+        entry, claimed = _claim(request.user.pk, key, fingerprint)
+
+        if not claimed:
+            if entry is None:
+                return _in_flight()
+            if entry.fingerprint != fingerprint:
+                return _error(
+                    f'This {HEADER} was already used for a different request',
+                    status.HTTP_422_UNPROCESSABLE_ENTITY,
+                )
+            if entry.status != 'completed':
+                entry = _wait_for(entry)
+            if entry is None:
+                # The first attempt failed and released the key; this retry may run it
+                return wrapper(request, *args, **kwargs)
+            if entry.status != 'completed':
+                return _in_flight()
+            return _replay(entry)
+
+        try:
+            response = view_func(request, *args, **kwargs)
+        except Exception:
+            entry.delete()
+            raise
+
+        if response.status_code >= 500 or not hasattr(response, 'data'):
+            entry.delete()
+            return response
+
+        entry.status = 'completed'
+        entry.response_status = response.status_code
+        # Stored as rendered, so a replay is identical to the original body
+        entry.response_data = json.loads(JSONRenderer().render(response.data))
+        entry.save(update_fields=['status', 'response_status', 'response_data'])
+        return response
+    return wrapper
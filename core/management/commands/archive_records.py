@@ -0,0 +1,52 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from core.archive import archive_batch, archive_specs
+
+
+class Command(BaseCommand):
+    help = (
+        'Move completed lab tests and paid invoices untouched for longer than '
+        'ARCHIVE_AFTER_DAYS, with their results, items and payments, into the archive tables'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than-days', type=int, help='Default: ARCHIVE_AFTER_DAYS')
+        parser.add_argument('--only', choices=['lab_tests', 'invoices'], help='Archive one record type')
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--max-batches', type=int, help='Stop after this many batches per record type')
+        parser.add_argument('--dry-run', action='store_true', help='Only count the records that would be archived')
+
+    def handle(self, *args, **options):
+        days = options['older_than_days'] or getattr(settings, 'ARCHIVE_AFTER_DAYS', 365)
+        if days < 1:
+            raise CommandError('--older-than-days must be at least 1')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+        cutoff = timezone.now() - timedelta(days=days)
+
+        specs = archive_specs()
+        names = [options['only']] if options['only'] else list(specs)
+        for name in names:
+            spec = specs[name]
+            candidates = spec.candidates(cutoff)
+            if options['dry_run']:
+                self.stdout.write(f'{name}: {candidates.count()} records older than {cutoff:%Y-%m-%d}')
+                continue
+
+            totals = {}
+            batches = 0
+            while options['max_batches'] is None or batches < options['max_batches']:
+                # Archived rows leave the hot table, so every batch starts from the front
+                ids = list(candidates.order_by('pk').values_list('pk', flat=True)[:options['batch_size']])
+                if not ids:
+                    break
+                for table, count in archive_batch(spec, ids).items():
+                    totals[table] = totals.get(table, 0) + count
+                batches += 1
+
+            moved = ', '.join(f'{count} from {table}' for table, count in totals.items()) or 'nothing'
+            self.stdout.write(self.style.SUCCESS(f'{name}: archived {moved} in {batches} batches'))
@@ -0,0 +1,66 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from lab_tests.models import LabTest
+from lab_tests.serializers import LabTestSerializer, lab_test_rows
+from patients.models import Patient
+from patients.serializers import PatientSerializer, patient_rows
+
+
+class Command(BaseCommand):
+    help = (
+        'Check that the values() row serializers render the same JSON as the '
+        'DRF serializers they replace, and time both paths'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100, help='Rows per page (default: 100)')
+        parser.add_argument('--repeat', type=int, default=20, help='Timing repetitions (default: 20)')
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        repeat = options['repeat']
+        renderer = JSONRenderer()
+
+        cases = [
+            ('patients', Patient.objects.all().order_by('-created_at'), PatientSerializer, patient_rows),
+            ('lab_tests', LabTest.objects.all().order_by('-ordered_date', '-created_at'), LabTestSerializer, lab_test_rows),
+        ]
+
+        mismatches = []
+        for name, queryset, serializer_class, row_serializer in cases:
+            # A fresh slice for every call so neither path reuses a result cache
+            def page():
+                return queryset.all()[:rows]
+
+            expected = renderer.render(serializer_class(page(), many=True).data)
+            actual = renderer.render(row_serializer.serialize(page()))
+            if expected != actual:
+                mismatches.append(name)
+                self.stdout.write(self.style.ERROR(f'{name}: output differs from {serializer_class.__name__}'))
+                continue
+
+            serializer_time = self._best_of(repeat, lambda: renderer.render(serializer_class(page(), many=True).data))
+            rows_time = self._best_of(repeat, lambda: renderer.render(row_serializer.serialize(page())))
+            speedup = serializer_time / rows_time if rows_time else 0
+            self.stdout.write(
+                f'{name}: {page().count()} rows, identical JSON ({len(actual)} bytes) | '
+                f'{serializer_class.__name__} {serializer_time * 1000:.2f} ms, '
+                f'row serializer {rows_time * 1000:.2f} ms ({speedup:.1f}x)'
+            )
+
+        if mismatches:
+            raise CommandError(f"Row serializer output differs for: {', '.join(mismatches)}")
+        self.stdout.write(self.style.SUCCESS('Row serializers match'))
+
+    @staticmethod
+    def _best_of(repeat, func):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best
@@ -0,0 +1,409 @@
+import random
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from billing.models import Invoice, InvoiceItem, Payment, Service
+from lab_tests.models import LabTest, LabTestCategory, LabTestResult
+from patients.models import Patient
+
+User = get_user_model()
+
+FIRST_NAMES = (
+    'James', 'Mary', 'John', 'Patricia', 'Robert', 'Jennifer', 'Michael', 'Linda', 'William',
+    'Elizabeth', 'David', 'Barbara', 'Richard', 'Susan', 'Joseph', 'Jessica', 'Thomas', 'Sarah',
+    'Charles', 'Karen', 'Daniel', 'Nancy', 'Matthew', 'Lisa', 'Anthony', 'Betty', 'Mark', 'Sandra',
+    'Chinedu', 'Ngozi', 'Emeka', 'Aisha', 'Tunde', 'Fatima', 'Ifeanyi', 'Amaka', 'Kwame', 'Zainab',
+)
+LAST_NAMES = (
+    'Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Garcia', 'Miller', 'Davis', 'Rodriguez',
+    'Martinez', 'Hernandez', 'Lopez', 'Wilson', 'Anderson', 'Thomas', 'Taylor', 'Moore', 'Jackson',
+    'Okafor', 'Adeyemi', 'Okonkwo', 'Balogun', 'Eze', 'Mensah', 'Abubakar', 'Nwosu', 'Danjuma',
+)
+CITIES = (
+    ('Lagos', 'Lagos'), ('Abuja', 'FCT'), ('Kano', 'Kano'), ('Ibadan', 'Oyo'), ('Jos', 'Plateau'),
+    ('Houston', 'TX'), ('Chicago', 'IL'), ('Atlanta', 'GA'),
+)
+ALLERGIES = (None, None, None, 'Penicillin', 'Peanuts', 'Latex', 'Sulfa drugs')
+CONDITIONS = (None, None, 'Hypertension', 'Type 2 diabetes', 'Asthma', 'Sickle cell trait')
+INSURERS = (None, 'NHIS', 'AXA Mansard', 'Hygeia', 'Blue Cross')
+
+CATEGORIES = ('Blood Test', 'Chemistry', 'Urinalysis', 'Hormones', 'Microbiology')
+# (category, test name, code, cost, parameters)
+# parameters: (name, unit, low, high)
+LAB_PANELS = (
+    ('Blood Test', 'Complete Blood Count', 'CBC', Decimal('25.00'), (
+        ('Hemoglobin', 'g/dL', 12.0, 17.5),
+        ('WBC', 'x10^9/L', 4.0, 11.0),
+        ('Platelets', 'x10^9/L', 150.0, 400.0),
+    )),
+    ('Chemistry', 'Basic Metabolic Panel', 'BMP', Decimal('40.00'), (
+        ('Sodium', 'mmol/L', 135.0, 145.0),
+        ('Potassium', 'mmol/L', 3.5, 5.0),
+        ('Creatinine', 'mg/dL', 0.6, 1.3),
+        ('Glucose', 'mg/dL', 70.0, 99.0),
+    )),
+    ('Chemistry', 'HbA1c', 'A1C', Decimal('30.00'), (
+        ('HbA1c', '%', 4.0, 5.6),
+    )),
+    ('Chemistry', 'Liver Function Test', 'LFT', Decimal('45.00'), (
+        ('ALT', 'U/L', 7.0, 56.0),
+        ('AST', 'U/L', 10.0, 40.0),
+    )),
+    ('Hormones', 'Thyroid Panel', 'TSH', Decimal('35.00'), (
+        ('TSH', 'mIU/L', 0.4, 4.0),
+    )),
+    ('Urinalysis', 'Urinalysis', 'UA', Decimal('15.00'), (
+        ('Specific Gravity', '', 1.005, 1.030),
+        ('pH', '', 4.5, 8.0),
+    )),
+    ('Microbiology', 'Malaria Parasite', 'MP', Decimal('10.00'), ()),
+)
+SERVICES = (
+    ('General Consultation', 'Consultation', Decimal('50.00')),
+    ('Specialist Consultation', 'Consultation', Decimal('120.00')),
+    ('Wound Dressing', 'Procedure', Decimal('30.00')),
+    ('ECG', 'Diagnostics', Decimal('75.00')),
+    ('Ultrasound', 'Diagnostics', Decimal('150.00')),
+    ('Vaccination', 'Procedure', Decimal('25.00')),
+)
+LAB_STATUS_WEIGHTS = (('completed', 70), ('pending', 12), ('in_progress', 10), ('cancelled', 8))
+PRIORITY_WEIGHTS = (('routine', 80), ('urgent', 15), ('stat', 5))
+PAYMENT_METHODS = [code for code, _ in Payment.PAYMENT_METHOD_CHOICES]
+CENT = Decimal('0.01')
+
+
+def weighted(rng, choices):
+    return rng.choices([value for value, _ in choices], weights=[weight for _, weight in choices])[0]
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate a deterministic, realistic dataset for load testing, e.g. '
+        '--patients 1000000 --lab-tests 5000000 --invoices 2000000'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--patients', type=int, default=1000)
+        parser.add_argument('--lab-tests', type=int, default=5000)
+        parser.add_argument('--invoices', type=int, default=2000)
+        parser.add_argument('--staff-per-role', type=int, default=5,
+                            help='Staff members to create for each role in User.ROLE_CHOICES')
+        parser.add_argument('--years', type=int, default=5, help='How many years of history to spread dates over')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per bulk_create chunk')
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.now = timezone.now()
+        self.today = self.now.date()
+        self.history_days = 365 * options['years']
+        self.run_tag = f"S{options['seed']}R{Invoice.objects.count()}"
+
+        started = time.perf_counter()
+        staff = self.create_staff(options['staff_per_role'])
+        categories, services = self.create_reference_data()
+        self.create_patients(options['patients'], staff)
+
+        # Lab tests and invoices of a patient fall after their registration
+        patients = list(Patient.objects.values_list('id', 'created_at'))
+        if not patients:
+            self.stdout.write(self.style.WARNING('No patients, skipping lab tests and invoices'))
+            return
+        self.create_lab_tests(options['lab_tests'], patients, staff, categories)
+        self.create_invoices(options['invoices'], patients, staff, services)
+        # bulk_create skips the signals that maintain the patient summaries
+        self.log('Rebuilding patient summaries')
+        call_command('rebuild_patient_summaries', batch_size=self.batch_size, stdout=self.stdout)
+        self.stdout.write(self.style.SUCCESS(f'Dataset generated in {time.perf_counter() - started:.1f}s'))
+
+    def log(self, message):
+        self.stdout.write(message)
+        self.stdout.flush()
+
+    def chunks(self, total):
+        for start in range(0, total, self.batch_size):
+            yield start, min(self.batch_size, total - start)
+
+    def random_past_date(self, max_days=None):
+        return self.today - timedelta(days=self.rng.randrange(max_days or self.history_days))
+
+    def random_date_since(self, start):
+        start = timezone.localtime(start).date()
+        return start + timedelta(days=self.rng.randrange((self.today - start).days + 1))
+
+    def during_hours(self, day):
+        """A time on ``day`` within opening hours, never later than now"""
+        moment = timezone.make_aware(datetime.combine(day, datetime.min.time()))
+        return min(moment + timedelta(minutes=self.rng.randrange(8 * 60, 18 * 60)), self.now)
+
+    def later(self, moment, max_days):
+        return min(moment + timedelta(minutes=self.rng.randrange(max_days * 24 * 60 + 1)), self.now)
+
+    def backfill(self, model, rows):
+        """
+        bulk_create stamps the ``auto_now``/``auto_now_add`` columns with the
+        current time. Overwrite them with the generated history kept in each
+        row's ``history`` dict, so date-range reports, aging and archiving
+        see realistic ages.
+        """
+        if not rows:
+            return
+        for row in rows:
+            for field, value in row.history.items():
+                setattr(row, field, value)
+        model.objects.bulk_update(rows, list(rows[0].history), batch_size=self.batch_size)
+
+    def create_staff(self, per_role):
+        password = make_password('password123')
+        users = []
+        for role, _ in User.ROLE_CHOICES:
+            for n in range(per_role):
+                username = f'{role}_{self.run_tag}_{n}'.lower()
+                users.append(User(
+                    username=username,
+                    email=f'{username}@dannyswellness.test',
+                    first_name=self.rng.choice(FIRST_NAMES),
+                    last_name=self.rng.choice(LAST_NAMES),
+                    role=role,
+                    phone_number=f'+234{self.rng.randrange(10**9, 10**10)}',
+                    password=password,
+                    is_staff=role == 'admin',
+                ))
+        for user in users:
+            # Hired during the first year of the history
+            hired = self.today - timedelta(days=self.history_days - self.rng.randrange(min(365, self.history_days)))
+            user.date_joined = self.during_hours(hired)
+            user.history = {'created_at': user.date_joined, 'updated_at': self.later(user.date_joined, 365)}
+        with transaction.atomic():
+            User.objects.bulk_create(users, batch_size=self.batch_size)
+            self.backfill(User, users)
+        self.log(f'Created {len(users)} staff members')
+
+        staff = {}
+        for user_id, role in User.objects.values_list('id', 'role'):
+            staff.setdefault(role, []).append(user_id)
+        return staff
+
+    def create_reference_data(self):
+        categories = {}
+        for name in CATEGORIES:
+            categories[name], _ = LabTestCategory.objects.get_or_create(name=name)
+        services = []
+        for name, category, price in SERVICES:
+            service, _ = Service.objects.get_or_create(name=name, defaults={'category': category, 'price': price})
+            services.append((service.id, service.price))
+        return categories, services
+
+    def create_patients(self, total, staff):
+        doctors = staff.get('doctor') or [None]
+        receptionists = staff.get('receptionist') or [None]
+        genders = [code for code, _ in Patient.GENDER_CHOICES]
+        blood_types = [code for code, _ in Patient.BLOOD_TYPE_CHOICES]
+
+        for start, size in self.chunks(total):
+            patients = []
+            for n in range(start, start + size):
+                first_name = self.rng.choice(FIRST_NAMES)
+                last_name = self.rng.choice(LAST_NAMES)
+                city, state = self.rng.choice(CITIES)
+                patient = Patient(
+                    first_name=first_name,
+                    last_name=last_name,
+                    date_of_birth=self.today - timedelta(days=self.rng.randrange(365, 365 * 95)),
+                    gender=self.rng.choices(genders, weights=(48, 48, 2, 2))[0],
+                    blood_type=self.rng.choice(blood_types),
+                    email=f'{first_name}.{last_name}.{self.run_tag}.{n}@example.com'.lower() if self.rng.random() < 0.7 else None,
+                    phone_number=f'+234{self.rng.randrange(10**9, 10**10)}',
+                    address=f'{self.rng.randrange(1, 400)} {self.rng.choice(LAST_NAMES)} Street',
+                    city=city,
+                    state=state,
+                    country='Nigeria' if state not in ('TX', 'IL', 'GA') else 'United States',
+                    allergies=self.rng.choice(ALLERGIES),
+                    medical_conditions=self.rng.choice(CONDITIONS),
+                    insurance_provider=self.rng.choice(INSURERS),
+                    is_active=self.rng.random() < 0.92,
+                    assigned_doctor_id=self.rng.choice(doctors) if self.rng.random() < 0.8 else None,
+                    created_by_id=self.rng.choice(receptionists),
+                )
+                # bulk_create bypasses Patient.save()
+                patient.set_match_keys()
+                registered = self.during_hours(self.random_past_date())
+                patient.history = {'created_at': registered, 'updated_at': self.later(registered, 180)}
+                patients.append(patient)
+            with transaction.atomic():
+                Patient.objects.bulk_create(patients, batch_size=self.batch_size)
+                self.backfill(Patient, patients)
+            self.log(f'Patients: {start + size}/{total}')
+
+    def create_lab_tests(self, total, patients, staff, categories):
+        doctors = staff.get('doctor') or [None]
+        technicians = staff.get('lab_technician') or [None]
+
+        for start, size in self.chunks(total):
+            tests = []
+            panels = []
+            for _ in range(size):
+                category, name, code, cost, parameters = self.rng.choice(LAB_PANELS)
+                status = weighted(self.rng, LAB_STATUS_WEIGHTS)
+                patient_id, registered = self.rng.choice(patients)
+                ordered = max(self.during_hours(self.random_date_since(registered)), registered)
+                scheduled = self.later(ordered, 3)
+                completed = min(scheduled + timedelta(hours=self.rng.randrange(1, 48)), self.now)
+                test = LabTest(
+                    test_name=name,
+                    category=categories[category],
+                    patient_id=patient_id,
+                    ordered_by_id=self.rng.choice(doctors),
+                    performed_by_id=self.rng.choice(technicians) if status in ('in_progress', 'completed') else None,
+                    status=status,
+                    priority=weighted(self.rng, PRIORITY_WEIGHTS),
+                    test_code=code,
+                    scheduled_date=scheduled,
+                    completed_date=completed if status == 'completed' else None,
+                    results='See parameters' if status == 'completed' and parameters else None,
+                    cost=cost,
+                )
+                test.history = {
+                    'ordered_date': ordered,
+                    'created_at': ordered,
+                    'updated_at': test.completed_date or (ordered if status == 'pending' else scheduled),
+                }
+                tests.append(test)
+                panels.append(parameters if status == 'completed' else ())
+
+            with transaction.atomic():
+                LabTest.objects.bulk_create(tests, batch_size=self.batch_size)
+                self.backfill(LabTest, tests)
+                results = []
+                for test, parameters in zip(tests, panels):
+                    for parameter, unit, low, high in parameters:
+                        abnormal = self.rng.random() < 0.15
+                        spread = high - low
+                        if abnormal:
+                            value = self.rng.choice((low - spread * self.rng.uniform(0.05, 0.6),
+                                                     high + spread * self.rng.uniform(0.05, 0.6)))
+                        else:
+                            value = self.rng.uniform(low, high)
+                        places = 3 if high < 2 else 1 if high < 100 else 0
+                        result = LabTestResult(
+                            test_id=test.pk,
+                            parameter_name=parameter,
+                            value=f'{max(value, 0):.{places}f}',
+                            unit=unit or None,
+                            normal_range=f'{low:g}-{high:g}',
+                            is_abnormal=abnormal,
+                            patient_id=test.patient_id,
+                            observed_at=test.completed_date,
+                        )
+                        # bulk_create bypasses LabTestResult.save()
+                        result.set_numeric_fields()
+                        result.history = {'created_at': test.completed_date, 'updated_at': test.completed_date}
+                        results.append(result)
+                LabTestResult.objects.bulk_create(results, batch_size=self.batch_size)
+                self.backfill(LabTestResult, results)
+            self.log(f'Lab tests: {start + size}/{total}')
+
+    def create_invoices(self, total, patients, staff, services):
+        billers = (staff.get('receptionist') or []) + (staff.get('admin') or []) or [None]
+
+        for start, size in self.chunks(total):
+            invoices = []
+            invoice_items = []
+            invoice_payments = []
+            for n in range(start, start + size):
+                patient_id, registered = self.rng.choice(patients)
+                invoice_date = self.random_date_since(registered)
+                created_at = max(self.during_hours(invoice_date), registered)
+                items = []
+                for _ in range(self.rng.randrange(1, 4)):
+                    service_id, price = self.rng.choice(services)
+                    quantity = Decimal(self.rng.randrange(1, 3))
+                    items.append(InvoiceItem(
+                        service_id=service_id, quantity=quantity, unit_price=price, total=quantity * price,
+                    ))
+                subtotal = sum(item.total for item in items)
+                tax_rate = self.rng.choice((Decimal('0.00'), Decimal('7.50')))
+                discount = self.rng.choice((Decimal('0.00'), Decimal('0.00'), Decimal('10.00')))
+                discount = min(discount, subtotal)
+                tax_amount = ((subtotal - discount) * tax_rate / Decimal('100')).quantize(CENT)
+                total_amount = subtotal - discount + tax_amount
+
+                # Older invoices are more likely to be settled
+                age_days = (self.today - invoice_date).days
+                roll = self.rng.random()
+                if roll < 0.03:
+                    status, paid = 'cancelled', Decimal('0.00')
+                elif roll < min(0.95, 0.5 + age_days / 400):
+                    status, paid = 'paid', total_amount
+                elif roll < 0.97:
+                    status, paid = 'partial', (total_amount * Decimal(self.rng.uniform(0.2, 0.8))).quantize(CENT)
+                else:
+                    status, paid = 'pending', Decimal('0.00')
+
+                payments = []
+                remaining = paid
+                while remaining > 0:
+                    amount = (remaining / 2).quantize(CENT)
+                    if amount < CENT or self.rng.random() < 0.7:
+                        amount = remaining
+                    payment_date = min(invoice_date + timedelta(days=self.rng.randrange(0, 45)), self.today)
+                    payment = Payment(
+                        amount=amount,
+                        payment_method=self.rng.choice(PAYMENT_METHODS),
+                        payment_date=payment_date,
+                        processed_by_id=self.rng.choice(billers),
+                    )
+                    paid_at = max(self.during_hours(payment_date), created_at)
+                    payment.history = {'created_at': paid_at, 'updated_at': paid_at}
+                    payments.append(payment)
+                    remaining -= amount
+
+                invoice = Invoice(
+                    invoice_number=f'INV-{self.run_tag}-{n + 1:08d}',
+                    patient_id=patient_id,
+                    status=status,
+                    invoice_date=invoice_date,
+                    due_date=invoice_date + timedelta(days=30),
+                    subtotal=subtotal,
+                    tax_rate=tax_rate,
+                    tax_amount=tax_amount,
+                    discount=discount,
+                    total_amount=total_amount,
+                    paid_amount=paid,
+                    balance=total_amount - paid,
+                    created_by_id=self.rng.choice(billers),
+                )
+                invoice.history = {
+                    'created_at': created_at,
+                    'updated_at': max([created_at] + [payment.history['created_at'] for payment in payments]),
+                }
+                invoices.append(invoice)
+                invoice_items.append(items)
+                invoice_payments.append(payments)
+
+            # bulk_create skips Invoice/InvoiceItem/Payment.save(), the totals
+            # above are computed the same way those methods do
+            with transaction.atomic():
+                Invoice.objects.bulk_create(invoices, batch_size=self.batch_size)
+                self.backfill(Invoice, invoices)
+                items, payments = [], []
+                for invoice, invoice_item_list, payment_list in zip(invoices, invoice_items, invoice_payments):
+                    for item in invoice_item_list:
+                        item.invoice_id = invoice.pk
+                        items.append(item)
+                    for payment in payment_list:
+                        payment.invoice_id = invoice.pk
+                        payments.append(payment)
+                InvoiceItem.objects.bulk_create(items, batch_size=self.batch_size)
+                Payment.objects.bulk_create(payments, batch_size=self.batch_size)
+                self.backfill(Payment, payments)
+            self.log(f'Invoices: {start + size}/{total}')
@@ -0,0 +1,33 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.models import Tombstone
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete sync tombstones older than SYNC_TOMBSTONE_RETENTION_DAYS; '
+        'clients with older sync tokens download everything again'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=getattr(settings, 'SYNC_TOMBSTONE_RETENTION_DAYS', 30))
+        pruned = 0
+        while True:
+            # Served by the (deleted_at, id) index; small chunks keep write locks short
+            ids = list(
+                Tombstone.objects.filter(deleted_at__lt=cutoff)
+                .order_by('deleted_at').values_list('id', flat=True)[:options['batch_size']]
+            )
+            if not ids:
+                break
+            deleted, _ = Tombstone.objects.filter(id__in=ids).delete()
+            pruned += deleted
+
+        self.stdout.write(self.style.SUCCESS(f'Pruned {pruned} sync tombstones'))
@@ -0,0 +1,34 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from core.purge import purge
+from patients.models import Patient, PatientSummary
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Purge deleted patients and staff members still waiting for their background '
+        'purge (e.g. after the job failed), in chunks of --batch-size rows'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, help='Default: PURGE_BATCH_SIZE')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] is not None and options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+
+        for patient in Patient.all_objects.filter(deleted_at__isnull=False).order_by('pk'):
+            patient_id = patient.pk
+            PatientSummary.objects.filter(patient=patient).delete()
+            counts = purge(patient, options['batch_size'])
+            self.stdout.write(f'Patient {patient_id}: {sum(counts.values())} dependent rows')
+
+        for user in User.all_objects.filter(deleted_at__isnull=False).order_by('pk'):
+            user_id = user.pk
+            counts = purge(user, options['batch_size'])
+            self.stdout.write(f'Staff member {user_id}: {sum(counts.values())} dependent rows')
+
+        self.stdout.write(self.style.SUCCESS('Done'))
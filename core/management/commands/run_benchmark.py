@@ -0,0 +1,196 @@
+import json
+import re
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client, override_settings
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+
+from billing.models import Invoice
+from core.benchmark import discover_endpoints, queries_from_server_timing, summarize
+from lab_tests.models import LabTest, LabTestCategory, LabTestResult
+from patients.models import Patient
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Drive every GET endpoint in the URLconf through the Django test client '
+        '(or a running server with --base-url) and report p50/p95/p99 latency, '
+        'throughput and query counts'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50, help='Requests per endpoint (default: 50)')
+        parser.add_argument('--concurrency', type=int, default=4, help='Concurrent clients (default: 4)')
+        parser.add_argument('--base-url', help='Benchmark a running server, e.g. http://127.0.0.1:8000')
+        parser.add_argument('--user', help='Username to authenticate as (default: first active admin)')
+        parser.add_argument('--include', help='Only endpoints whose view name or path matches this regex')
+        parser.add_argument('--exclude', help='Skip endpoints whose view name or path matches this regex')
+        parser.add_argument('--output', help='Write the results to this JSON file')
+        parser.add_argument('--compare', help='Previous results JSON file to compare against')
+        parser.add_argument(
+            '--throttle', action='store_true',
+            help='Keep request throttling on for test-client runs (off by default so 429s do not skew results)',
+        )
+
+    def handle(self, *args, **options):
+        user = self.get_user(options['user'])
+        token = str(AccessToken.for_user(user))
+        samples = self.sample_ids()
+
+        endpoints = discover_endpoints(lambda view_name: samples.get(view_name.split(':')[0], samples['default']))
+        if options['include']:
+            endpoints = [e for e in endpoints if re.search(options['include'], f'{e[0]} {e[1]}')]
+        if options['exclude']:
+            endpoints = [e for e in endpoints if not re.search(options['exclude'], f'{e[0]} {e[1]}')]
+        if not endpoints:
+            raise CommandError('No endpoints to benchmark')
+
+        if options['base_url']:
+            fetch = self.http_fetcher(options['base_url'].rstrip('/'), token)
+        else:
+            fetch = self.client_fetcher(token)
+
+        results = {}
+        with override_settings(THROTTLE_ENABLED=options['throttle']):
+            for view_name, path in endpoints:
+                results[view_name] = self.run_endpoint(fetch, path, options['requests'], options['concurrency'])
+                results[view_name]['path'] = path
+                self.print_result(view_name, results[view_name])
+
+        report = {
+            'timestamp': timezone.now().isoformat(),
+            'target': options['base_url'] or 'test-client',
+            'requests_per_endpoint': options['requests'],
+            'concurrency': options['concurrency'],
+            'dataset': {
+                'patients': Patient.objects.count(),
+                'lab_tests': LabTest.objects.count(),
+                'lab_test_results': LabTestResult.objects.count(),
+                'invoices': Invoice.objects.count(),
+                'staff': User.objects.count(),
+            },
+            'endpoints': results,
+        }
+
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                json.dump(report, fh, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+        if options['compare']:
+            with open(options['compare']) as fh:
+                self.print_comparison(json.load(fh), report)
+
+    def get_user(self, username):
+        if username:
+            try:
+                return User.objects.get(username=username)
+            except User.DoesNotExist:
+                raise CommandError(f'User "{username}" does not exist')
+        user = User.objects.filter(is_active=True, role='admin').order_by('id').first()
+        if user is None:
+            raise CommandError('No active admin user, pass --user')
+        return user
+
+    def sample_ids(self):
+        """Path parameter values per URL namespace, using existing rows"""
+        patient_id = Patient.objects.order_by('-id').values_list('id', flat=True).first()
+        result = LabTestResult.objects.order_by('-id').values('id', 'test_id').first()
+        test_id = result['test_id'] if result else LabTest.objects.order_by('-id').values_list('id', flat=True).first()
+        return {
+            'patients': {'pk': patient_id},
+            'lab_tests': {
+                'pk': test_id,
+                'test_id': test_id,
+                'result_id': result['id'] if result else None,
+            },
+            'billing': {'pk': Invoice.objects.order_by('-id').values_list('id', flat=True).first()},
+            'accounts': {'pk': User.objects.order_by('-id').values_list('id', flat=True).first()},
+            'default': {
+                'pk': patient_id,
+                'category_id': LabTestCategory.objects.values_list('id', flat=True).first(),
+            },
+        }
+
+    def client_fetcher(self, token):
+        local = threading.local()
+        host = next((h for h in settings.ALLOWED_HOSTS if h and h != '*' and not h.startswith('.')), 'localhost')
+
+        def fetch(path):
+            client = getattr(local, 'client', None)
+            if client is None:
+                client = local.client = Client(SERVER_NAME=host, HTTP_AUTHORIZATION=f'Bearer {token}')
+            start = time.perf_counter()
+            response = client.get(path)
+            if response.streaming:
+                b''.join(response.streaming_content)
+            elapsed = time.perf_counter() - start
+            return elapsed, response.status_code, response.get('Server-Timing')
+        return fetch
+
+    def http_fetcher(self, base_url, token):
+        def fetch(path):
+            request = urllib.request.Request(base_url + path, headers={'Authorization': f'Bearer {token}'})
+            start = time.perf_counter()
+            try:
+                with urllib.request.urlopen(request, timeout=60) as response:
+                    response.read()
+                    status, header = response.status, response.headers.get('Server-Timing')
+            except urllib.error.HTTPError as exc:
+                exc.read()
+                status, header = exc.code, exc.headers.get('Server-Timing')
+            return time.perf_counter() - start, status, header
+        return fetch
+
+    def run_endpoint(self, fetch, path, count, concurrency):
+        fetch(path)  # warm-up request, not measured
+
+        def worker(_):
+            try:
+                return fetch(path)
+            finally:
+                connections.close_all()
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            samples = list(pool.map(worker, range(count)))
+        wall_time = time.perf_counter() - started
+
+        return summarize(
+            [elapsed for elapsed, _, _ in samples],
+            [status for _, status, _ in samples],
+            [queries_from_server_timing(header) for _, _, header in samples],
+            wall_time,
+        )
+
+    def print_result(self, view_name, result):
+        statuses = ' '.join(f'{code}x{n}' for code, n in sorted(result['statuses'].items()))
+        self.stdout.write(
+            f"{view_name:<45} p50 {result['p50_ms']:>8.2f}ms  p95 {result['p95_ms']:>8.2f}ms  "
+            f"p99 {result['p99_ms']:>8.2f}ms  {result['throughput_rps']:>8.1f} req/s  "
+            f"queries {result['queries_per_request']}  [{statuses}]"
+        )
+
+    def print_comparison(self, previous, current):
+        self.stdout.write(f"\nCompared with {previous.get('timestamp')} ({previous.get('target')}):")
+        for view_name, result in current['endpoints'].items():
+            before = previous.get('endpoints', {}).get(view_name)
+            if not before or not before.get('p95_ms'):
+                continue
+            change = (result['p95_ms'] - before['p95_ms']) / before['p95_ms'] * 100
+            style = self.style.ERROR if change > 10 else self.style.SUCCESS if change < -10 else str
+            self.stdout.write(style(
+                f"{view_name:<45} p95 {before['p95_ms']:>8.2f}ms -> {result['p95_ms']:>8.2f}ms ({change:+.1f}%)  "
+                f"queries {before.get('queries_per_request')} -> {result['queries_per_request']}"
+            ))
@@ -0,0 +1,58 @@
+import sqlite3
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.utils import timezone
+
+from core.models import ReplicationHeartbeat
+from core.replicas import REPLICA_ALIAS, measure_lag
+
+
+class Command(BaseCommand):
+    help = (
+        'Stamp the replication heartbeat on the primary and, for a local SQLite '
+        'replica, copy the primary database into the replica file'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--heartbeat-only', action='store_true',
+            help='Only stamp the heartbeat (the database replicates it on its own)',
+        )
+        parser.add_argument('--interval', type=int, help='Repeat every N seconds until interrupted')
+
+    def handle(self, *args, **options):
+        if REPLICA_ALIAS not in connections.databases:
+            raise CommandError('No replica configured, set REPLICA_DATABASE_NAME')
+
+        while True:
+            self.sync(options['heartbeat_only'])
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
+
+    def sync(self, heartbeat_only):
+        ReplicationHeartbeat.objects.update_or_create(pk=1, defaults={'timestamp': timezone.now()})
+        if not heartbeat_only:
+            self.copy_sqlite()
+        lag = measure_lag()
+        lag_text = 'unreadable' if lag is None else f'{lag:.1f}s'
+        self.stdout.write(f'{timezone.now():%H:%M:%S} heartbeat stamped, replica lag {lag_text}')
+
+    def copy_sqlite(self):
+        primary = connections['default']
+        replica_name = str(connections[REPLICA_ALIAS].settings_dict['NAME'])
+        if primary.vendor != 'sqlite' or connections[REPLICA_ALIAS].vendor != 'sqlite':
+            raise CommandError('Only SQLite replicas can be copied, use --heartbeat-only with real replication')
+
+        # The replica is configured as a read-only "file:<path>?mode=ro" URI
+        path = urlsplit(replica_name).path if replica_name.startswith('file:') else replica_name
+        connections[REPLICA_ALIAS].close()
+        primary.ensure_connection()
+        target = sqlite3.connect(path)
+        try:
+            primary.connection.backup(target)
+        finally:
+            target.close()
@@ -0,0 +1,251 @@
+"""
+In-process request metrics.
+
+``PerformanceMiddleware`` fills a ``RequestTimings`` for every request and
+folds it into the module-level ``registry``, which keeps per-view
+histograms and counters that ``metrics_view`` serves in the Prometheus
+text format. Aggregates are per worker process; scrape each worker (or sum
+them in Prometheus) when running more than one.
+"""
+import contextvars
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+
+# Upper bounds of the histogram buckets, the last bucket is +Inf
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+RESPONSE_SIZE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+_current_timings = contextvars.ContextVar('request_timings', default=None)
+# Sections the current code runs inside, so nested blocks are not counted twice
+_open_sections = contextvars.ContextVar('open_sections', default=frozenset())
+
+
+class RequestTimings:
+    """Per-request measurements, all durations in seconds"""
+
+    __slots__ = ('start', 'db_queries', 'db_time', 'view_time', 'render_time', 'sections')
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.db_queries = 0
+        self.db_time = 0.0
+        self.view_time = 0.0
+        self.render_time = 0.0
+        self.sections = {}
+
+    def add(self, name, duration):
+        self.sections[name] = self.sections.get(name, 0.0) + duration
+
+    def server_timing(self, total):
+        """Value of the ``Server-Timing`` response header"""
+        entries = [
+            f'db;dur={self.db_time * 1000:.2f};desc="{self.db_queries} queries"',
+            f'view;dur={self.view_time * 1000:.2f}',
+        ]
+        entries.extend(f'{name};dur={duration * 1000:.2f}' for name, duration in self.sections.items())
+        entries.append(f'render;dur={self.render_time * 1000:.2f}')
+        entries.append(f'total;dur={total * 1000:.2f}')
+        return ', '.join(entries)
+
+    def db_wrapper(self, execute, sql, params, many, context):
+        """``connection.execute_wrapper`` hook counting queries and their time"""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - start
+            self.db_queries += 1
+
+
+def current_timings():
+    """The ``RequestTimings`` of the request being served, if any"""
+    return _current_timings.get()
+
+
+def activate(timings):
+    return _current_timings.set(timings)
+
+
+def deactivate(token):
+    _current_timings.reset(token)
+
+
+@contextmanager
+def timed(name):
+    """
+    Record the time spent in the block as a named section of the current
+    request's ``Server-Timing`` header, e.g. ``with timed('serialize'):``.
+    A no-op outside of a request and inside a block of the same name.
+    """
+    timings = _current_timings.get()
+    open_sections = _open_sections.get()
+    if timings is None or name in open_sections:
+        yield
+        return
+    token = _open_sections.set(open_sections | {name})
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, time.perf_counter() - start)
+        _open_sections.reset(token)
+
+
+class TimedSerializerMixin:
+    """
+    Count a DRF serializer's ``to_representation()`` as the ``serialize``
+    section, like the row serializers of core/rows.py. With ``many=True``
+    each item is timed, so the list's queryset is not counted; nested
+    serializers are counted once, as part of their parent.
+    """
+
+    def to_representation(self, instance):
+        with timed('serialize'):
+            return super().to_representation(instance)
+
+
+class Histogram:
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """Thread-safe per-view aggregates of ``RequestTimings``"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = {}
+        self._counters = {}
+
+    def reset(self):
+        with self._lock:
+            self._views = {}
+            self._counters = {}
+
+    def observe_request(self, view_name, method, status_code, total, timings, response_size):
+        key = (view_name, method)
+        with self._lock:
+            view = self._views.get(key)
+            if view is None:
+                view = self._views[key] = {
+                    'duration': Histogram(LATENCY_BUCKETS),
+                    'db_queries': Histogram(QUERY_COUNT_BUCKETS),
+                    'response_size': Histogram(RESPONSE_SIZE_BUCKETS),
+                    'db_seconds': 0.0,
+                    'view_seconds': 0.0,
+                    'render_seconds': 0.0,
+                    'sections': {},
+                    'statuses': {},
+                }
+            view['duration'].observe(total)
+            view['db_queries'].observe(timings.db_queries)
+            if response_size is not None:
+                view['response_size'].observe(response_size)
+            view['db_seconds'] += timings.db_time
+            view['view_seconds'] += timings.view_time
+            view['render_seconds'] += timings.render_time
+            for name, duration in timings.sections.items():
+                view['sections'][name] = view['sections'].get(name, 0.0) + duration
+            status_class = f'{status_code // 100}xx'
+            view['statuses'][status_class] = view['statuses'].get(status_class, 0) + 1
+
+    def increment(self, name, labels=(), amount=1):
+        """Bump a free-form counter, e.g. cache hits"""
+        key = (name, tuple(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def render_prometheus(self):
+        """All aggregates in the Prometheus text exposition format"""
+        with self._lock:
+            views = {key: _copy_view(view) for key, view in self._views.items()}
+            counters = dict(self._counters)
+
+        lines = []
+
+        def histogram(name, help_text, field):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} histogram')
+            for (view_name, method), view in sorted(views.items()):
+                hist = view[field]
+                labels = f'view="{_escape(view_name)}",method="{method}"'
+                cumulative = 0
+                for bound, count in zip(hist.buckets + ('+Inf',), hist.counts):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'{name}_sum{{{labels}}} {hist.sum}')
+                lines.append(f'{name}_count{{{labels}}} {hist.count}')
+
+        def counter(name, help_text, values):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} counter')
+            for labels, value in values:
+                lines.append(f'{name}{{{labels}}} {value}')
+
+        histogram('http_request_duration_seconds', 'Request latency by view', 'duration')
+        histogram('http_request_db_queries', 'Database queries per request by view', 'db_queries')
+        histogram('http_response_size_bytes', 'Response body size by view', 'response_size')
+
+        def per_view(field):
+            return [
+                (f'view="{_escape(view_name)}",method="{method}"', view[field])
+                for (view_name, method), view in sorted(views.items())
+            ]
+
+        counter('http_request_db_seconds_total', 'Time spent in database queries', per_view('db_seconds'))
+        counter('http_request_view_seconds_total', 'Time spent in views, including queries', per_view('view_seconds'))
+        counter('http_request_render_seconds_total', 'Time spent rendering responses', per_view('render_seconds'))
+        counter('http_request_section_seconds_total', 'Time spent in named sections such as serialization', [
+            (f'view="{_escape(view_name)}",method="{method}",section="{section}"', duration)
+            for (view_name, method), view in sorted(views.items())
+            for section, duration in sorted(view['sections'].items())
+        ])
+        counter('http_requests_total', 'Requests by view and status class', [
+            (f'view="{_escape(view_name)}",method="{method}",status="{status_class}"', count)
+            for (view_name, method), view in sorted(views.items())
+            for status_class, count in sorted(view['statuses'].items())
+        ])
+
+        names = sorted({name for name, _ in counters})
+        for name in names:
+            lines.append(f'# TYPE {name} counter')
+            for (counter_name, labels), value in sorted(counters.items()):
+                if counter_name == name:
+                    label_text = ','.join(f'{key}="{_escape(str(val))}"' for key, val in labels)
+                    lines.append(f'{name}{{{label_text}}} {value}' if label_text else f'{name} {value}')
+
+        return '\n'.join(lines) + '\n'
+
+
+def _copy_view(view):
+    copied = dict(view)
+    for field in ('duration', 'db_queries', 'response_size'):
+        hist = Histogram(view[field].buckets)
+        hist.counts = list(view[field].counts)
+        hist.sum = view[field].sum
+        hist.count = view[field].count
+        copied[field] = hist
+    copied['sections'] = dict(view['sections'])
+    copied['statuses'] = dict(view['statuses'])
+    return copied
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+registry = MetricsRegistry()
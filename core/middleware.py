@@ -0,0 +1,70 @@
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from . import metrics
+
+
+class PerformanceMiddleware:
+    """
+    Measure every request and report it twice: in a ``Server-Timing``
+    header on the response and in the per-view aggregates served by
+    ``/metrics``.
+
+    Database time comes from a ``connection.execute_wrapper`` on each
+    configured database, view time runs from ``process_view`` until the view
+    returns, render time covers DRF's deferred rendering of the
+    ``Response``, and named sections (e.g. ``serialize``) are recorded by
+    code wrapped in ``metrics.timed()``.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'PERFORMANCE_METRICS_ENABLED', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timings = metrics.RequestTimings()
+        request._timings = timings
+        token = metrics.activate(timings)
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(connections[alias].execute_wrapper(timings.db_wrapper))
+                response = self.get_response(request)
+        finally:
+            metrics.deactivate(token)
+
+        now = time.perf_counter()
+        view_done = getattr(request, '_timings_view_done', None)
+        view_start = getattr(request, '_timings_view_start', None)
+        if view_done is not None:
+            timings.render_time = now - view_done
+        elif view_start is not None:
+            # Plain HttpResponse, there is no separate render step
+            timings.view_time = now - view_start
+        total = now - timings.start
+        response['Server-Timing'] = timings.server_timing(total)
+
+        resolver_match = getattr(request, 'resolver_match', None)
+        view_name = resolver_match.view_name if resolver_match else 'unmatched'
+        response_size = None if response.streaming else len(response.content)
+        metrics.registry.observe_request(
+            view_name, request.method, response.status_code, total, timings, response_size
+        )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._timings_view_start = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        # Called after the view returns and before the response is rendered
+        start = getattr(request, '_timings_view_start', None)
+        if start is not None:
+            now = time.perf_counter()
+            request._timings.view_time = now - start
+            request._timings_view_done = now
+        return response
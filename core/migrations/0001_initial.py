@@ -0,0 +1,26 @@
+# Generated by Django 5.0.3 on 2026-10-19 01:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReplicationHeartbeat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('timestamp', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'Replication Heartbeat',
+                'verbose_name_plural': 'Replication Heartbeats',
+                'db_table': 'replication_heartbeat',
+            },
+        ),
+    ]
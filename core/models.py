@@ -0,0 +1,78 @@
+from django.db import models
+
+
+class ReplicationHeartbeat(models.Model):
+    """
+    Single row stamped on the primary; its age as read from a replica is how
+    far that replica lags behind
+    """
+    timestamp = models.DateTimeField()
+
+    class Meta:
+        db_table = 'replication_heartbeat'
+        verbose_name = 'Replication Heartbeat'
+        verbose_name_plural = 'Replication Heartbeats'
+
+    def __str__(self):
+        return self.timestamp.isoformat()
+
+
+class IdempotencyKey(models.Model):
+    """
+    Outcome of a create request sent with an ``Idempotency-Key`` header,
+    replayed to retries of the same request until ``expires_at`` (see
+    core/idempotency.py)
+    """
+    STATUS_CHOICES = [
+        ('in_progress', 'In Progress'),
+        ('completed', 'Completed'),
+    ]
+
+    # Keys are scoped to the user who sent them; no constraint so pruning
+    # never waits on the users table
+    user_id = models.BigIntegerField()
+    key = models.CharField(max_length=255)
+    # sha256 of method, full path and body, so a key reused for another
+    # request is refused
+    fingerprint = models.CharField(max_length=64)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='in_progress')
+    response_status = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_data = models.JSONField(null=True, blank=True)
+    created_at = models.DateTimeField()
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        db_table = 'idempotency_keys'
+        verbose_name = 'Idempotency Key'
+        verbose_name_plural = 'Idempotency Keys'
+        constraints = [
+            models.UniqueConstraint(fields=['user_id', 'key'], name='idempotency_user_key_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['expires_at'], name='idempotency_expires_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.key} ({self.status})"
+
+
+class Tombstone(models.Model):
+    """
+    Record of a deleted patient, lab test, lab result, invoice or payment,
+    so delta sync (core/sync.py) can tell clients to drop it. Kept for
+    ``SYNC_TOMBSTONE_RETENTION_DAYS``; older sync tokens need a full resync.
+    """
+    entity = models.CharField(max_length=50)
+    object_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField()
+
+    class Meta:
+        db_table = 'sync_tombstones'
+        verbose_name = 'Tombstone'
+        verbose_name_plural = 'Tombstones'
+        indexes = [
+            models.Index(fields=['deleted_at', 'id'], name='sync_tombstones_deleted_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.entity} #{self.object_id}"
@@ -0,0 +1,75 @@
+"""
+Chunked deletion of records with many dependents.
+
+``instance.delete()`` deletes or nulls every dependent row in one
+transaction. On SQLite that holds the write lock for as long as it takes,
+which for a long-standing patient or staff member is long enough for
+other requests to time out. ``purge`` does the same work one relation at a
+time, in chunks of ``batch_size`` rows with one short transaction each,
+and deletes the record itself last.
+
+Chunks are deleted with ``QuerySet.delete()``, so the children of each
+chunk (results of a lab test, items and payments of an invoice), signals
+and audit entries are handled as usual. Nulled foreign keys are updated
+without signals, like Django's own ``SET_NULL``. A purge that is
+interrupted can be run again and continues with the rows that are left.
+
+The delete endpoints only set ``deleted_at``, which hides the record from
+the default manager at once, and queue the purge as a background job
+(``patients.purge``, ``accounts.purge_staff``).
+"""
+from django.conf import settings
+from django.db import models, transaction
+
+
+def _relations(instance):
+    """``(label, queryset, field name, on_delete)`` for every dependent relation handled in chunks"""
+    for relation in instance._meta.related_objects:
+        if relation.many_to_many or relation.on_delete not in (models.CASCADE, models.SET_NULL):
+            # Left to the final delete(), as before
+            continue
+        model, field_name = relation.related_model, relation.field.name
+        queryset = model._base_manager.filter(**{field_name: instance.pk})
+        yield f'{model._meta.label_lower}.{field_name}', queryset, field_name, relation.on_delete
+
+
+def _chunk(queryset, batch_size):
+    return list(queryset.order_by('pk').values_list('pk', flat=True)[:batch_size])
+
+
+def purge(instance, batch_size=None, on_progress=None):
+    """
+    Delete ``instance`` after deleting or nulling its dependents in chunks.
+    ``on_progress(step=..., processed=..., total=...)`` is called after each
+    chunk. Returns ``{relation: rows deleted or nulled}``.
+    """
+    batch_size = batch_size or getattr(settings, 'PURGE_BATCH_SIZE', 500)
+    relations = list(_relations(instance))
+    processed = 0
+    counts = {}
+
+    for index, (label, queryset, field_name, on_delete) in enumerate(relations):
+        # Recounted per relation, since earlier chunks may have cascaded into later relations
+        total = processed + sum(remaining.count() for _, remaining, _, _ in relations[index:])
+        done = 0
+        while True:
+            ids = _chunk(queryset, batch_size)
+            if not ids:
+                break
+            with transaction.atomic():
+                chunk = queryset.model._base_manager.filter(pk__in=ids)
+                if on_delete is models.CASCADE:
+                    chunk.delete()
+                else:
+                    chunk.update(**{field_name: None})
+            done += len(ids)
+            processed += len(ids)
+            if on_progress:
+                on_progress(step=label, processed=processed, total=total)
+        counts[label] = done
+
+    with transaction.atomic():
+        instance.delete()
+    if on_progress:
+        on_progress(step='done', processed=processed, total=processed)
+    return counts
@@ -0,0 +1,176 @@
+"""
+Read-replica routing.
+
+Writes and ordinary reads go to the primary (``default``). Views decorated
+with ``@replica_reads`` (reports and statistics) run their queries on the
+``replica`` alias instead, unless:
+
+- the user wrote something within ``REPLICA_READ_YOUR_WRITES_WINDOW``
+  seconds, so they see their own changes; writes are recorded by
+  ``ReplicaRoutingMiddleware``;
+- the replica is missing, unreachable or lags the primary by more than
+  ``REPLICA_MAX_LAG`` seconds. Lag is the age of the
+  ``ReplicationHeartbeat`` row as seen on the replica and is re-checked at
+  most every ``REPLICA_LAG_CHECK_INTERVAL`` seconds per process.
+
+Without a ``replica`` entry in ``DATABASES`` everything stays on the primary.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DatabaseError
+from django.utils import timezone
+
+REPLICA_ALIAS = 'replica'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_read_alias = ContextVar('replica_read_alias', default=None)
+_lag_lock = threading.Lock()
+_lag_checked_at = None
+_lag = None
+
+
+def replica_configured():
+    return REPLICA_ALIAS in settings.DATABASES
+
+
+def current_read_alias():
+    """Alias reads are routed to in this context, None for the primary"""
+    return _read_alias.get()
+
+
+@contextmanager
+def use_replica():
+    token = _read_alias.set(REPLICA_ALIAS)
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+def _write_key(user_id):
+    return f'replica:last-write:{user_id}'
+
+
+def record_write(user_id):
+    window = getattr(settings, 'REPLICA_READ_YOUR_WRITES_WINDOW', 5)
+    if window > 0:
+        cache.set(_write_key(user_id), time.time(), timeout=window)
+
+
+def wrote_recently(user_id):
+    return cache.get(_write_key(user_id)) is not None
+
+
+def measure_lag():
+    """Seconds the replica is behind, None if it cannot be read"""
+    from .models import ReplicationHeartbeat
+
+    try:
+        stamp = ReplicationHeartbeat.objects.using(REPLICA_ALIAS).values_list('timestamp', flat=True).first()
+    except DatabaseError:
+        return None
+    if stamp is None:
+        return None
+    return max(0.0, (timezone.now() - stamp).total_seconds())
+
+
+def replica_lag():
+    """Cached ``measure_lag()``"""
+    global _lag_checked_at, _lag
+    interval = getattr(settings, 'REPLICA_LAG_CHECK_INTERVAL', 5)
+    now = time.monotonic()
+    with _lag_lock:
+        if _lag_checked_at is None or now - _lag_checked_at >= interval:
+            _lag = measure_lag()
+            _lag_checked_at = now
+        return _lag
+
+
+def replica_available():
+    lag = replica_lag()
+    return lag is not None and lag <= getattr(settings, 'REPLICA_MAX_LAG', 30)
+
+
+def should_use_replica(request):
+    if not replica_configured() or request.method not in SAFE_METHODS:
+        return False
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated and wrote_recently(user.pk):
+        return False
+    return replica_available()
+
+
+def replica_reads(view_func):
+    """
+    Run the view's queries on the replica when it is fresh enough. Put it
+    directly above the function so it runs after DRF has authenticated the
+    request.
+    """
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        if not should_use_replica(request):
+            return view_func(request, *args, **kwargs)
+        with use_replica():
+            return view_func(request, *args, **kwargs)
+    return wrapper
+
+
+def replica_iterator(iterable):
+    """
+    Iterate ``iterable`` with its queries on the replica. For streamed
+    responses, whose generators run after ``@replica_reads`` has returned.
+    """
+    iterator = iter(iterable)
+    while True:
+        with use_replica():
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+        yield item
+
+
+class ReplicaRouter:
+    """``DATABASE_ROUTERS`` entry; the replica only ever serves reads"""
+
+    def db_for_read(self, model, **hints):
+        return current_read_alias()
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == REPLICA_ALIAS:
+            return False
+        return None
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Remember when each user last wrote, so their next reads within the
+    read-your-writes window stay on the primary
+    """
+
+    def __init__(self, get_response):
+        if not replica_configured():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            # DRF copies the authenticated user onto the Django request
+            user = getattr(request, 'user', None)
+            if user is not None and user.is_authenticated:
+                record_write(user.pk)
+        return response
@@ -0,0 +1,181 @@
+"""
+Response cache for DRF function views.
+
+``@cached_response(models=[...])`` stores the data of a view's 200
+responses in the default Django cache. The key is built from the view
+name, the normalized query string and the caller's scope: their role by
+default (admins and superusers share one scope), their user id with
+``scope='user'``, or nobody with ``scope='global'``.
+
+Each cached entry records the versions of the models it depends on. Every
+``post_save``/``post_delete`` on a tagged model bumps that model's version
+once its transaction commits, which invalidates every entry built on it.
+Changes made without signals (``bulk_create``, queryset ``update()``)
+invalidate nothing and are picked up when the entries expire.
+
+Entries are fresh for ``timeout`` seconds and may then be served stale
+for another ``stale`` seconds. The first request to find a stale entry
+recomputes it, and concurrent requests keep getting the stale copy until
+it is replaced. Lookups are counted per view in ``/metrics`` as
+``response_cache_requests_total{result="hit|stale|miss"}``.
+
+With the default in-process cache backend every worker keeps its own
+entries and only sees invalidations from its own writes; point
+``CACHE_BACKEND`` at a shared cache when running several workers.
+"""
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from rest_framework import status
+from rest_framework.response import Response
+
+from .metrics import registry
+
+KEY_PREFIX = 'respcache'
+# How long a recomputation may hold the refresh lock of a stale entry
+REFRESH_LOCK_SECONDS = 30
+
+_tagged_models = set()
+
+
+def _tag(model):
+    return model._meta.label_lower
+
+
+def _version_key(tag):
+    return f'{KEY_PREFIX}:version:{tag}'
+
+
+def tag_versions(tags):
+    """Current version of each tag, starting unknown tags at 1"""
+    keys = {_version_key(tag): tag for tag in tags}
+    found = cache.get_many(list(keys))
+    versions = {}
+    for key, tag in keys.items():
+        if key in found:
+            versions[tag] = found[key]
+        else:
+            cache.add(key, 1, timeout=None)
+            versions[tag] = cache.get(key, 1)
+    return versions
+
+
+def invalidate(model):
+    """Drop every cached response that depends on ``model``"""
+    key = _version_key(_tag(model))
+    if cache.add(key, 2, timeout=None):
+        return
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Evicted between add() and incr()
+        cache.set(key, 2, timeout=None)
+
+
+def _model_changed(sender, **kwargs):
+    transaction.on_commit(lambda: invalidate(sender), using=kwargs.get('using'))
+
+
+def track(model):
+    """Invalidate on every save and delete of ``model``"""
+    if model in _tagged_models:
+        return
+    _tagged_models.add(model)
+    post_save.connect(_model_changed, sender=model, dispatch_uid=f'response_cache_save_{_tag(model)}')
+    post_delete.connect(_model_changed, sender=model, dispatch_uid=f'response_cache_delete_{_tag(model)}')
+
+
+def caller_scope(request, scope):
+    if scope == 'global':
+        return 'all'
+    user = request.user
+    if scope == 'user':
+        return f'user:{user.pk}'
+    if user.is_superuser:
+        return 'role:admin'
+    return f"role:{getattr(user, 'role', None)}"
+
+
+def normalized_query(request, ignore=()):
+    """Query string with sorted keys and values, so ``?a=1&b=2`` and ``?b=2&a=1`` share an entry"""
+    items = []
+    for name, values in sorted(request.query_params.lists()):
+        if name not in ignore:
+            items.extend((name, value) for value in sorted(values))
+    return '&'.join(f'{name}={value}' for name, value in items)
+
+
+def _record(view_name, result):
+    registry.increment('response_cache_requests_total', labels=(('view', view_name), ('result', result)))
+
+
+def cached_response(models, timeout=None, stale=None, scope='role', ignore_params=()):
+    """
+    Cache a view's 200 responses, see the module docstring. Put it directly
+    above the function (or above ``@replica_reads``) so it runs after DRF
+    has authenticated and throttled the request.
+    """
+    models = tuple(models)
+    tags = sorted(_tag(model) for model in models)
+    for model in models:
+        track(model)
+
+    def decorator(view_func):
+        view_name = f'{view_func.__module__}.{view_func.__name__}'
+
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if not getattr(settings, 'RESPONSE_CACHE_ENABLED', True):
+                return view_func(request, *args, **kwargs)
+
+            fresh_for = timeout if timeout is not None else getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 60)
+            stale_for = stale if stale is not None else getattr(settings, 'RESPONSE_CACHE_STALE', 300)
+            query = normalized_query(request, ignore_params)
+            arguments = f'{args}{sorted(kwargs.items())}'
+            digest = hashlib.sha1(f'{query}|{arguments}'.encode('utf-8')).hexdigest()
+            key = f'{KEY_PREFIX}:{view_name}:{caller_scope(request, scope)}:{digest}'
+
+            versions = tag_versions(tags)
+            entry = cache.get(key)
+            now = time.time()
+            if entry is not None and entry['versions'] == versions:
+                age = now - entry['stored_at']
+                if age < fresh_for:
+                    _record(view_name, 'hit')
+                    return _cached(entry, 'HIT')
+                # Whoever takes the refresh lock recomputes, everyone else gets the stale copy
+                if not cache.add(f'{key}:refresh', 1, timeout=REFRESH_LOCK_SECONDS):
+                    _record(view_name, 'stale')
+                    return _cached(entry, 'STALE')
+                refreshing = True
+            else:
+                refreshing = False
+
+            _record(view_name, 'miss')
+            try:
+                response = view_func(request, *args, **kwargs)
+            finally:
+                if refreshing:
+                    cache.delete(f'{key}:refresh')
+            if response.status_code == status.HTTP_200_OK and hasattr(response, 'data'):
+                cache.set(key, {
+                    'data': response.data,
+                    'versions': versions,
+                    'stored_at': now,
+                }, timeout=fresh_for + stale_for)
+            response['X-Cache'] = 'MISS'
+            return response
+        return wrapper
+    return decorator
+
+
+def _cached(entry, label):
+    response = Response(entry['data'], status=status.HTTP_200_OK)
+    response['X-Cache'] = label
+    response['Age'] = str(int(time.time() - entry['stored_at']))
+    return response
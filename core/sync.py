@@ -0,0 +1,184 @@
+"""
+Delta sync for offline clients (``GET /api/sync/``).
+
+A client keeps the token from its last sync and asks for what changed
+since then. Each entity is read in ``(updated_at, id)`` order from its
+``(updated_at, id)`` index. Deletions come from the ``sync_tombstones``
+table, written on every delete (and when a patient is soft-deleted). The
+cost of a sync therefore follows the number of changes, not the size of
+the tables.
+
+A sync runs up to a high-water mark ``SYNC_LAG_SECONDS`` in the past
+rather than up to now. ``updated_at`` is stamped when a row is saved, not
+when its transaction commits, and the lag leaves room for transactions
+still in flight. Large change sets are paged. While ``has_more`` is true,
+the client repeats the request with the new token, which keeps the same
+high-water mark, until it has caught up.
+
+Changes that bypass ``save()`` (queryset ``update()``, ``bulk_create``) do
+not touch ``updated_at`` and are not picked up. Archived records (see
+core/archive.py) simply stop changing, and clients keep their last copy.
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core import signing
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+
+from billing.models import Invoice, Payment
+from billing.serializers import invoice_rows, payment_rows
+from lab_tests.models import LabTest, LabTestResult
+from lab_tests.serializers import lab_test_result_rows, lab_test_rows
+from patients.models import Patient
+from patients.serializers import patient_rows
+from .models import Tombstone
+
+# name -> (model, row serializer), in the order changes are returned
+ENTITIES = {
+    'patients': (Patient, patient_rows),
+    'lab_tests': (LabTest, lab_test_rows),
+    'lab_test_results': (LabTestResult, lab_test_result_rows),
+    'invoices': (Invoice, invoice_rows),
+    'payments': (Payment, payment_rows),
+}
+DELETED = 'deleted'
+MAX_PAGE_SIZE = 2000
+TOKEN_SALT = 'core.sync'
+TOKEN_VERSION = 1
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+class SyncError(Exception):
+    """An unreadable token; ``expired`` when its deletions are no longer kept"""
+
+    def __init__(self, message, expired=False):
+        super().__init__(message)
+        self.expired = expired
+
+
+def _to_micros(value):
+    return (value - _EPOCH) // _MICROSECOND
+
+
+def _from_micros(value):
+    return _EPOCH + value * _MICROSECOND
+
+
+def make_token(state):
+    return signing.dumps({**state, 'v': TOKEN_VERSION}, salt=TOKEN_SALT, compress=True)
+
+
+def read_token(token):
+    try:
+        state = signing.loads(token, salt=TOKEN_SALT)
+    except signing.BadSignature:
+        raise SyncError('Invalid sync token')
+    if state.get('v') != TOKEN_VERSION:
+        raise SyncError('Invalid sync token')
+    retention = timedelta(days=getattr(settings, 'SYNC_TOMBSTONE_RETENTION_DAYS', 30))
+    deleted_cursor = state['cursors'].get(DELETED)
+    if deleted_cursor and _from_micros(deleted_cursor[0]) < timezone.now() - retention:
+        raise SyncError('Sync token expired, sync again without a token', expired=True)
+    return state
+
+
+def initial_state(until):
+    # A fresh client has nothing to delete, so its deletions start at the high-water mark
+    return {'until': None, 'cursors': {DELETED: [_to_micros(until), 0]}}
+
+
+def _page(queryset, time_field, cursor, until, limit):
+    """``[(timestamp, id)]`` of the next ``limit`` rows after ``cursor``, up to ``until``"""
+    after = _from_micros(cursor[0])
+    return list(
+        queryset.filter(**{f'{time_field}__gte': after, f'{time_field}__lte': until})
+        .exclude(**{time_field: after, 'id__lte': cursor[1]})
+        .order_by(time_field, 'id')
+        .values_list(time_field, 'id')[:limit]
+    )
+
+
+def sync(token=None, limit=500, names=None):
+    """
+    Changes after ``token`` (everything when None), at most ``limit`` rows:
+    ``{'changes': {entity: [rows]}, 'deleted': {entity: [ids]}, 'token',
+    'has_more', 'synced_until'}``
+    """
+    names = names or list(ENTITIES)
+    if token:
+        state = read_token(token)
+        until = _from_micros(state['until']) if state['until'] else None
+    else:
+        state = None
+        until = None
+    if until is None:
+        until = timezone.now() - timedelta(seconds=getattr(settings, 'SYNC_LAG_SECONDS', 5))
+    if state is None:
+        state = initial_state(until)
+    cursors = dict(state['cursors'])
+
+    budget = limit
+    has_more = False
+    changes = {}
+    for name in names:
+        if budget == 0:
+            has_more = True
+            break
+        model, rows = ENTITIES[name]
+        keys = _page(model.objects.all(), 'updated_at', cursors.get(name, [0, 0]), until, budget)
+        if keys:
+            cursors[name] = [_to_micros(keys[-1][0]), keys[-1][1]]
+            ids = [pk for _, pk in keys]
+            changes[name] = rows.serialize(model.objects.filter(pk__in=ids).order_by('updated_at', 'id'))
+            budget -= len(keys)
+        has_more = has_more or budget == 0
+
+    deleted = {}
+    if budget:
+        tombstones = _page(Tombstone.objects.all(), 'deleted_at', cursors[DELETED], until, budget)
+        if tombstones:
+            cursors[DELETED] = [_to_micros(tombstones[-1][0]), tombstones[-1][1]]
+            rows = Tombstone.objects.filter(pk__in=[pk for _, pk in tombstones]).order_by('deleted_at', 'id')
+            for entity, object_id in rows.values_list('entity', 'object_id'):
+                deleted.setdefault(entity, []).append(object_id)
+        if len(tombstones) < budget:
+            # Caught up: the deletions cursor moves to the high-water mark even without
+            # new tombstones, so a quiet stretch does not make the token look expired
+            cursors[DELETED] = max(cursors[DELETED], [_to_micros(until), 0])
+        else:
+            has_more = True
+    else:
+        has_more = True
+
+    return {
+        'changes': changes,
+        'deleted': deleted,
+        # Paging keeps the high-water mark; a finished sync starts the next one from here
+        'token': make_token({'until': _to_micros(until) if has_more else None, 'cursors': cursors}),
+        'has_more': has_more,
+        'synced_until': until,
+    }
+
+
+def record_tombstone(sender, instance, **kwargs):
+    if getattr(instance, 'deleted_at', None) is not None:
+        # Soft-deleted earlier, the tombstone was written then
+        return
+    Tombstone.objects.create(entity=_entity_names[sender], object_id=instance.pk, deleted_at=timezone.now())
+
+
+def record_soft_delete(sender, instance, update_fields=None, **kwargs):
+    if update_fields and 'deleted_at' in update_fields and instance.deleted_at is not None:
+        Tombstone.objects.create(entity='patients', object_id=instance.pk, deleted_at=instance.deleted_at)
+
+
+_entity_names = {model: name for name, (model, _) in ENTITIES.items()}
+
+
+def connect():
+    for name, (model, _) in ENTITIES.items():
+        post_delete.connect(record_tombstone, sender=model, dispatch_uid=f'sync_tombstone_{name}')
+    post_save.connect(record_soft_delete, sender=Patient, dispatch_uid='sync_soft_delete_patients')
@@ -0,0 +1,97 @@
+from datetime import date, timedelta
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from patients.models import Patient
+from .sync import SyncError, read_token, sync
+from .throttling import AnonTokenBucketThrottle
+
+User = get_user_model()
+
+
+class SyncQuietPeriodTests(TestCase):
+    """A client that keeps syncing must not be expired by a stretch without deletions"""
+
+    def sync_at(self, moment, token=None):
+        with mock.patch('django.utils.timezone.now', return_value=moment):
+            return sync(token)
+
+    def test_regular_syncs_without_deletions_stay_valid(self):
+        start = timezone.now()
+        token = self.sync_at(start)['token']
+        # Synced every 20 days for 100 days, well past the 30 days of retention
+        for day in range(20, 101, 20):
+            result = self.sync_at(start + timedelta(days=day), token)
+            self.assertFalse(result['has_more'])
+            self.assertEqual(result['deleted'], {})
+            token = result['token']
+
+    def test_deletion_after_quiet_period_is_returned(self):
+        start = timezone.now()
+        token = self.sync_at(start)['token']
+        token = self.sync_at(start + timedelta(days=25), token)['token']
+
+        with mock.patch('django.utils.timezone.now', return_value=start + timedelta(days=40)):
+            patient = Patient.objects.create(
+                first_name='Ada', last_name='Obi', date_of_birth=date(1990, 1, 1),
+                gender='female', phone_number='0800000000',
+            )
+            patient_id = patient.pk
+            patient.delete()
+
+        result = self.sync_at(start + timedelta(days=50), token)
+        self.assertEqual(result['deleted'], {'patients': [patient_id]})
+
+    def test_token_unused_past_retention_expires(self):
+        start = timezone.now()
+        token = self.sync_at(start)['token']
+        with mock.patch('django.utils.timezone.now', return_value=start + timedelta(days=31)):
+            with self.assertRaises(SyncError) as raised:
+                read_token(token)
+        self.assertTrue(raised.exception.expired)
+
+
+class ThrottleIdentTests(TestCase):
+    """Per-IP throttle buckets must not be chosen by the client through X-Forwarded-For"""
+
+    def ident(self, forwarded_for):
+        request = Request(APIRequestFactory().get('/', HTTP_X_FORWARDED_FOR=forwarded_for, REMOTE_ADDR='10.0.0.5'))
+        return AnonTokenBucketThrottle().get_ident(request)
+
+    def test_forwarded_for_is_ignored_without_proxies(self):
+        self.assertEqual(self.ident('1.2.3.4'), '10.0.0.5')
+        self.assertEqual(self.ident('5.6.7.8'), '10.0.0.5')
+
+    def test_forwarded_for_is_read_behind_one_proxy(self):
+        with override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'NUM_PROXIES': 1}):
+            self.assertEqual(self.ident('1.2.3.4, 203.0.113.9'), '203.0.113.9')
+
+
+class BatchAsyncViewTests(TestCase):
+    """One unbatchable item must not fail the whole batch"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            username='admin', email='admin@example.com', password='secret-pass', role='admin'
+        )
+
+    def setUp(self):
+        token = RefreshToken.for_user(self.admin).access_token
+        self.client.defaults.update(HTTP_HOST='localhost', HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def test_async_view_is_rejected_per_item(self):
+        response = self.client.post('/api/batch/', {
+            'requests': ['/api/lab-tests/events/', '/api/patients/'],
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        results = response.json()['responses']
+        self.assertEqual([result['status'] for result in results], [400, 200])
+        self.assertEqual(results[0]['body']['message'], 'Async views cannot be batched')
@@ -0,0 +1,191 @@
+"""
+Token-bucket throttling for DRF views.
+
+Every bucket holds up to ``num`` tokens and refills continuously at
+``num / period``, so a client can burst up to the full rate and is then
+held to the average. Buckets live in process memory by default
+(``THROTTLE_STORE = 'memory'``), which costs a dict lookup under a lock and
+no I/O, or in the Django cache (``'cache'``) so several workers share them
+when CACHES points at a shared backend. The cache store reads and writes
+without a lock, so concurrent workers may let a few extra requests through.
+
+Rates use DRF's ``REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']`` format
+(``'10/min'``) per scope, with per-role overrides in
+``THROTTLE_ROLE_RATES``. DRF turns a rejection into a 429 response with a
+``Retry-After`` header from ``wait()``.
+
+Per-IP buckets (anonymous requests, login attempts) use DRF's
+``get_ident()``. It trusts ``X-Forwarded-For`` only as far as
+``REST_FRAMEWORK['NUM_PROXIES']`` allows. Without that setting, DRF keys
+on whatever the client puts in the header, and rotating the header would
+dodge the limits. The setting defaults to 0, which keys on ``REMOTE_ADDR``.
+Behind a load balancer, set ``NUM_PROXIES`` to the number of proxies that
+append to the header.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    """``'10/min'`` -> ``(10, 60)``, None for an unset rate"""
+    if rate is None:
+        return None
+    num, period = rate.split('/')
+    return int(num), PERIODS[period[0]]
+
+
+class MemoryBucketStore:
+    """Buckets in a bounded dict, least recently used buckets are dropped first"""
+
+    def __init__(self, max_buckets=100000):
+        self.max_buckets = max_buckets
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consume(self, key, capacity, refill_per_second, now):
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * refill_per_second)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_buckets:
+                self._buckets.popitem(last=False)
+        return allowed, tokens
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class CacheBucketStore:
+    """Buckets in the default Django cache, shared between workers"""
+
+    def consume(self, key, capacity, refill_per_second, now):
+        cache_key = f'throttle:{key}'
+        tokens, updated = cache.get(cache_key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated) * refill_per_second)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        # Expire once the bucket would be full again anyway
+        cache.set(cache_key, (tokens, now), timeout=int(capacity / refill_per_second) + 1)
+        return allowed, tokens
+
+    def clear(self):
+        pass
+
+
+memory_store = MemoryBucketStore()
+cache_store = CacheBucketStore()
+
+
+def get_store():
+    if getattr(settings, 'THROTTLE_STORE', 'memory') == 'cache':
+        return cache_store
+    return memory_store
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Base class: subclasses set ``scope`` and implement ``get_cache_key()``
+    to return the bucket identity, or None to skip throttling the request.
+    """
+    scope = None
+
+    def __init__(self):
+        self._wait = None
+
+    def get_rate(self, request):
+        role = getattr(request.user, 'role', None)
+        if getattr(request.user, 'is_superuser', False):
+            role = 'admin'
+        role_rates = getattr(settings, 'THROTTLE_ROLE_RATES', {}).get(self.scope, {})
+        if role in role_rates:
+            return role_rates[role]
+        return api_settings.DEFAULT_THROTTLE_RATES.get(self.scope)
+
+    def get_cache_key(self, request, view):
+        raise NotImplementedError('.get_cache_key() must be overridden')
+
+    def allow_request(self, request, view):
+        if not getattr(settings, 'THROTTLE_ENABLED', True):
+            return True
+        rate = parse_rate(self.get_rate(request))
+        if rate is None:
+            return True
+        key = self.get_cache_key(request, view)
+        if key is None:
+            return True
+
+        capacity, period = rate
+        refill_per_second = capacity / period
+        allowed, tokens = get_store().consume(f'{self.scope}:{key}', capacity, refill_per_second, time.monotonic())
+        if not allowed:
+            self._wait = (1 - tokens) / refill_per_second
+        return allowed
+
+    def wait(self):
+        return self._wait
+
+
+class AnonTokenBucketThrottle(TokenBucketThrottle):
+    """Unauthenticated requests, per client IP"""
+    scope = 'anon'
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return None
+        return self.get_ident(request)
+
+
+class UserTokenBucketThrottle(TokenBucketThrottle):
+    """Authenticated requests, per user, with per-role rates"""
+    scope = 'user'
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return str(request.user.pk)
+        return None
+
+
+class LoginThrottle(TokenBucketThrottle):
+    """Login attempts, per client IP, checked before the password is hashed"""
+    scope = 'login'
+
+    def get_cache_key(self, request, view):
+        return self.get_ident(request)
+
+
+class LoginAccountThrottle(TokenBucketThrottle):
+    """Login attempts against one email address, from any IP"""
+    scope = 'login_account'
+
+    def get_cache_key(self, request, view):
+        email = request.data.get('email') if hasattr(request.data, 'get') else None
+        if not email:
+            return None
+        return str(email).strip().lower()
+
+
+class ExpensiveEndpointThrottle(TokenBucketThrottle):
+    """
+    Reports and statistics endpoints, per user, with per-role rates. Shares
+    one bucket across all of them so a dashboard refresh burst is limited
+    as a whole.
+    """
+    scope = 'expensive'
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return str(request.user.pk)
+        return self.get_ident(request)
@@ -0,0 +1,13 @@
+from django.urls import path
+from . import views
+
+app_name = 'core'
+
+urlpatterns = [
+    path('api/batch/', views.batch_view, name='batch'),
+    path('api/bootstrap/', views.bootstrap_view, name='bootstrap'),
+    path('api/sync/', views.sync_view, name='sync'),
+    path('metrics', views.metrics_view, name='metrics'),
+    path('healthz', views.healthz_view, name='healthz'),
+    path('readyz', views.readyz_view, name='readyz'),
+]
@@ -0,0 +1,153 @@
+from django.db import DatabaseError, connection
+from django.http import HttpResponse, HttpResponseNotModified, JsonResponse
+from django.utils.http import parse_etags
+from django.views.decorators.cache import never_cache
+from django.views.decorators.http import require_GET
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from .batch import BatchError, parse_batch, run_batch
+from .bootstrap import get_bootstrap
+from .metrics import registry
+from .sync import ENTITIES, MAX_PAGE_SIZE, SyncError, sync
+from . import warmup
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def metrics_view(request):
+    """
+    Request metrics of this worker process in the Prometheus text format
+    GET /metrics
+    """
+    # Check if user is admin
+    if request.user.role != 'admin' and not request.user.is_superuser:
+        return Response({
+            'success': False,
+            'message': 'Permission denied. Admin access required.'
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    return HttpResponse(
+        registry.render_prometheus(),
+        content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def bootstrap_view(request):
+    """
+    Reference data for client start-up: active services, active lab test
+    categories, active doctors and the choice lists, tagged with a version
+    ETag. Send it back in If-None-Match to get a 304 while nothing changed.
+    GET /api/bootstrap/
+    """
+    version, body = get_bootstrap()
+    etag = f'"{version}"'
+
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match:
+        tags = [tag.removeprefix('W/') for tag in parse_etags(if_none_match)]
+        if etag in tags or '*' in tags:
+            response = HttpResponseNotModified()
+            response['ETag'] = etag
+            response['Cache-Control'] = 'private, no-cache'
+            return response
+
+    response = HttpResponse(body, content_type='application/json')
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def batch_view(request):
+    """
+    Run several GET requests in one round trip
+    POST /api/batch/
+    Body: {"requests": [{"id": "patients", "path": "/api/patients/stats/"}, ...], "concurrent": false}
+    """
+    try:
+        items, concurrent = parse_batch(request.data)
+    except BatchError as exc:
+        return Response({
+            'success': False,
+            'message': str(exc)
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response({
+        'success': True,
+        'responses': run_batch(request, items, concurrent)
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def sync_view(request):
+    """
+    Records created, updated or deleted since the last sync (see core/sync.py)
+    GET /api/sync/
+    Query Params:
+        since (str): Token from the previous response; omit to download everything
+        entities (str): Comma-separated subset of patients, lab_tests, lab_test_results, invoices, payments
+        limit (int): Most changed records per response (default 500, max 2000)
+    """
+    names = [name for name in request.query_params.get('entities', '').split(',') if name]
+    unknown = [name for name in names if name not in ENTITIES]
+    if unknown:
+        return Response({
+            'success': False,
+            'message': f"Unknown entities: {', '.join(unknown)}"
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        limit = int(request.query_params.get('limit', 500))
+    except ValueError:
+        limit = 0
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        return Response({
+            'success': False,
+            'message': f'limit must be between 1 and {MAX_PAGE_SIZE}'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        result = sync(request.query_params.get('since'), limit, names)
+    except SyncError as exc:
+        return Response({
+            'success': False,
+            'message': str(exc)
+        }, status=status.HTTP_410_GONE if exc.expired else status.HTTP_400_BAD_REQUEST)
+
+    return Response({'success': True, **result}, status=status.HTTP_200_OK)
+
+
+@never_cache
+@require_GET
+def healthz_view(request):
+    """
+    Liveness probe: the process is up and serving requests. No database
+    access, authentication or throttling.
+    GET /healthz
+    """
+    return JsonResponse({'status': 'ok'})
+
+
+@never_cache
+@require_GET
+def readyz_view(request):
+    """
+    Readiness probe: 200 once this worker has warmed up (see core/warmup.py)
+    and the database answers, 503 otherwise
+    GET /readyz
+    """
+    if not warmup.is_ready() and not warmup.try_warm_up():
+        return JsonResponse({'status': 'warming_up'}, status=503)
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+    except DatabaseError:
+        return JsonResponse({'status': 'database_unavailable'}, status=503)
+    return JsonResponse({'status': 'ready', 'warmup_seconds': round(warmup.status()['duration'], 3)})
@@ -0,0 +1,140 @@
+"""
+Worker warm-up for ``/readyz``.
+
+Much of what the first requests of a new worker need is built lazily: the
+URL resolver's lookup tables, the field trees of DRF serializers and the
+model metadata they read, the system settings row and the bootstrap
+payload (core/bootstrap.py). Without a warm-up, the first requests after a
+deploy or a scale-up pay for all of it.
+
+``dannys_wellness/wsgi.py`` and ``asgi.py`` call ``try_warm_up()`` once
+the application is loaded (unless ``WARMUP_ON_BOOT`` is off). ``/readyz``
+reports 503 until the warm-up has finished, so the load balancer only
+sends traffic to warm workers. A warm-up that failed (say, the database was
+not up yet) or was switched off is run by the next ``/readyz`` probe
+instead. ``/healthz`` answers as soon as the process serves requests.
+
+All of these caches are per process, so every worker warms up on its own.
+The warm-up also checks that the database answers, then closes its
+connection: connections are per thread, so the one opened here would not
+serve requests. Under ``gunicorn --preload`` it would also be inherited by
+the forked workers. Request threads open their own connections as usual.
+"""
+import importlib
+import importlib.util
+import inspect
+import logging
+import threading
+import time
+
+from django.apps import apps
+from django.db import connection
+from django.urls import URLPattern, URLResolver, get_resolver
+from rest_framework import serializers
+
+logger = logging.getLogger(__name__)
+
+# Modules imported to find serializer classes, in every installed app
+SERIALIZER_MODULES = ('serializers',)
+
+_state = {'ready': False, 'duration': None, 'counts': None}
+_lock = threading.Lock()
+
+
+def _walk(resolver):
+    """Populate the lookup tables of ``resolver`` and its includes; returns the number of patterns"""
+    # reverse_dict builds the resolver's reverse, namespace and app lookups
+    resolver.reverse_dict
+    count = 0
+    for pattern in resolver.url_patterns:
+        if isinstance(pattern, URLResolver):
+            count += _walk(pattern)
+        elif isinstance(pattern, URLPattern):
+            pattern.lookup_str
+            count += 1
+    return count
+
+
+def resolve_urls():
+    return _walk(get_resolver())
+
+
+def _subclasses(cls):
+    for subclass in cls.__subclasses__():
+        yield subclass
+        yield from _subclasses(subclass)
+
+
+def build_serializers():
+    """Instantiate every serializer class of the installed apps and build its fields"""
+    for app_config in apps.get_app_configs():
+        for module in SERIALIZER_MODULES:
+            name = f'{app_config.name}.{module}'
+            if importlib.util.find_spec(name) is not None:
+                importlib.import_module(name)
+
+    built = 0
+    for serializer_class in set(_subclasses(serializers.Serializer)):
+        if inspect.isabstract(serializer_class) or serializer_class.__module__.startswith('rest_framework'):
+            continue
+        try:
+            serializer_class().fields
+        except Exception:
+            # e.g. a serializer that needs a context or an instance to build its fields
+            logger.debug('Skipped warming up %s', serializer_class.__qualname__, exc_info=True)
+            continue
+        built += 1
+    return built
+
+
+def prime_caches():
+    from settings_app.models import SystemSettings
+    from .bootstrap import get_bootstrap
+
+    SystemSettings.get_settings()
+    get_bootstrap()
+
+
+def warm_up():
+    """Run every warm-up step and mark the process ready; returns the time taken in seconds"""
+    with _lock:
+        if _state['ready']:
+            return _state['duration']
+        return _warm_up()
+
+
+def _warm_up():
+    start = time.perf_counter()
+    counts = {'url_patterns': resolve_urls(), 'serializers': build_serializers()}
+    try:
+        connection.ensure_connection()
+        prime_caches()
+    finally:
+        # Only the check is useful; see the module docstring
+        if not connection.in_atomic_block:
+            connection.close()
+    duration = time.perf_counter() - start
+    _state.update(ready=True, duration=duration, counts=counts)
+    logger.info(
+        'Warm-up done in %.3fs (%d URL patterns, %d serializers)',
+        duration, counts['url_patterns'], counts['serializers'],
+    )
+    return duration
+
+
+def try_warm_up():
+    """``warm_up()`` that logs a failure instead of raising; True when the process is ready"""
+    try:
+        warm_up()
+    except Exception:
+        logger.exception('Warm-up failed, the worker is not ready')
+        return False
+    return True
+
+
+def is_ready():
+    return _state['ready']
+
+
+def status():
+    return dict(_state)
@@ -9,9 +9,21 @@ https://docs.djangoproject.com/en/5.0/howto/deployment/asgi/
 
 import os
 
+from django.conf import settings
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'dannys_wellness.settings')
 
 application = get_asgi_application()
 
+# Build the lazy caches before the first request; /readyz reports 503 until done
+if settings.WARMUP_ON_BOOT:
+    import threading
+
+    from core.warmup import try_warm_up
+
+    # Servers may import this module inside their event loop, where the ORM refuses to run
+    warmup_thread = threading.Thread(target=try_warm_up, name='warmup')
+    warmup_thread.start()
+    warmup_thread.join()
+
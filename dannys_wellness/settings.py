@@ -36,6 +36,10 @@ INSTALLED_APPS = [
     'rest_framework_simplejwt',
     'corsheaders',
     # Local apps
+    'core',
+    'jobs',
+    'documents',
+    'audit',
     'accounts',
     'patients',
     'settings_app',
@@ -45,6 +49,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.PerformanceMiddleware',
+    'core.replicas.ReplicaRoutingMiddleware',
+    'audit.recorder.AuditMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -86,6 +93,39 @@ DATABASES = {
     }
 }
 
+# Read replica for reports and statistics (see core/replicas.py). Locally a
+# second SQLite file, opened read-only and refreshed with
+# `python manage.py sync_replica`.
+REPLICA_DATABASE_NAME = config('REPLICA_DATABASE_NAME', default='')
+if REPLICA_DATABASE_NAME:
+    DATABASES['replica'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': f"file:{BASE_DIR / REPLICA_DATABASE_NAME}?mode=ro",
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['core.replicas.ReplicaRouter']
+
+# Seconds after a user's write during which their reads stay on the primary
+REPLICA_READ_YOUR_WRITES_WINDOW = config('REPLICA_READ_YOUR_WRITES_WINDOW', default=5, cast=int)
+# Fall back to the primary when the replica is further behind than this
+REPLICA_MAX_LAG = config('REPLICA_MAX_LAG', default=30, cast=int)
+REPLICA_LAG_CHECK_INTERVAL = config('REPLICA_LAG_CHECK_INTERVAL', default=5, cast=int)
+
+# Background jobs (see jobs/queue.py), run by `python manage.py run_worker`
+JOB_LEASE_SECONDS = config('JOB_LEASE_SECONDS', default=60, cast=int)
+JOB_POLL_INTERVAL = config('JOB_POLL_INTERVAL', default=2, cast=float)
+# First retry delay in seconds, doubled on each further attempt
+JOB_RETRY_BACKOFF = config('JOB_RETRY_BACKOFF', default=10, cast=int)
+# Job result files (reports with patient and staff data), kept out of
+# MEDIA_ROOT and only served by GET /api/jobs/<id>/result/
+JOB_RESULTS_DIR = config('JOB_RESULTS_DIR', default=str(BASE_DIR / 'job_results'))
+
+# Rendered lab reports and invoices (see documents/rendering.py). Kept out of
+# MEDIA_ROOT because they contain patient data.
+DOCUMENT_CACHE_DIR = config('DOCUMENT_CACHE_DIR', default=str(BASE_DIR / 'document_cache'))
+DOCUMENT_RENDER_WORKERS = config('DOCUMENT_RENDER_WORKERS', default=0, cast=int) or None
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
@@ -127,6 +167,61 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = 'media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Longest side of a processed profile picture, in pixels (see accounts/images.py)
+PROFILE_PICTURE_MAX_DIMENSION = config('PROFILE_PICTURE_MAX_DIMENSION', default=1024, cast=int)
+
+# A lab result outside its normal range is critical when it lies further out
+# than this many range widths (see lab_tests/ranges.py)
+LAB_CRITICAL_RANGE_FACTOR = config('LAB_CRITICAL_RANGE_FACTOR', default=1.0, cast=float)
+
+# Seconds a worker serves its cached /api/bootstrap/ payload before checking
+# whether the reference tables changed (see core/bootstrap.py)
+BOOTSTRAP_CHECK_INTERVAL = config('BOOTSTRAP_CHECK_INTERVAL', default=5, cast=int)
+
+# Idempotency-Key handling of the create endpoints (see core/idempotency.py):
+# how long a stored response is replayed, and how long a duplicate waits for
+# the first attempt still in flight before getting a 409
+IDEMPOTENCY_KEY_TTL_HOURS = config('IDEMPOTENCY_KEY_TTL_HOURS', default=24, cast=int)
+IDEMPOTENCY_WAIT_SECONDS = config('IDEMPOTENCY_WAIT_SECONDS', default=5, cast=float)
+
+# /api/batch/ limits: sub-requests per batch, and threads used when a batch
+# asks to run concurrently (see core/batch.py)
+BATCH_MAX_REQUESTS = config('BATCH_MAX_REQUESTS', default=20, cast=int)
+BATCH_MAX_WORKERS = config('BATCH_MAX_WORKERS', default=4, cast=int)
+
+# Cached stats and report responses (see core/response_cache.py): seconds an
+# entry is fresh, and seconds it may then be served stale while one request
+# recomputes it
+RESPONSE_CACHE_ENABLED = config('RESPONSE_CACHE_ENABLED', default=True, cast=bool)
+RESPONSE_CACHE_TIMEOUT = config('RESPONSE_CACHE_TIMEOUT', default=60, cast=int)
+RESPONSE_CACHE_STALE = config('RESPONSE_CACHE_STALE', default=300, cast=int)
+
+# Completed lab tests and paid invoices untouched for this many days are
+# moved to the archive tables by manage.py archive_records (see core/archive.py)
+ARCHIVE_AFTER_DAYS = config('ARCHIVE_AFTER_DAYS', default=365, cast=int)
+
+# Rows deleted or nulled per transaction when a deleted patient or staff
+# member is purged in the background (see core/purge.py)
+PURGE_BATCH_SIZE = config('PURGE_BATCH_SIZE', default=500, cast=int)
+
+# Lab test event stream (/api/lab-tests/events/, see lab_tests/events.py):
+# how often a stream checks the log for events from other workers, how long
+# one connection lasts before the client reconnects, and how long the log
+# keeps events for resuming (manage.py prune_lab_test_events)
+LAB_EVENTS_POLL_SECONDS = config('LAB_EVENTS_POLL_SECONDS', default=5, cast=int)
+LAB_EVENTS_STREAM_SECONDS = config('LAB_EVENTS_STREAM_SECONDS', default=300, cast=int)
+LAB_EVENTS_RETENTION_HOURS = config('LAB_EVENTS_RETENTION_HOURS', default=48, cast=int)
+
+# Delta sync (/api/sync/, see core/sync.py): how far behind now a sync stops,
+# leaving room for transactions still committing, and how long deletions are
+# kept; older sync tokens need a full download (manage.py prune_sync_tombstones)
+SYNC_LAG_SECONDS = config('SYNC_LAG_SECONDS', default=5, cast=int)
+SYNC_TOMBSTONE_RETENTION_DAYS = config('SYNC_TOMBSTONE_RETENTION_DAYS', default=30, cast=int)
+
+# Warm up each worker when wsgi.py/asgi.py is loaded (see core/warmup.py);
+# when off, the first /readyz probe runs the warm-up instead
+WARMUP_ON_BOOT = config('WARMUP_ON_BOOT', default=True, cast=bool)
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.0/ref/settings/#default-auto-field
 
@@ -145,6 +240,38 @@ REST_FRAMEWORK = {
     ),
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
+    'DEFAULT_THROTTLE_CLASSES': (
+        'core.throttling.AnonTokenBucketThrottle',
+        'core.throttling.UserTokenBucketThrottle',
+    ),
+    'DEFAULT_THROTTLE_RATES': {
+        'anon': config('THROTTLE_RATE_ANON', default='60/min'),
+        'user': config('THROTTLE_RATE_USER', default='600/min'),
+        'login': config('THROTTLE_RATE_LOGIN', default='10/min'),
+        'login_account': config('THROTTLE_RATE_LOGIN_ACCOUNT', default='20/hour'),
+        'expensive': config('THROTTLE_RATE_EXPENSIVE', default='30/min'),
+    },
+    # Reverse proxies in front of the app. Client IPs for throttling are read
+    # from X-Forwarded-For only this many hops back; 0 uses REMOTE_ADDR, so a
+    # client cannot pick its own throttle bucket by sending the header
+    'NUM_PROXIES': config('NUM_PROXIES', default=0, cast=int),
+}
+
+# Throttling (see core/throttling.py)
+THROTTLE_ENABLED = config('THROTTLE_ENABLED', default=True, cast=bool)
+# 'memory' keeps buckets per process, 'cache' shares them through CACHES
+THROTTLE_STORE = config('THROTTLE_STORE', default='memory')
+# Per-role overrides of DEFAULT_THROTTLE_RATES, by scope
+THROTTLE_ROLE_RATES = {
+    'user': {'admin': '1200/min'},
+    'expensive': {'admin': '120/min', 'doctor': '60/min'},
+}
+
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='dannys-wellness'),
+    }
 }
 
 # JWT Settings
@@ -164,6 +291,9 @@ SIMPLE_JWT = {
     'TOKEN_TYPE_CLAIM': 'token_type',
 }
 
+# Performance instrumentation (Server-Timing header and /metrics)
+PERFORMANCE_METRICS_ENABLED = config('PERFORMANCE_METRICS_ENABLED', default=True, cast=bool)
+
 # CORS Settings
 CORS_ALLOWED_ORIGINS = config(
     'CORS_ALLOWED_ORIGINS',
@@ -187,9 +317,22 @@ CORS_ALLOW_HEADERS = [
     'authorization',
     'content-type',
     'dnt',
+    'idempotency-key',
+    'if-none-match',
+    'last-event-id',
     'origin',
     'user-agent',
     'x-csrftoken',
     'x-requested-with',
 ]
 
+# Response headers browser clients need to read: ETag for If-None-Match
+# revalidation, Retry-After on 429/409, Idempotent-Replayed on replayed creates
+# and Content-Disposition on downloads
+CORS_EXPOSE_HEADERS = [
+    'content-disposition',
+    'etag',
+    'idempotent-replayed',
+    'retry-after',
+]
+
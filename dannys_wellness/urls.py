@@ -14,6 +14,10 @@ urlpatterns = [
     path('api/reports/', include('reports.urls')),
     path('api/billing/', include('billing.urls')),
     path('api/lab-tests/', include('lab_tests.urls')),
+    path('api/jobs/', include('jobs.urls')),
+    path('api/documents/', include('documents.urls')),
+    path('api/audit/', include('audit.urls')),
+    path('', include('core.urls')),
 ]
 
 if settings.DEBUG:
@@ -9,9 +9,15 @@ https://docs.djangoproject.com/en/5.0/howto/deployment/wsgi/
 
 import os
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'dannys_wellness.settings')
 
 application = get_wsgi_application()
 
+# Build the lazy caches before the first request; /readyz reports 503 until done
+if settings.WARMUP_ON_BOOT:
+    from core.warmup import try_warm_up
+    try_warm_up()
+
@@ -0,0 +1,63 @@
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from documents.rendering import FORMATS, KINDS, PDFRenderingUnavailable, render_batch
+from documents.selection import ids_for_date
+
+
+class Command(BaseCommand):
+    help = (
+        'Render lab reports or invoices into the document cache on a process pool, '
+        "e.g. all of today's completed lab tests"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--kind', choices=KINDS, default='lab_report')
+        parser.add_argument('--output', choices=FORMATS, default='html')
+        parser.add_argument('--date', help='YYYY-MM-DD (default: today)')
+        parser.add_argument('--ids', help='Comma-separated ids instead of --date')
+        parser.add_argument('--workers', type=int, help='Render processes (default: DOCUMENT_RENDER_WORKERS or CPU count)')
+        parser.add_argument('--prune-days', type=int, help='Instead of rendering, delete cached documents unused for this many days')
+
+    def handle(self, *args, **options):
+        if options['prune_days'] is not None:
+            return self.prune(options['prune_days'])
+
+        if options['ids']:
+            try:
+                ids = [int(value) for value in options['ids'].split(',') if value.strip()]
+            except ValueError:
+                raise CommandError('--ids must be comma-separated integers')
+        else:
+            try:
+                ids = ids_for_date(options['kind'], options['date'])
+            except ValueError:
+                raise CommandError('--date must use the YYYY-MM-DD format')
+
+        started = time.perf_counter()
+        try:
+            rendered = render_batch(options['kind'], ids, options['output'], workers=options['workers'])
+        except PDFRenderingUnavailable as exc:
+            raise CommandError(str(exc))
+        elapsed = time.perf_counter() - started
+
+        misses = sum(1 for doc in rendered.values() if not doc['cached'])
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(rendered)} {options['kind']} documents ({options['output']}): "
+            f'{misses} rendered, {len(rendered) - misses} from cache in {elapsed:.2f}s'
+        ))
+
+    def prune(self, days):
+        cutoff = time.time() - days * 86400
+        removed = 0
+        for root, _, files in os.walk(settings.DOCUMENT_CACHE_DIR):
+            for name in files:
+                path = os.path.join(root, name)
+                # Cache hits refresh the modification time (see render_document)
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+                    removed += 1
+        self.stdout.write(self.style.SUCCESS(f'Removed {removed} cached documents'))
@@ -0,0 +1,297 @@
+"""
+Printable lab reports and invoices.
+
+A document is rendered from a plain dict of source rows (``values()``
+queries, see ``lab_report_sources``/``invoice_sources``) plus the clinic
+header from ``SystemSettings``. The SHA-256 of that dict, the output format
+and the template sources names the cached file under ``DOCUMENT_CACHE_DIR``.
+An unchanged test or invoice is served from disk, and any edit to it, its
+results, items, payments or the clinic settings yields a new hash and a
+fresh render. Tests and invoices missing from the hot tables are read from
+the archive (core/archive.py), at the cost of one more query per table.
+
+Batches gather their rows in a few queries in the calling process and hand
+only the cache misses to a process pool. The pool renders the templates and
+the PDFs, the CPU-heavy part. PDF output needs WeasyPrint; HTML is always
+available.
+"""
+import hashlib
+import json
+import multiprocessing
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.template.loader import get_template, render_to_string
+
+from billing.models import ArchivedInvoice, ArchivedInvoiceItem, ArchivedPayment, Invoice, InvoiceItem, Payment
+from core.rows import age_from_birth_date, choice_display
+from lab_tests.models import ArchivedLabTest, ArchivedLabTestResult, LabTest, LabTestResult
+from patients.models import Patient
+from settings_app.models import SystemSettings
+
+LAB_REPORT = 'lab_report'
+INVOICE = 'invoice'
+KINDS = (LAB_REPORT, INVOICE)
+FORMATS = ('html', 'pdf')
+
+TEMPLATES = {
+    LAB_REPORT: 'documents/lab_report.html',
+    INVOICE: 'documents/invoice.html',
+}
+CONTENT_TYPES = {
+    'html': 'text/html; charset=utf-8',
+    'pdf': 'application/pdf',
+}
+
+CLINIC_FIELDS = (
+    'clinic_name', 'clinic_address', 'clinic_city', 'clinic_state', 'clinic_zip_code',
+    'clinic_country', 'clinic_phone', 'clinic_email', 'clinic_website',
+)
+PATIENT_FIELDS = ('first_name', 'last_name', 'date_of_birth', 'gender', 'phone_number', 'email')
+
+
+class PDFRenderingUnavailable(Exception):
+    """WeasyPrint is not installed"""
+
+
+def _user_name(row, prefix):
+    if not row.get(f'{prefix}_id'):
+        return None
+    full_name = f"{row[f'{prefix}__first_name']} {row[f'{prefix}__last_name']}".strip()
+    return full_name or row[f'{prefix}__username']
+
+
+def _user_lookups(prefix):
+    return (f'{prefix}_id', f'{prefix}__first_name', f'{prefix}__last_name', f'{prefix}__username')
+
+
+def _patient(row):
+    patient = {field: row[f'patient__{field}'] for field in PATIENT_FIELDS}
+    patient['id'] = row['patient_id']
+    patient['full_name'] = f"{patient['first_name']} {patient['last_name']}".strip()
+    patient['age'] = age_from_birth_date(patient['date_of_birth'])
+    patient['gender'] = choice_display(Patient.GENDER_CHOICES)(patient['gender'])
+    return patient
+
+
+def clinic_header():
+    clinic = SystemSettings.get_settings()
+    return {field: getattr(clinic, field) for field in CLINIC_FIELDS}
+
+
+def lab_report_sources(ids, clinic=None):
+    """``{test id: template context}`` for the given lab tests, in two queries"""
+    clinic = clinic or clinic_header()
+    sources = _lab_report_sources(LabTest, LabTestResult, ids, clinic)
+    missing = [pk for pk in ids if pk not in sources]
+    if missing:
+        sources.update(_lab_report_sources(ArchivedLabTest, ArchivedLabTestResult, missing, clinic))
+    return sources
+
+
+def _lab_report_sources(test_model, result_model, ids, clinic):
+    status_display = choice_display(LabTest.STATUS_CHOICES)
+    priority_display = choice_display(LabTest.PRIORITY_CHOICES)
+
+    tests = test_model.objects.filter(pk__in=ids).values(
+        'id', 'test_name', 'test_code', 'status', 'priority', 'description', 'ordered_date',
+        'scheduled_date', 'completed_date', 'results', 'normal_range', 'notes', 'updated_at',
+        'category__name', 'patient_id', *(f'patient__{field}' for field in PATIENT_FIELDS),
+        *_user_lookups('ordered_by'), *_user_lookups('performed_by'),
+    )
+    sources = {}
+    for row in tests:
+        sources[row['id']] = {
+            'clinic': clinic,
+            'patient': _patient(row),
+            'test': {
+                'id': row['id'],
+                'test_name': row['test_name'],
+                'test_code': row['test_code'],
+                'category': row['category__name'],
+                'status': status_display(row['status']),
+                'priority': priority_display(row['priority']),
+                'description': row['description'],
+                'ordered_date': row['ordered_date'],
+                'scheduled_date': row['scheduled_date'],
+                'completed_date': row['completed_date'],
+                'results': row['results'],
+                'normal_range': row['normal_range'],
+                'notes': row['notes'],
+                'updated_at': row['updated_at'],
+                'ordered_by': _user_name(row, 'ordered_by'),
+                'performed_by': _user_name(row, 'performed_by'),
+            },
+            'results': [],
+        }
+
+    results = result_model.objects.filter(test_id__in=list(sources)).order_by('test_id', 'parameter_name', 'id').values(
+        'id', 'test_id', 'parameter_name', 'value', 'unit', 'normal_range', 'is_abnormal', 'notes',
+    )
+    for row in results:
+        sources[row.pop('test_id')]['results'].append(row)
+    return sources
+
+
+def invoice_sources(ids, clinic=None):
+    """``{invoice id: template context}`` for the given invoices, in three queries"""
+    clinic = clinic or clinic_header()
+    sources = _invoice_sources(Invoice, InvoiceItem, Payment, ids, clinic)
+    missing = [pk for pk in ids if pk not in sources]
+    if missing:
+        sources.update(_invoice_sources(ArchivedInvoice, ArchivedInvoiceItem, ArchivedPayment, missing, clinic))
+    return sources
+
+
+def _invoice_sources(invoice_model, item_model, payment_model, ids, clinic):
+    status_display = choice_display(Invoice.STATUS_CHOICES)
+    method_display = choice_display(Payment.PAYMENT_METHOD_CHOICES)
+
+    invoices = invoice_model.objects.filter(pk__in=ids).values(
+        'id', 'invoice_number', 'status', 'invoice_date', 'due_date', 'subtotal', 'tax_rate',
+        'tax_amount', 'discount', 'total_amount', 'paid_amount', 'balance', 'notes', 'updated_at',
+        'patient_id', *(f'patient__{field}' for field in PATIENT_FIELDS),
+    )
+    sources = {}
+    for row in invoices:
+        invoice = {key: value for key, value in row.items() if not key.startswith('patient')}
+        invoice['status'] = status_display(row['status'])
+        sources[row['id']] = {'clinic': clinic, 'patient': _patient(row), 'invoice': invoice, 'items': [], 'payments': []}
+
+    items = item_model.objects.filter(invoice_id__in=list(sources)).order_by('invoice_id', 'id').values(
+        'id', 'invoice_id', 'service__name', 'description', 'quantity', 'unit_price', 'total',
+    )
+    for row in items:
+        sources[row.pop('invoice_id')]['items'].append(row)
+
+    payments = payment_model.objects.filter(invoice_id__in=list(sources)).order_by('invoice_id', 'payment_date', 'id').values(
+        'id', 'invoice_id', 'amount', 'payment_method', 'payment_date', 'reference_number',
+    )
+    for row in payments:
+        row['payment_method'] = method_display(row['payment_method'])
+        sources[row.pop('invoice_id')]['payments'].append(row)
+    return sources
+
+
+SOURCES = {
+    LAB_REPORT: lab_report_sources,
+    INVOICE: invoice_sources,
+}
+
+
+@lru_cache(maxsize=None)
+def template_fingerprint(kind):
+    """Hash of the template and the base it extends, so editing them invalidates the cache"""
+    digest = hashlib.sha256()
+    for name in ('documents/base.html', TEMPLATES[kind]):
+        digest.update(get_template(name).template.source.encode('utf-8'))
+    return digest.hexdigest()
+
+
+def content_hash(kind, fmt, context):
+    payload = json.dumps(context, cls=DjangoJSONEncoder, sort_keys=True)
+    digest = hashlib.sha256(f'{kind}:{fmt}:{template_fingerprint(kind)}:'.encode('utf-8'))
+    digest.update(payload.encode('utf-8'))
+    return digest.hexdigest()
+
+
+def cache_path(kind, fmt, digest):
+    return os.path.join(settings.DOCUMENT_CACHE_DIR, kind, digest[:2], f'{digest}.{fmt}')
+
+
+def check_format(fmt):
+    """Raise PDFRenderingUnavailable before any work if ``fmt`` cannot be produced"""
+    if fmt == 'pdf':
+        try:
+            import weasyprint  # noqa: F401
+        except ImportError:
+            raise PDFRenderingUnavailable('PDF output requires WeasyPrint (pip install weasyprint)')
+
+
+def html_to_pdf(html):
+    from weasyprint import HTML
+    return HTML(string=html).write_pdf()
+
+
+def render_to_file(kind, fmt, context, path):
+    """Render one document and write it atomically to ``path``"""
+    html = render_to_string(TEMPLATES[kind], context)
+    content = html_to_pdf(html) if fmt == 'pdf' else html.encode('utf-8')
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    with os.fdopen(fd, 'wb') as fh:
+        fh.write(content)
+    os.replace(temp_path, path)
+    return path
+
+
+def _render_task(args):
+    return render_to_file(*args)
+
+
+def _init_pool_worker():
+    import django
+    django.setup()
+
+
+def render_document(kind, object_id, fmt='html'):
+    """
+    ``(path, digest)`` of the rendered document, from the cache when the
+    source rows are unchanged; None if the object does not exist
+    """
+    check_format(fmt)
+    context = SOURCES[kind]([object_id]).get(object_id)
+    if context is None:
+        return None
+    digest = content_hash(kind, fmt, context)
+    path = cache_path(kind, fmt, digest)
+    if os.path.exists(path):
+        # Mark as recently used for render_documents --prune-days
+        os.utime(path)
+    else:
+        render_to_file(kind, fmt, context, path)
+    return path, digest
+
+
+def document_digest(kind, object_id, fmt='html'):
+    """The content hash alone, for answering conditional requests without rendering"""
+    context = SOURCES[kind]([object_id]).get(object_id)
+    return content_hash(kind, fmt, context) if context is not None else None
+
+
+def render_batch(kind, ids, fmt='html', workers=None, chunk_size=500):
+    """
+    Render many documents, reusing cached ones and spreading the misses over
+    ``workers`` processes. Returns ``{id: {'digest', 'path', 'cached'}}``.
+    """
+    check_format(fmt)
+    workers = workers or getattr(settings, 'DOCUMENT_RENDER_WORKERS', None) or os.cpu_count() or 1
+    clinic = clinic_header()
+    ids = list(ids)
+    rendered = {}
+    misses = []
+    for start in range(0, len(ids), chunk_size):
+        sources = SOURCES[kind](ids[start:start + chunk_size], clinic=clinic)
+        for object_id, context in sources.items():
+            digest = content_hash(kind, fmt, context)
+            path = cache_path(kind, fmt, digest)
+            cached = os.path.exists(path)
+            rendered[object_id] = {'digest': digest, 'path': path, 'cached': cached}
+            if not cached:
+                misses.append((kind, fmt, context, path))
+
+    if len(misses) < 2 or workers == 1:
+        for task in misses:
+            _render_task(task)
+    else:
+        # spawn rather than fork: callers such as the job worker run threads
+        pool_context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=min(workers, len(misses)), mp_context=pool_context,
+                                 initializer=_init_pool_worker) as pool:
+            list(pool.map(_render_task, misses, chunksize=max(1, len(misses) // (workers * 4))))
+    return rendered
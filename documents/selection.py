@@ -0,0 +1,17 @@
+from datetime import datetime
+
+from django.utils import timezone
+
+from billing.models import Invoice
+from lab_tests.models import LabTest
+from .rendering import LAB_REPORT
+
+
+def ids_for_date(kind, date=None):
+    """Lab tests completed on ``date`` or invoices dated ``date`` (default today)"""
+    day = datetime.strptime(date, '%Y-%m-%d').date() if date else timezone.localdate()
+    if kind == LAB_REPORT:
+        queryset = LabTest.objects.filter(status='completed', completed_date__date=day)
+    else:
+        queryset = Invoice.objects.filter(invoice_date=day)
+    return list(queryset.order_by('id').values_list('id', flat=True))
@@ -0,0 +1,23 @@
+from django.urls import reverse
+
+from jobs.registry import register
+from .rendering import INVOICE, render_batch
+from .selection import ids_for_date
+
+
+@register('documents.batch', submittable=True, admin_only=False)
+def document_batch_job(params, job):
+    kind, fmt = params['kind'], params.get('output', 'html')
+    ids = params.get('ids') or ids_for_date(kind, params.get('date'))
+    rendered = render_batch(kind, ids, fmt)
+    url_name = 'documents:invoice' if kind == INVOICE else 'documents:lab_report'
+    return {
+        'kind': kind,
+        'output': fmt,
+        'total': len(rendered),
+        'rendered': sum(1 for doc in rendered.values() if not doc['cached']),
+        'documents': [
+            {'id': object_id, 'url': f"{reverse(url_name, kwargs={'pk': object_id})}?output={fmt}"}
+            for object_id in sorted(rendered)
+        ],
+    }
@@ -0,0 +1,10 @@
+from django.urls import path
+from . import views
+
+app_name = 'documents'
+
+urlpatterns = [
+    path('lab-tests/<int:pk>/', views.lab_report_document_view, name='lab_report'),
+    path('invoices/<int:pk>/', views.invoice_document_view, name='invoice'),
+    path('batch/', views.document_batch_view, name='batch'),
+]
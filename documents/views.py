@@ -0,0 +1,119 @@
+from datetime import datetime
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from django.http import FileResponse, HttpResponseNotModified
+from jobs.views import submit_job
+from .rendering import (
+    CONTENT_TYPES, FORMATS, INVOICE, KINDS, LAB_REPORT, PDFRenderingUnavailable,
+    document_digest, render_document,
+)
+
+NOT_FOUND_MESSAGES = {
+    LAB_REPORT: 'Lab test not found',
+    INVOICE: 'Invoice not found',
+}
+
+
+def _document_response(request, kind, pk):
+    fmt = request.query_params.get('output', 'html')
+    if fmt not in FORMATS:
+        return Response({
+            'success': False,
+            'message': f"output must be one of: {', '.join(FORMATS)}"
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        # A client holding the current version gets a 304 without a render
+        if_none_match = request.headers.get('If-None-Match')
+        if if_none_match:
+            digest = document_digest(kind, pk, fmt)
+            if digest is not None and if_none_match.strip('"') == digest:
+                response = HttpResponseNotModified()
+                response['ETag'] = f'"{digest}"'
+                return response
+
+        document = render_document(kind, pk, fmt)
+    except PDFRenderingUnavailable as exc:
+        return Response({
+            'success': False,
+            'message': str(exc)
+        }, status=status.HTTP_501_NOT_IMPLEMENTED)
+
+    if document is None:
+        return Response({
+            'success': False,
+            'message': NOT_FOUND_MESSAGES[kind]
+        }, status=status.HTTP_404_NOT_FOUND)
+
+    path, digest = document
+    response = FileResponse(open(path, 'rb'), content_type=CONTENT_TYPES[fmt])
+    response['ETag'] = f'"{digest}"'
+    response['Cache-Control'] = 'private, no-cache'
+    if fmt == 'pdf':
+        response['Content-Disposition'] = f'inline; filename="{kind}-{pk}.pdf"'
+    return response
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def lab_report_document_view(request, pk):
+    """
+    Printable lab report for a lab test and its results
+    GET /api/documents/lab-tests/<id>/
+    Query Params:
+        output (str): html (default) or pdf
+    """
+    return _document_response(request, LAB_REPORT, pk)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def invoice_document_view(request, pk):
+    """
+    Printable invoice with its items and payments
+    GET /api/documents/invoices/<id>/
+    Query Params:
+        output (str): html (default) or pdf
+    """
+    return _document_response(request, INVOICE, pk)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def document_batch_view(request):
+    """
+    Render many documents in the background
+    POST /api/documents/batch/
+    Body: {"kind": "lab_report" | "invoice", "date": "YYYY-MM-DD", "output": "html" | "pdf"}
+        or {"kind": ..., "ids": [1, 2, 3]}
+    Without ids, renders the day's completed lab tests or the day's invoices.
+    """
+    kind = request.data.get('kind')
+    fmt = request.data.get('output', 'html')
+    ids = request.data.get('ids')
+    date = request.data.get('date')
+
+    if kind not in KINDS or fmt not in FORMATS:
+        return Response({
+            'success': False,
+            'message': f"kind must be one of: {', '.join(KINDS)}; output one of: {', '.join(FORMATS)}"
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    if ids is not None:
+        if not isinstance(ids, list) or not all(isinstance(i, int) for i in ids):
+            return Response({
+                'success': False,
+                'message': 'ids must be a list of integers'
+            }, status=status.HTTP_400_BAD_REQUEST)
+    elif date:
+        try:
+            datetime.strptime(date, '%Y-%m-%d')
+        except ValueError:
+            return Response({
+                'success': False,
+                'message': 'Dates must use the YYYY-MM-DD format'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+    return submit_job(request, 'documents.batch', {'kind': kind, 'output': fmt, 'ids': ids, 'date': date})
@@ -0,0 +1,95 @@
+import signal
+import threading
+import time
+import traceback
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+
+from jobs.queue import claim_next, default_worker_id, renew_lease, run_job
+
+
+class LeaseKeeper(threading.Thread):
+    """Extends a running job's lease every third of the lease period"""
+
+    def __init__(self, job, worker_id, lease_seconds):
+        super().__init__(daemon=True)
+        self.job = job
+        self.worker_id = worker_id
+        self.lease_seconds = lease_seconds
+        self.stopped = threading.Event()
+
+    def run(self):
+        try:
+            while not self.stopped.wait(self.lease_seconds / 3):
+                if not renew_lease(self.job, self.worker_id, self.lease_seconds):
+                    break
+        finally:
+            connection.close()
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+class Command(BaseCommand):
+    help = (
+        'Run background jobs from the jobs table. Start as many worker '
+        'processes as needed; they coordinate through row claims and leases.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Exit once no job is runnable')
+        parser.add_argument('--kind', action='append', dest='kinds', help='Only run jobs of this kind (repeatable)')
+        parser.add_argument(
+            '--poll-interval', type=float, default=getattr(settings, 'JOB_POLL_INTERVAL', 2),
+            help='Seconds to sleep when idle',
+        )
+        parser.add_argument(
+            '--lease', type=int, default=getattr(settings, 'JOB_LEASE_SECONDS', 60),
+            help='Seconds a claimed job stays reserved without a renewal',
+        )
+
+    def handle(self, *args, **options):
+        worker_id = default_worker_id()
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self.request_stop)
+        signal.signal(signal.SIGINT, self.request_stop)
+        self.stdout.write(f'Worker {worker_id} started')
+
+        while not self.stopping:
+            close_old_connections()
+            job = claim_next(worker_id, options['lease'], options['kinds'])
+            if job is None:
+                if options['once']:
+                    break
+                time.sleep(options['poll_interval'])
+                continue
+            self.run_one(job, worker_id, options['lease'])
+
+        self.stdout.write(f'Worker {worker_id} stopped')
+
+    def run_one(self, job, worker_id, lease_seconds):
+        self.stdout.write(f'{job.kind} #{job.pk} attempt {job.attempts}/{job.max_attempts}')
+        keeper = LeaseKeeper(job, worker_id, lease_seconds)
+        keeper.start()
+        started = time.perf_counter()
+        try:
+            succeeded = run_job(job, worker_id)
+        except Exception:
+            # Bookkeeping failed (e.g. the database went away); the lease expires and the job is retried
+            succeeded = False
+            self.stderr.write(traceback.format_exc())
+        finally:
+            keeper.stop()
+        elapsed = time.perf_counter() - started
+        if succeeded:
+            self.stdout.write(self.style.SUCCESS(f'{job.kind} #{job.pk} succeeded in {elapsed:.2f}s'))
+        else:
+            job.refresh_from_db(fields=['status', 'error'])
+            self.stdout.write(self.style.ERROR(f'{job.kind} #{job.pk} {job.status}: {job.error}'))
+
+    def request_stop(self, signum, frame):
+        # Finish the current job, then exit
+        self.stopping = True
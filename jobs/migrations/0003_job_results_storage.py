@@ -0,0 +1,36 @@
+# Generated by Django 5.0.3 on 2026-10-19 02:13
+
+import os
+import shutil
+
+import jobs.models
+from django.conf import settings
+from django.db import migrations, models
+
+
+def move_result_files(apps, schema_editor):
+    """Move result files written under MEDIA_ROOT into JOB_RESULTS_DIR, where they are no longer served"""
+    Job = apps.get_model('jobs', 'Job')
+    for name in Job.objects.exclude(result_file='').exclude(result_file=None).values_list('result_file', flat=True):
+        source = os.path.join(settings.MEDIA_ROOT, name)
+        if not os.path.exists(source):
+            continue
+        target = os.path.join(settings.JOB_RESULTS_DIR, name)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.move(source, target)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0002_job_progress'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='job',
+            name='result_file',
+            field=models.FileField(blank=True, null=True, storage=jobs.models.job_result_storage, upload_to='jobs/'),
+        ),
+        migrations.RunPython(move_result_files, migrations.RunPython.noop),
+    ]
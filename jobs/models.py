@@ -0,0 +1,65 @@
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.db import models
+from django.contrib.auth import get_user_model
+
+User = get_user_model()
+
+
+def job_result_storage():
+    """Result files live under JOB_RESULTS_DIR, outside MEDIA_ROOT, and are only served by the result endpoint"""
+    return FileSystemStorage(location=settings.JOB_RESULTS_DIR, base_url=None)
+
+
+class Job(models.Model):
+    """
+    Background job, run by ``manage.py run_worker`` processes that claim
+    rows from this table
+    """
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+    ]
+
+    kind = models.CharField(max_length=100)
+    params = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    priority = models.IntegerField(default=0)
+
+    # Scheduling and claiming
+    run_after = models.DateTimeField()
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    worker_id = models.CharField(max_length=100, blank=True, null=True)
+    lease_expires_at = models.DateTimeField(blank=True, null=True)
+
+    # Outcome
+    # Handler-reported progress, e.g. {"processed": 500, "total": 1200}
+    progress = models.JSONField(default=dict, blank=True)
+    result_file = models.FileField(upload_to='jobs/', storage=job_result_storage, blank=True, null=True)
+    error = models.TextField(blank=True, null=True)
+
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='jobs')
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'jobs'
+        verbose_name = 'Job'
+        verbose_name_plural = 'Jobs'
+        ordering = ['-created_at']
+        indexes = [
+            # Claim query: runnable rows by status and due time
+            models.Index(fields=['status', 'run_after'], name='jobs_status_run_after_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} #{self.pk} ({self.status})"
+
+    @property
+    def is_finished(self):
+        return self.status in ('succeeded', 'failed')
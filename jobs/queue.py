@@ -0,0 +1,165 @@
+"""
+Queue operations on the ``jobs`` table.
+
+Claiming is a conditional ``UPDATE`` (queued and due, or running with an
+expired lease) so any number of worker processes can poll the same table
+without a broker and without two of them taking the same row. A worker
+holds a job for ``lease_seconds`` and keeps extending the lease while the
+handler runs; if the worker dies, the lease runs out and another worker
+reclaims the job as a new attempt. A job whose worker died on its last
+attempt (killed, out of memory) is failed instead of being reclaimed
+again, since it never reaches ``mark_failed``.
+"""
+import json
+import os
+import secrets
+import socket
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F, Q
+from django.utils import timezone
+
+from audit.recorder import batch as audit_batch
+
+from .models import Job
+from .registry import get_job_type
+
+CLAIM_BATCH = 10
+LEASE_EXPIRED_ERROR = 'Worker stopped without finishing the job (lease expired) on its last attempt'
+
+
+def default_worker_id():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def enqueue(kind, params=None, user=None, priority=0, run_after=None):
+    """Queue a job of a registered ``kind`` and return the row"""
+    job_type = get_job_type(kind)
+    if job_type is None:
+        raise ValueError(f'Unknown job kind "{kind}"')
+    return Job.objects.create(
+        kind=kind,
+        params=params or {},
+        priority=priority,
+        run_after=run_after or timezone.now(),
+        max_attempts=job_type.max_attempts,
+        created_by=user,
+    )
+
+
+def _claimable(now):
+    return Q(status='queued', run_after__lte=now) | Q(
+        status='running', lease_expires_at__lt=now, attempts__lt=F('max_attempts')
+    )
+
+
+def fail_exhausted(now=None):
+    """Fail running jobs whose lease expired on their last attempt; returns how many"""
+    now = now or timezone.now()
+    return Job.objects.filter(
+        status='running', lease_expires_at__lt=now, attempts__gte=F('max_attempts')
+    ).update(
+        status='failed',
+        error=LEASE_EXPIRED_ERROR,
+        lease_expires_at=None,
+        finished_at=now,
+        updated_at=now,
+    )
+
+
+def claim_next(worker_id, lease_seconds, kinds=None):
+    """Claim the most urgent runnable job for ``worker_id``, None when idle"""
+    now = timezone.now()
+    fail_exhausted(now)
+    candidates = Job.objects.filter(_claimable(now))
+    if kinds:
+        candidates = candidates.filter(kind__in=kinds)
+    candidate_ids = list(
+        candidates.order_by('-priority', 'run_after', 'id').values_list('id', flat=True)[:CLAIM_BATCH]
+    )
+    for job_id in candidate_ids:
+        claimed = Job.objects.filter(_claimable(now), pk=job_id).update(
+            status='running',
+            worker_id=worker_id,
+            lease_expires_at=now + timedelta(seconds=lease_seconds),
+            attempts=F('attempts') + 1,
+            started_at=now,
+            updated_at=now,
+        )
+        if claimed:
+            return Job.objects.get(pk=job_id)
+    return None
+
+
+def renew_lease(job, worker_id, lease_seconds):
+    """Extend the lease; False if another worker has taken the job over"""
+    now = timezone.now()
+    return bool(Job.objects.filter(pk=job.pk, status='running', worker_id=worker_id).update(
+        lease_expires_at=now + timedelta(seconds=lease_seconds),
+        updated_at=now,
+    ))
+
+
+def report_progress(job, **progress):
+    """Record a running job's progress, returned with its status"""
+    job.progress = progress
+    Job.objects.filter(pk=job.pk).update(progress=progress, updated_at=timezone.now())
+
+
+def store_result(job, result):
+    """Write ``result`` as JSON under JOB_RESULTS_DIR/jobs/ and return the stored name"""
+    content = json.dumps(result, cls=DjangoJSONEncoder)
+    # A random name, so result files cannot be found by counting job ids
+    job.result_file.save(f'{secrets.token_urlsafe(24)}.json', ContentFile(content.encode('utf-8')), save=False)
+    return job.result_file.name
+
+
+def mark_succeeded(job, worker_id):
+    now = timezone.now()
+    return bool(Job.objects.filter(pk=job.pk, status='running', worker_id=worker_id).update(
+        status='succeeded',
+        result_file=job.result_file.name or None,
+        error=None,
+        lease_expires_at=None,
+        finished_at=now,
+        updated_at=now,
+    ))
+
+
+def mark_failed(job, worker_id, error):
+    """Queue the job again with exponential backoff, or fail it for good"""
+    now = timezone.now()
+    retry = job.attempts < job.max_attempts
+    backoff = getattr(settings, 'JOB_RETRY_BACKOFF', 10) * 2 ** (job.attempts - 1)
+    return bool(Job.objects.filter(pk=job.pk, status='running', worker_id=worker_id).update(
+        status='queued' if retry else 'failed',
+        run_after=now + timedelta(seconds=backoff) if retry else job.run_after,
+        error=error,
+        worker_id=None if retry else worker_id,
+        lease_expires_at=None,
+        finished_at=None if retry else now,
+        updated_at=now,
+    ))
+
+
+def run_job(job, worker_id):
+    """Run a claimed job's handler and record the outcome; True on success"""
+    job_type = get_job_type(job.kind)
+    if job_type is None:
+        job.attempts = job.max_attempts
+        mark_failed(job, worker_id, f'Unknown job kind "{job.kind}"')
+        return False
+
+    try:
+        # Audit entries for the job's writes go out in one insert at the end
+        with audit_batch():
+            result = job_type.handler(job.params, job)
+        if result is not None:
+            store_result(job, result)
+    except Exception as exc:
+        mark_failed(job, worker_id, f'{type(exc).__name__}: {exc}')
+        return False
+    return mark_succeeded(job, worker_id)
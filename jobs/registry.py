@@ -0,0 +1,41 @@
+"""
+Job handlers by kind. Apps register them in their ``tasks.py``::
+
+    @register('reports.staff', submittable=True)
+    def staff_report(params, job):
+        return build_staff_report()
+
+A handler receives the job's ``params`` dict and the ``Job`` row. Whatever
+JSON-serializable value it returns is stored as the job's result file; a
+handler that returns None produces no file. Raising retries the job until
+``max_attempts`` is used up.
+"""
+
+
+class JobType:
+    """A registered handler; ``submittable`` ones can be queued through POST /api/jobs/"""
+
+    def __init__(self, kind, handler, submittable=False, admin_only=True, max_attempts=3):
+        self.kind = kind
+        self.handler = handler
+        self.submittable = submittable
+        self.admin_only = admin_only
+        self.max_attempts = max_attempts
+
+
+_registry = {}
+
+
+def register(kind, submittable=False, admin_only=True, max_attempts=3):
+    def decorator(handler):
+        _registry[kind] = JobType(kind, handler, submittable, admin_only, max_attempts)
+        return handler
+    return decorator
+
+
+def get_job_type(kind):
+    return _registry.get(kind)
+
+
+def job_types():
+    return dict(_registry)
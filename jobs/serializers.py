@@ -0,0 +1,32 @@
+from rest_framework import serializers
+from django.urls import reverse
+from .models import Job
+from core.metrics import TimedSerializerMixin
+
+
+class JobSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    """Serializer for Job model"""
+    status_url = serializers.SerializerMethodField()
+    result_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Job
+        fields = (
+            'id', 'kind', 'params', 'status', 'progress', 'attempts', 'max_attempts', 'error',
+            'status_url', 'result_url', 'created_at', 'started_at', 'finished_at'
+        )
+        read_only_fields = fields
+
+    def get_status_url(self, obj):
+        return reverse('jobs:job_detail', kwargs={'pk': obj.pk})
+
+    def get_result_url(self, obj):
+        if obj.status != 'succeeded' or not obj.result_file:
+            return None
+        return reverse('jobs:job_result', kwargs={'pk': obj.pk})
+
+
+class JobCreateSerializer(TimedSerializerMixin, serializers.Serializer):
+    """Serializer for submitting a job"""
+    kind = serializers.CharField(max_length=100)
+    params = serializers.DictField(required=False, default=dict)
@@ -0,0 +1,106 @@
+import json
+import os
+import tempfile
+from datetime import timedelta
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.storage import FileSystemStorage
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .models import Job, job_result_storage
+from .queue import LEASE_EXPIRED_ERROR, claim_next, enqueue, run_job
+
+User = get_user_model()
+
+
+class ExpiredLeaseTests(TestCase):
+    """A job whose worker dies (killed, out of memory) never reaches ``mark_failed``"""
+
+    def running_job(self, attempts, max_attempts=3):
+        now = timezone.now()
+        return Job.objects.create(
+            kind='patients.purge',
+            status='running',
+            run_after=now - timedelta(minutes=10),
+            attempts=attempts,
+            max_attempts=max_attempts,
+            worker_id='dead-worker',
+            lease_expires_at=now - timedelta(minutes=1),
+        )
+
+    def test_expired_lease_with_attempts_left_is_reclaimed(self):
+        job = self.running_job(attempts=1)
+        claimed = claim_next('worker', lease_seconds=60)
+        self.assertEqual(claimed.pk, job.pk)
+        self.assertEqual(claimed.attempts, 2)
+        self.assertEqual(claimed.worker_id, 'worker')
+
+    def test_expired_lease_on_last_attempt_fails_the_job(self):
+        job = self.running_job(attempts=3)
+        self.assertIsNone(claim_next('worker', lease_seconds=60))
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'failed')
+        self.assertEqual(job.attempts, 3)
+        self.assertEqual(job.error, LEASE_EXPIRED_ERROR)
+        self.assertIsNotNone(job.finished_at)
+
+    def test_exhausted_job_does_not_starve_the_queue(self):
+        self.running_job(attempts=3)
+        queued = Job.objects.create(kind='patients.purge', run_after=timezone.now(), max_attempts=3)
+        claimed = claim_next('worker', lease_seconds=60)
+        self.assertEqual(claimed.pk, queued.pk)
+
+
+class JobResultStorageTests(TestCase):
+    """Results hold patient and staff data: private directory, random names, authenticated download only"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            username='admin', email='admin@example.com', password='secret-pass', role='admin'
+        )
+
+    def setUp(self):
+        results_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(results_dir.cleanup)
+        self.results_dir = results_dir.name
+        field = Job._meta.get_field('result_file')
+        patcher = mock.patch.object(field, 'storage', FileSystemStorage(location=self.results_dir, base_url=None))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def run_report(self):
+        job = enqueue('reports.staff', user=self.admin)
+        job = claim_next('worker', lease_seconds=60)
+        self.assertTrue(run_job(job, 'worker'))
+        job.refresh_from_db()
+        return job
+
+    def test_result_is_stored_privately_under_a_random_name(self):
+        job = self.run_report()
+        name = os.path.basename(job.result_file.name)
+        self.assertNotIn(job.kind, name)
+        self.assertGreaterEqual(len(name), 32)
+        self.assertTrue(os.path.exists(os.path.join(self.results_dir, job.result_file.name)))
+
+    def test_results_directory_is_outside_media_root(self):
+        location = os.path.realpath(job_result_storage().location)
+        self.assertFalse(location.startswith(os.path.realpath(settings.MEDIA_ROOT) + os.sep))
+        self.assertNotEqual(location, os.path.realpath(settings.MEDIA_ROOT))
+
+    def test_result_is_served_to_the_submitter_only(self):
+        job = self.run_report()
+        response = self.client.get(f'/api/jobs/{job.pk}/result/', HTTP_HOST='localhost')
+        self.assertEqual(response.status_code, 401)
+
+        token = RefreshToken.for_user(self.admin).access_token
+        response = self.client.get(
+            f'/api/jobs/{job.pk}/result/', HTTP_HOST='localhost', HTTP_AUTHORIZATION=f'Bearer {token}'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(f'{job.pk}-reports.staff.json', response['Content-Disposition'])
+        self.assertIn('report', json.loads(b''.join(response.streaming_content)))
@@ -0,0 +1,11 @@
+from django.urls import path
+from . import views
+
+app_name = 'jobs'
+
+urlpatterns = [
+    path('', views.job_list_view, name='job_list'),
+    path('create/', views.job_create_view, name='job_create'),
+    path('<int:pk>/', views.job_detail_view, name='job_detail'),
+    path('<int:pk>/result/', views.job_result_view, name='job_result'),
+]
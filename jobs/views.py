@@ -0,0 +1,155 @@
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from django.http import FileResponse
+from .models import Job
+from .queue import enqueue
+from .registry import get_job_type
+from .serializers import JobSerializer, JobCreateSerializer
+
+
+def _is_admin(user):
+    return user.role == 'admin' or user.is_superuser
+
+
+def _get_visible_job(request, pk):
+    """The job if it exists and the user submitted it (admins see every job)"""
+    try:
+        job = Job.objects.get(pk=pk)
+    except Job.DoesNotExist:
+        return None
+    if job.created_by_id != request.user.id and not _is_admin(request.user):
+        return None
+    return job
+
+
+def submit_job(request, kind, params):
+    """Queue a job for the requesting user and answer 202 with its status URL"""
+    job = enqueue(kind, params, user=request.user)
+    return Response({
+        'success': True,
+        'message': 'Job queued',
+        'job': JobSerializer(job).data
+    }, status=status.HTTP_202_ACCEPTED)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def job_list_view(request):
+    """
+    List the user's jobs (all jobs for admins)
+    GET /api/jobs/
+    Query Params:
+        status (str): Filter by status
+        kind (str): Filter by kind
+        page (int): Page number
+        page_size (int): Items per page
+    """
+    jobs = Job.objects.all().order_by('-created_at')
+    if not _is_admin(request.user):
+        jobs = jobs.filter(created_by=request.user)
+
+    status_filter = request.query_params.get('status')
+    if status_filter:
+        jobs = jobs.filter(status=status_filter)
+
+    kind = request.query_params.get('kind')
+    if kind:
+        jobs = jobs.filter(kind=kind)
+
+    page_number = int(request.query_params.get('page', 1))
+    page_size = int(request.query_params.get('page_size', 20))
+    start_index = (page_number - 1) * page_size
+    end_index = start_index + page_size
+
+    total_jobs = jobs.count()
+    paginated_jobs = jobs[start_index:end_index]
+
+    serializer = JobSerializer(paginated_jobs, many=True)
+    return Response({
+        'success': True,
+        'jobs': serializer.data,
+        'pagination': {
+            'total': total_jobs,
+            'page': page_number,
+            'page_size': page_size,
+            'total_pages': (total_jobs + page_size - 1) // page_size,
+        }
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def job_create_view(request):
+    """
+    Submit a background job
+    POST /api/jobs/create/
+    Body: {"kind": "reports.patients", "params": {"start_date": "2024-01-01"}}
+    """
+    serializer = JobCreateSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response({
+            'success': False,
+            'errors': serializer.errors
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    kind = serializer.validated_data['kind']
+    job_type = get_job_type(kind)
+    if job_type is None or not job_type.submittable:
+        return Response({
+            'success': False,
+            'message': f'Unknown job kind "{kind}"'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    if job_type.admin_only and not _is_admin(request.user):
+        return Response({
+            'success': False,
+            'message': 'Permission denied. Admin access required.'
+        }, status=status.HTTP_403_FORBIDDEN)
+
+    return submit_job(request, kind, serializer.validated_data['params'])
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def job_detail_view(request, pk):
+    """
+    Poll a job's status
+    GET /api/jobs/<id>/
+    """
+    job = _get_visible_job(request, pk)
+    if job is None:
+        return Response({
+            'success': False,
+            'message': 'Job not found'
+        }, status=status.HTTP_404_NOT_FOUND)
+
+    return Response({
+        'success': True,
+        'job': JobSerializer(job).data
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def job_result_view(request, pk):
+    """
+    Download a finished job's result file
+    GET /api/jobs/<id>/result/
+    """
+    job = _get_visible_job(request, pk)
+    if job is None:
+        return Response({
+            'success': False,
+            'message': 'Job not found'
+        }, status=status.HTTP_404_NOT_FOUND)
+
+    if job.status != 'succeeded' or not job.result_file:
+        return Response({
+            'success': False,
+            'message': f'Job has no result yet (status: {job.status})'
+        }, status=status.HTTP_409_CONFLICT)
+
+    # FileResponse picks the content type from the file name
+    return FileResponse(job.result_file.open('rb'), filename=f'{job.pk}-{job.kind}.json')
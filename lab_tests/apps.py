@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class LabTestsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'lab_tests'
+
+    def ready(self):
+        from . import events  # noqa: F401
@@ -0,0 +1,226 @@
+"""
+Lab test events for ``/api/lab-tests/events/`` (Server-Sent Events).
+
+Saving a lab test writes a ``LabTestEvent`` row when it is created or its
+status changes (``created``, ``claimed``, ``completed``, ``cancelled``,
+``status_changed``). Saving a result that turns abnormal also writes one
+(``abnormal``). The row is written in the same transaction as the change.
+Once that commits, the in-process broadcaster wakes the streams whose
+filters match.
+
+A woken stream reads the new rows from the log by id, so every client gets
+the events in order and a reconnecting client resumes after its
+``Last-Event-ID``. Events written by other worker processes do not wake
+this process's streams. Each stream therefore also polls the log every
+``LAB_EVENTS_POLL_SECONDS``. SQLite commits one writer at a time, so ids
+become visible in order and polling by id misses nothing.
+
+Streams end after ``LAB_EVENTS_STREAM_SECONDS``, and ``EventSource``
+reconnects on its own with ``Last-Event-ID``. If the log no longer reaches
+back that far, the stream starts with a ``reset`` event: the client should
+reload the list instead of relying on the events.
+"""
+import asyncio
+import json
+import threading
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models.signals import post_init, post_save
+
+from .models import LabTest, LabTestEvent, LabTestResult
+
+# Status a test moved to -> event name
+STATUS_EVENTS = {
+    'in_progress': 'claimed',
+    'completed': 'completed',
+    'cancelled': 'cancelled',
+}
+FILTER_FIELDS = ('patient_id', 'category_id', 'ordered_by_id')
+# Events read from the log per query
+READ_BATCH = 100
+KEEPALIVE_SECONDS = 15
+# Client reconnect delay, sent as the SSE ``retry`` field
+RETRY_MILLISECONDS = 3000
+
+STATUS_ATTR = '_event_status'
+ABNORMAL_ATTR = '_event_abnormal'
+
+
+class Subscriber:
+    """A stream waiting on its event loop for matching events"""
+
+    def __init__(self, filters):
+        self.filters = filters
+        self.loop = asyncio.get_running_loop()
+        self.wakeup = asyncio.Event()
+
+    def matches(self, event):
+        return all(event[field] == value for field, value in self.filters.items())
+
+    def notify(self):
+        try:
+            self.loop.call_soon_threadsafe(self.wakeup.set)
+        except RuntimeError:
+            # The loop has closed under a stream that is going away
+            pass
+
+    async def wait(self, timeout):
+        """True when woken by an event, False on timeout"""
+        try:
+            await asyncio.wait_for(self.wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+
+class Broadcaster:
+    """Wakes this process's streams; thread-safe, since saves run in worker threads"""
+
+    def __init__(self):
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self, filters):
+        subscriber = Subscriber(filters)
+        with self._lock:
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def publish(self, event):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            if subscriber.matches(event):
+                subscriber.notify()
+
+
+broadcaster = Broadcaster()
+
+
+def record_event(event, test, **data):
+    """Log an event for ``test`` and publish it once the transaction commits"""
+    row = LabTestEvent.objects.create(
+        event=event,
+        test_id=test.pk,
+        patient_id=test.patient_id,
+        category_id=test.category_id,
+        ordered_by_id=test.ordered_by_id,
+        data={
+            'test_id': test.pk,
+            'test_name': test.test_name,
+            'status': test.status,
+            'priority': test.priority,
+            'patient_id': test.patient_id,
+            'category_id': test.category_id,
+            'ordered_by_id': test.ordered_by_id,
+            'performed_by_id': test.performed_by_id,
+            **data,
+        },
+    )
+    keys = {field: getattr(row, field) for field in FILTER_FIELDS}
+    transaction.on_commit(lambda: broadcaster.publish(keys))
+    return row
+
+
+def remember_state(sender, instance, **kwargs):
+    values = instance.__dict__
+    if sender is LabTest and 'status' in values:
+        setattr(instance, STATUS_ATTR, values['status'])
+    elif sender is LabTestResult and 'is_abnormal' in values:
+        setattr(instance, ABNORMAL_ATTR, values['is_abnormal'])
+
+
+def lab_test_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, STATUS_ATTR, None)
+    setattr(instance, STATUS_ATTR, instance.status)
+    if created:
+        record_event('created', instance)
+    elif previous is not None and previous != instance.status:
+        record_event(STATUS_EVENTS.get(instance.status, 'status_changed'), instance, previous_status=previous)
+
+
+def lab_result_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    was_abnormal = getattr(instance, ABNORMAL_ATTR, False)
+    setattr(instance, ABNORMAL_ATTR, instance.is_abnormal)
+    if instance.is_abnormal and (created or not was_abnormal):
+        record_event(
+            'abnormal', instance.test,
+            result_id=instance.pk,
+            parameter_name=instance.parameter_name,
+            value=instance.value,
+            unit=instance.unit,
+            normal_range=instance.normal_range,
+            is_critical=instance.is_critical,
+        )
+
+
+for model, handler in ((LabTest, lab_test_saved), (LabTestResult, lab_result_saved)):
+    label = model._meta.label_lower
+    post_init.connect(remember_state, sender=model, dispatch_uid=f'lab_events_init_{label}')
+    post_save.connect(handler, sender=model, dispatch_uid=f'lab_events_save_{label}')
+
+
+def events_after(last_id, filters, limit=READ_BATCH):
+    return list(
+        LabTestEvent.objects.filter(pk__gt=last_id, **filters)
+        .order_by('pk')
+        .values('id', 'event', 'data', 'created_at')[:limit]
+    )
+
+
+def resume_point(last_event_id):
+    """``(last id, reset)``: where to continue from, and whether events were pruned since"""
+    if last_event_id is None:
+        latest = LabTestEvent.objects.order_by('-pk').values_list('pk', flat=True).first()
+        return latest or 0, False
+    oldest = LabTestEvent.objects.order_by('pk').values_list('pk', flat=True).first()
+    return last_event_id, oldest is not None and oldest > last_event_id + 1
+
+
+def format_event(event):
+    data = json.dumps({**event['data'], 'created_at': event['created_at']}, cls=DjangoJSONEncoder)
+    return f"id: {event['id']}\nevent: {event['event']}\ndata: {data}\n\n"
+
+
+async def stream(last_event_id, filters):
+    """Async generator of SSE chunks; see the module docstring"""
+    loop = asyncio.get_running_loop()
+    poll_seconds = getattr(settings, 'LAB_EVENTS_POLL_SECONDS', 5)
+    deadline = loop.time() + getattr(settings, 'LAB_EVENTS_STREAM_SECONDS', 300)
+
+    subscriber = broadcaster.subscribe(filters)
+    try:
+        last_id, reset = await sync_to_async(resume_point)(last_event_id)
+        yield f'retry: {RETRY_MILLISECONDS}\n\n'
+        if reset:
+            yield f'id: {last_id}\nevent: reset\ndata: {{}}\n\n'
+        quiet_since = loop.time()
+        while loop.time() < deadline:
+            # Cleared before reading, so an event committed meanwhile wakes the next wait
+            subscriber.wakeup.clear()
+            events = await sync_to_async(events_after)(last_id, filters)
+            for event in events:
+                yield format_event(event)
+                last_id = event['id']
+            if len(events) == READ_BATCH:
+                continue
+            if events:
+                quiet_since = loop.time()
+            elif loop.time() - quiet_since >= KEEPALIVE_SECONDS:
+                # Keeps proxies from closing an idle connection
+                yield ': keepalive\n\n'
+                quiet_since = loop.time()
+            await subscriber.wait(min(poll_seconds, max(deadline - loop.time(), 0)))
+    finally:
+        broadcaster.unsubscribe(subscriber)
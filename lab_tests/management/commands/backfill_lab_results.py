@@ -0,0 +1,73 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from lab_tests.models import LabTestResult
+from lab_tests.ranges import classify, parse_range, parse_value
+
+
+class Command(BaseCommand):
+    help = (
+        'Fill in numeric_value, range_low/range_high, the abnormal/critical flags '
+        'and observed_at of lab test results from their free-text value and normal_range'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true',
+                            help='Recompute every result, not only those never parsed (e.g. after changing LAB_CRITICAL_RANGE_FACTOR)')
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        results = LabTestResult.objects.all()
+        if not options['all']:
+            results = results.filter(observed_at__isnull=True)
+
+        # One prepared UPDATE run with executemany; bulk_update's CASE expressions
+        # cost far more to build than to execute
+        quote = connection.ops.quote_name
+        opts = LabTestResult._meta
+        assignments = ', '.join(
+            f'{quote(opts.get_field(name).column)} = %s' for name in LabTestResult.NUMERIC_FIELDS
+        )
+        sql = f'UPDATE {quote(opts.db_table)} SET {assignments} WHERE {quote(opts.pk.column)} = %s'
+
+        started = time.perf_counter()
+        updated = flagged = 0
+        last_id = 0
+        while True:
+            rows = list(
+                results.filter(id__gt=last_id).order_by('id').values(
+                    'id', 'value', 'normal_range', 'is_abnormal', 'observed_at', 'created_at',
+                    'test__completed_date', 'test__ordered_date',
+                )[:batch_size]
+            )
+            if not rows:
+                break
+            last_id = rows[-1]['id']
+
+            # Each distinct value string and range is parsed once per batch
+            values = {text: parse_value(text) for text in {row['value'] for row in rows}}
+            params = []
+            for row in rows:
+                numeric_value = values[row['value']]
+                low, high = parse_range(row['normal_range'])
+                flags = classify(numeric_value, low, high)
+                is_abnormal, is_critical = flags if flags is not None else (row['is_abnormal'], False)
+                flagged += is_abnormal
+                observed_at = row['observed_at'] or row['test__completed_date'] or row['test__ordered_date'] or row['created_at']
+                params.append((
+                    numeric_value, low, high, is_abnormal, is_critical,
+                    opts.get_field('observed_at').get_db_prep_value(observed_at, connection),
+                    row['id'],
+                ))
+
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.executemany(sql, params)
+            updated += len(params)
+            self.stdout.write(f'Lab test results: {updated}')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Backfilled {updated} lab test results ({flagged} abnormal) in {time.perf_counter() - started:.1f}s'
+        ))
@@ -0,0 +1,32 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from lab_tests.models import LabTestEvent
+
+
+class Command(BaseCommand):
+    help = 'Delete lab test events older than LAB_EVENTS_RETENTION_HOURS from the event stream log'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than-hours', type=int, help='Default: LAB_EVENTS_RETENTION_HOURS')
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        hours = options['older_than_hours'] or getattr(settings, 'LAB_EVENTS_RETENTION_HOURS', 48)
+        cutoff = timezone.now() - timedelta(hours=hours)
+        pruned = 0
+        while True:
+            # Served by the created_at index; small chunks keep write locks short
+            ids = list(
+                LabTestEvent.objects.filter(created_at__lt=cutoff)
+                .order_by('created_at').values_list('id', flat=True)[:options['batch_size']]
+            )
+            if not ids:
+                break
+            deleted, _ = LabTestEvent.objects.filter(id__in=ids).delete()
+            pruned += deleted
+
+        self.stdout.write(self.style.SUCCESS(f'Pruned {pruned} lab test events'))
@@ -0,0 +1,50 @@
+# Generated by Django 5.0.3 on 2026-10-19 01:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lab_tests', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='labtestresult',
+            name='is_critical',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='labtestresult',
+            name='numeric_value',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='labtestresult',
+            name='observed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='labtestresult',
+            name='range_high',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='labtestresult',
+            name='range_low',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='labtestresult',
+            index=models.Index(condition=models.Q(('is_abnormal', True)), fields=['observed_at'], name='lab_results_abnormal_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='labtestresult',
+            index=models.Index(condition=models.Q(('is_critical', True)), fields=['observed_at'], name='lab_results_critical_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='labtestresult',
+            index=models.Index(fields=['parameter_name', 'observed_at'], name='lab_results_param_time_idx'),
+        ),
+    ]
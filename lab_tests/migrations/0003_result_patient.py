@@ -0,0 +1,34 @@
+# Generated by Django 5.0.3 on 2026-10-19 01:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def copy_patient_from_test(apps, schema_editor):
+    LabTest = apps.get_model('lab_tests', 'LabTest')
+    LabTestResult = apps.get_model('lab_tests', 'LabTestResult')
+    LabTestResult.objects.update(
+        patient_id=Subquery(LabTest.objects.filter(pk=OuterRef('test_id')).values('patient_id')[:1])
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lab_tests', '0002_result_numeric_values'),
+        ('patients', '0004_patient_match_keys'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='labtestresult',
+            name='patient',
+            field=models.ForeignKey(editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='lab_results', to='patients.patient'),
+        ),
+        migrations.RunPython(copy_patient_from_test, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='labtestresult',
+            index=models.Index(fields=['patient', 'parameter_name', 'observed_at'], name='lab_results_trend_idx'),
+        ),
+    ]
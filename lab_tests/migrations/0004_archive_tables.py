@@ -0,0 +1,87 @@
+# Generated by Django 5.0.3 on 2026-10-19 01:38
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lab_tests', '0003_result_patient'),
+        ('patients', '0004_patient_match_keys'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedLabTest',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('test_name', models.CharField(max_length=200)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('in_progress', 'In Progress'), ('completed', 'Completed'), ('cancelled', 'Cancelled')], default='pending', max_length=20)),
+                ('priority', models.CharField(choices=[('routine', 'Routine'), ('urgent', 'Urgent'), ('stat', 'STAT (Immediate)')], default='routine', max_length=20)),
+                ('test_code', models.CharField(blank=True, max_length=50, null=True)),
+                ('description', models.TextField(blank=True, null=True)),
+                ('instructions', models.TextField(blank=True, null=True)),
+                ('ordered_date', models.DateTimeField()),
+                ('scheduled_date', models.DateTimeField(blank=True, null=True)),
+                ('completed_date', models.DateTimeField(blank=True, null=True)),
+                ('results', models.TextField(blank=True, null=True)),
+                ('normal_range', models.CharField(blank=True, max_length=200, null=True)),
+                ('notes', models.TextField(blank=True, null=True)),
+                ('cost', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=10)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='archived_tests', to='lab_tests.labtestcategory')),
+                ('ordered_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_ordered_tests', to=settings.AUTH_USER_MODEL)),
+                ('patient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_lab_tests', to='patients.patient')),
+                ('performed_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_performed_tests', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Archived Lab Test',
+                'verbose_name_plural': 'Archived Lab Tests',
+                'db_table': 'lab_tests_archive',
+                'ordering': ['-ordered_date'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedLabTestResult',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('parameter_name', models.CharField(max_length=200)),
+                ('value', models.CharField(max_length=200)),
+                ('unit', models.CharField(blank=True, max_length=50, null=True)),
+                ('normal_range', models.CharField(blank=True, max_length=200, null=True)),
+                ('is_abnormal', models.BooleanField(default=False)),
+                ('notes', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField()),
+                ('numeric_value', models.FloatField(blank=True, null=True)),
+                ('range_low', models.FloatField(blank=True, null=True)),
+                ('range_high', models.FloatField(blank=True, null=True)),
+                ('is_critical', models.BooleanField(default=False)),
+                ('observed_at', models.DateTimeField(blank=True, null=True)),
+                ('patient', models.ForeignKey(editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='archived_lab_results', to='patients.patient')),
+                ('test', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='test_results', to='lab_tests.archivedlabtest')),
+            ],
+            options={
+                'verbose_name': 'Archived Lab Test Result',
+                'verbose_name_plural': 'Archived Lab Test Results',
+                'db_table': 'lab_test_results_archive',
+                'ordering': ['parameter_name'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='archivedlabtest',
+            index=models.Index(fields=['ordered_date'], name='lab_tests_arch_ordered_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedlabtestresult',
+            index=models.Index(condition=models.Q(('is_abnormal', True)), fields=['observed_at'], name='lab_results_arch_abnormal_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedlabtestresult',
+            index=models.Index(fields=['patient', 'parameter_name', 'observed_at'], name='lab_results_arch_trend_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.0.3 on 2026-10-19 01:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lab_tests', '0004_archive_tables'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LabTestEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event', models.CharField(choices=[('created', 'Created'), ('claimed', 'Claimed'), ('completed', 'Completed'), ('cancelled', 'Cancelled'), ('status_changed', 'Status Changed'), ('abnormal', 'Abnormal Result')], max_length=20)),
+                ('test_id', models.BigIntegerField()),
+                ('patient_id', models.BigIntegerField()),
+                ('category_id', models.BigIntegerField()),
+                ('ordered_by_id', models.BigIntegerField(blank=True, null=True)),
+                ('data', models.JSONField(default=dict)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Lab Test Event',
+                'verbose_name_plural': 'Lab Test Events',
+                'db_table': 'lab_test_events',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['created_at'], name='lab_test_events_created_idx')],
+            },
+        ),
+    ]
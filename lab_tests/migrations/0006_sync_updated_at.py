@@ -0,0 +1,41 @@
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lab_tests', '0005_lab_test_events'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='labtestresult',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='archivedlabtestresult',
+            name='updated_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        # Existing results are taken as unchanged since they were entered
+        migrations.RunSQL(
+            'UPDATE lab_test_results SET updated_at = created_at',
+            migrations.RunSQL.noop,
+        ),
+        migrations.RunSQL(
+            'UPDATE lab_test_results_archive SET updated_at = created_at',
+            migrations.RunSQL.noop,
+        ),
+        migrations.AddIndex(
+            model_name='labtest',
+            index=models.Index(fields=['updated_at', 'id'], name='lab_tests_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='labtestresult',
+            index=models.Index(fields=['updated_at', 'id'], name='lab_results_updated_idx'),
+        ),
+    ]
@@ -1,7 +1,10 @@
 from django.db import models
 from django.contrib.auth import get_user_model
+from django.utils import timezone
+from core.archive import archive_model
 from patients.models import Patient
 from decimal import Decimal
+from .ranges import classify, parse_range, parse_value
 
 User = get_user_model()
 
@@ -78,6 +81,10 @@ class LabTest(models.Model):
         verbose_name = 'Lab Test'
         verbose_name_plural = 'Lab Tests'
         ordering = ['-ordered_date']
+        indexes = [
+            # Delta sync (core/sync.py)
+            models.Index(fields=['updated_at', 'id'], name='lab_tests_updated_idx'),
+        ]
     
     def __str__(self):
         return f"{self.test_name} - {self.patient.full_name}"
@@ -88,6 +95,8 @@ class LabTestResult(models.Model):
     Individual test results/parameters for a lab test
     """
     test = models.ForeignKey(LabTest, on_delete=models.CASCADE, related_name='test_results')
+    # Copied from the test on save, so a patient's series is one index range
+    patient = models.ForeignKey(Patient, on_delete=models.CASCADE, related_name='lab_results', null=True, editable=False)
     parameter_name = models.CharField(max_length=200)
     value = models.CharField(max_length=200)
     unit = models.CharField(max_length=50, blank=True, null=True)
@@ -95,12 +104,108 @@ class LabTestResult(models.Model):
     is_abnormal = models.BooleanField(default=False)
     notes = models.TextField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    # Parsed from value and normal_range on save (lab_tests/ranges.py)
+    numeric_value = models.FloatField(blank=True, null=True)
+    range_low = models.FloatField(blank=True, null=True)
+    range_high = models.FloatField(blank=True, null=True)
+    is_critical = models.BooleanField(default=False)
+    NUMERIC_FIELDS = ('numeric_value', 'range_low', 'range_high', 'is_abnormal', 'is_critical', 'observed_at')
+    # When the result was obtained: the test's completion time, or entry time
+    observed_at = models.DateTimeField(blank=True, null=True)
     
     class Meta:
         db_table = 'lab_test_results'
         verbose_name = 'Lab Test Result'
         verbose_name_plural = 'Lab Test Results'
         ordering = ['parameter_name']
+        indexes = [
+            # Partial indexes: only the flagged rows, by time
+            models.Index(fields=['observed_at'], condition=models.Q(is_abnormal=True), name='lab_results_abnormal_idx'),
+            models.Index(fields=['observed_at'], condition=models.Q(is_critical=True), name='lab_results_critical_idx'),
+            models.Index(fields=['parameter_name', 'observed_at'], name='lab_results_param_time_idx'),
+            # Per-patient trend series (patients/views.py patient_lab_trends_view)
+            models.Index(fields=['patient', 'parameter_name', 'observed_at'], name='lab_results_trend_idx'),
+            # Delta sync (core/sync.py)
+            models.Index(fields=['updated_at', 'id'], name='lab_results_updated_idx'),
+        ]
     
     def __str__(self):
         return f"{self.parameter_name}: {self.value} {self.unit or ''}"
+    
+    def set_numeric_fields(self):
+        """Parse value and normal_range and, when both are numeric, set the flags"""
+        self.numeric_value = parse_value(self.value)
+        self.range_low, self.range_high = parse_range(self.normal_range)
+        flags = classify(self.numeric_value, self.range_low, self.range_high)
+        if flags is not None:
+            self.is_abnormal, self.is_critical = flags
+        else:
+            # Non-numeric results ("Positive") keep the flag set by hand
+            self.is_critical = False
+    
+    def save(self, *args, **kwargs):
+        self.set_numeric_fields()
+        if self.observed_at is None:
+            self.observed_at = self.test.completed_date or timezone.now()
+        if self.patient_id is None:
+            self.patient_id = self.test.patient_id
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = set(update_fields) | set(self.NUMERIC_FIELDS) | {'patient', 'updated_at'}
+        super().save(*args, **kwargs)
+
+
+# Completed tests moved out of the hot tables by manage.py archive_records (core/archive.py)
+ArchivedLabTest = archive_model(
+    LabTest, 'ArchivedLabTest', 'lab_tests_archive',
+    indexes=[models.Index(fields=['ordered_date'], name='lab_tests_arch_ordered_idx')],
+)
+ArchivedLabTestResult = archive_model(
+    LabTestResult, 'ArchivedLabTestResult', 'lab_test_results_archive',
+    relations={'test': ArchivedLabTest},
+    indexes=[
+        models.Index(fields=['observed_at'], condition=models.Q(is_abnormal=True), name='lab_results_arch_abnormal_idx'),
+        models.Index(fields=['patient', 'parameter_name', 'observed_at'], name='lab_results_arch_trend_idx'),
+    ],
+)
+
+
+class LabTestEvent(models.Model):
+    """
+    Lab test status and result events streamed by ``/api/lab-tests/events/``
+    (lab_tests/events.py). The id is the SSE event id that clients resume
+    from with ``Last-Event-ID``. Plain ids rather than foreign keys, so the
+    log outlives deleted and archived tests; pruned by
+    ``manage.py prune_lab_test_events``.
+    """
+    EVENT_CHOICES = [
+        ('created', 'Created'),
+        ('claimed', 'Claimed'),
+        ('completed', 'Completed'),
+        ('cancelled', 'Cancelled'),
+        ('status_changed', 'Status Changed'),
+        ('abnormal', 'Abnormal Result'),
+    ]
+    
+    event = models.CharField(max_length=20, choices=EVENT_CHOICES)
+    test_id = models.BigIntegerField()
+    # Filter columns (?patient_id=, ?category_id=, ?ordered_by=)
+    patient_id = models.BigIntegerField()
+    category_id = models.BigIntegerField()
+    ordered_by_id = models.BigIntegerField(blank=True, null=True)
+    data = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'lab_test_events'
+        verbose_name = 'Lab Test Event'
+        verbose_name_plural = 'Lab Test Events'
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['created_at'], name='lab_test_events_created_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.event} #{self.test_id}"
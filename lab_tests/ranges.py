@@ -0,0 +1,69 @@
+"""
+Numeric interpretation of free-text lab results.
+
+``value`` and ``normal_range`` stay as entered; ``parse_value`` and
+``parse_range`` extract the number and the bounds they carry ("5.2 mmol/L",
+"<0.5", "1,200"; "3.5-5.1", "3.5 to 5.1", "<200", ">= 40") so results can be
+filtered and flagged in SQL. ``classify`` turns them into the abnormal and
+critical flags: a value outside the normal range is abnormal, and critical
+when it lies further outside than ``LAB_CRITICAL_RANGE_FACTOR`` times the
+width of the range (or of the bound, for one-sided ranges).
+"""
+import re
+from functools import lru_cache
+
+from django.conf import settings
+
+_NUMBER = r'[-+]?\d[\d,]*(?:\.\d+)?|[-+]?\.\d+'
+_VALUE_RE = re.compile(rf'^\s*(?:[<>]=?|[≤≥])?\s*({_NUMBER})')
+_BETWEEN_RE = re.compile(rf'({_NUMBER})\s*(?:-|–|—|to)\s*({_NUMBER})', re.IGNORECASE)
+_UPPER_RE = re.compile(rf'(?:<=?|≤|up\s+to|below|less\s+than)\s*({_NUMBER})', re.IGNORECASE)
+_LOWER_RE = re.compile(rf'(?:>=?|≥|above|greater\s+than)\s*({_NUMBER})', re.IGNORECASE)
+
+
+def _number(text):
+    return float(text.replace(',', ''))
+
+
+def parse_value(value):
+    """The leading number of a result ("<0.5" -> 0.5), or None for "Positive" and the like"""
+    match = _VALUE_RE.match(value or '')
+    return _number(match.group(1)) if match else None
+
+
+@lru_cache(maxsize=4096)
+def parse_range(normal_range):
+    """``(low, high)`` from a reference range, either side None if absent"""
+    text = normal_range or ''
+    match = _BETWEEN_RE.search(text)
+    if match:
+        low, high = _number(match.group(1)), _number(match.group(2))
+        return (low, high) if low <= high else (high, low)
+    match = _UPPER_RE.search(text)
+    if match:
+        return None, _number(match.group(1))
+    match = _LOWER_RE.search(text)
+    if match:
+        return _number(match.group(1)), None
+    return None, None
+
+
+def classify(value, low, high, factor=None):
+    """
+    ``(is_abnormal, is_critical)`` for a numeric value, or None when there is
+    nothing to compare (no value or no bounds)
+    """
+    if value is None or (low is None and high is None):
+        return None
+    if factor is None:
+        factor = getattr(settings, 'LAB_CRITICAL_RANGE_FACTOR', 1.0)
+    if low is not None and high is not None:
+        margin = (high - low) * factor
+    else:
+        margin = abs(high if high is not None else low) * factor
+
+    if high is not None and value > high:
+        return True, value > high + margin
+    if low is not None and value < low:
+        return True, value < low - margin
+    return False, False
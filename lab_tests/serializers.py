@@ -1,12 +1,14 @@
 from rest_framework import serializers
-from .models import LabTest, LabTestCategory, LabTestResult
+from .models import ArchivedLabTest, ArchivedLabTestResult, LabTest, LabTestCategory, LabTestResult
 from patients.models import Patient
 from django.contrib.auth import get_user_model
+from core.rows import RowSerializer, Computed, Nested, user_name_column
+from core.metrics import TimedSerializerMixin
 
 User = get_user_model()
 
 
-class LabTestCategorySerializer(serializers.ModelSerializer):
+class LabTestCategorySerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Serializer for LabTestCategory model"""
     
     class Meta:
@@ -15,16 +17,18 @@ class LabTestCategorySerializer(serializers.ModelSerializer):
         read_only_fields = ('id', 'created_at', 'updated_at')
 
 
-class LabTestResultSerializer(serializers.ModelSerializer):
+class LabTestResultSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Serializer for LabTestResult model"""
     
     class Meta:
         model = LabTestResult
         fields = '__all__'
-        read_only_fields = ('id', 'created_at')
+        read_only_fields = (
+            'id', 'created_at', 'numeric_value', 'range_low', 'range_high', 'is_critical', 'observed_at'
+        )
 
 
-class LabTestSerializer(serializers.ModelSerializer):
+class LabTestSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Serializer for LabTest model"""
     patient_name = serializers.CharField(source='patient.full_name', read_only=True)
     patient_email = serializers.CharField(source='patient.email', read_only=True)
@@ -57,7 +61,31 @@ class LabTestSerializer(serializers.ModelSerializer):
         return None
 
 
-class LabTestCreateSerializer(serializers.ModelSerializer):
+# Fast read paths for list endpoints, same output as the serializers above
+lab_test_result_rows = RowSerializer(LabTestResultSerializer)
+
+lab_test_columns = {
+    'patient_name': Computed(
+        ('patient__first_name', 'patient__last_name'),
+        lambda first, last: f"{first} {last}".strip(),
+    ),
+    'ordered_by_name': user_name_column('ordered_by'),
+    'performed_by_name': user_name_column('performed_by'),
+}
+lab_test_rows = RowSerializer(LabTestSerializer, computed={
+    **lab_test_columns,
+    'test_results': Nested(lab_test_result_rows, 'test'),
+})
+
+# The same rows read from the archive tables (core/archive.py)
+archived_lab_test_result_rows = RowSerializer(LabTestResultSerializer, model=ArchivedLabTestResult)
+archived_lab_test_rows = RowSerializer(LabTestSerializer, model=ArchivedLabTest, computed={
+    **lab_test_columns,
+    'test_results': Nested(archived_lab_test_result_rows, 'test'),
+})
+
+
+class LabTestCreateSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Serializer for creating a lab test"""
     price = serializers.DecimalField(max_digits=10, decimal_places=2, required=False, write_only=True, source='cost')
     
@@ -70,7 +98,7 @@ class LabTestCreateSerializer(serializers.ModelSerializer):
         )
 
 
-class LabTestUpdateSerializer(serializers.ModelSerializer):
+class LabTestUpdateSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Serializer for updating a lab test"""
     
     class Meta:
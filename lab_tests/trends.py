@@ -0,0 +1,124 @@
+"""
+Per-patient time series of numeric lab results.
+
+A series is read with one range scan of the (patient, parameter_name,
+observed_at) index and returned as parallel arrays, which are much smaller
+than a list of result objects. Long histories can be reduced to
+``max_points`` with Largest-Triangle-Three-Buckets, which keeps the visual
+shape of the curve, including its peaks and troughs, instead of sampling
+every n-th point.
+
+Archived results (core/archive.py) are part of a patient's history, so
+both tables are always read, with the same index on each.
+"""
+from django.db.models import Count, Max
+
+from .models import ArchivedLabTestResult, LabTestResult
+
+MAX_PARAMETERS = 10
+
+# Flag codes in the ``flags`` array
+NORMAL, ABNORMAL, CRITICAL = 0, 1, 2
+
+
+def _flag(is_abnormal, is_critical):
+    return CRITICAL if is_critical else ABNORMAL if is_abnormal else NORMAL
+
+
+def lttb(points, threshold):
+    """
+    Indexes of the points kept by Largest-Triangle-Three-Buckets
+    (``points`` are ``(x, y)`` pairs sorted by x)
+    """
+    count = len(points)
+    if threshold >= count or threshold < 3:
+        return list(range(count))
+
+    kept = [0]
+    bucket_size = (count - 2) / (threshold - 2)
+    previous = 0
+    for bucket in range(threshold - 2):
+        start = int(bucket * bucket_size) + 1
+        end = int((bucket + 1) * bucket_size) + 1
+
+        # Average of the next bucket is the third triangle corner
+        next_start, next_end = end, min(int((bucket + 2) * bucket_size) + 1, count)
+        next_points = points[next_start:next_end] or [points[-1]]
+        avg_x = sum(x for x, _ in next_points) / len(next_points)
+        avg_y = sum(y for _, y in next_points) / len(next_points)
+
+        prev_x, prev_y = points[previous]
+        best, best_area = start, -1.0
+        for index in range(start, end):
+            x, y = points[index]
+            area = abs((prev_x - avg_x) * (y - prev_y) - (prev_x - x) * (avg_y - prev_y))
+            if area > best_area:
+                best, best_area = index, area
+        kept.append(best)
+        previous = best
+    kept.append(count - 1)
+    return kept
+
+
+def available_parameters(patient_id):
+    """``[{'parameter_name', 'count', 'last_observed_at'}]`` for the patient's numeric results"""
+    parameters = {}
+    for model in (LabTestResult, ArchivedLabTestResult):
+        rows = (
+            model.objects.filter(patient_id=patient_id, numeric_value__isnull=False)
+            .order_by().values('parameter_name')
+            .annotate(count=Count('id'), last_observed_at=Max('observed_at'))
+        )
+        for row in rows:
+            entry = parameters.setdefault(row['parameter_name'], row)
+            if entry is not row:
+                entry['count'] += row['count']
+                entry['last_observed_at'] = max(entry['last_observed_at'], row['last_observed_at'])
+    return [parameters[name] for name in sorted(parameters)]
+
+
+def trend_series(patient_id, parameters, start=None, end=None, max_points=None):
+    """
+    ``{parameter: series}`` where a series holds parallel ``t`` (epoch
+    milliseconds), ``v``, ``flags`` arrays plus the latest unit and range
+    """
+    filters = {'patient_id': patient_id, 'parameter_name__in': parameters, 'numeric_value__isnull': False}
+    if start is not None:
+        filters['observed_at__gte'] = start
+    if end is not None:
+        filters['observed_at__lte'] = end
+
+    grouped = {}
+    for model in (ArchivedLabTestResult, LabTestResult):
+        rows = model.objects.filter(**filters).order_by('parameter_name', 'observed_at', 'id').values_list(
+            'parameter_name', 'observed_at', 'numeric_value', 'unit', 'is_abnormal', 'is_critical',
+            'range_low', 'range_high',
+        )
+        for name, observed_at, value, unit, is_abnormal, is_critical, low, high in rows:
+            grouped.setdefault(name, []).append(
+                (int(observed_at.timestamp() * 1000), value, unit, _flag(is_abnormal, is_critical), low, high)
+            )
+    for points in grouped.values():
+        # Archived points mostly come first already; a stable sort keeps equal times in order
+        points.sort(key=lambda point: point[0])
+
+    series = {}
+    for name in parameters:
+        points = grouped.get(name, [])
+        total = len(points)
+        if max_points and total > max_points:
+            points = [points[index] for index in lttb([(p[0], p[1]) for p in points], max_points)]
+        units = {p[2] for p in points}
+        latest = points[-1] if points else None
+        series[name] = {
+            't': [p[0] for p in points],
+            'v': [p[1] for p in points],
+            'flags': [p[3] for p in points],
+            'unit': latest[2] if latest else None,
+            # Only sent when the unit changed over time
+            'units': [p[2] for p in points] if len(units) > 1 else None,
+            'range': [latest[4], latest[5]] if latest else None,
+            'count': total,
+            'downsampled': len(points) < total,
+        }
+    return series
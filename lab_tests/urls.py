@@ -14,5 +14,7 @@ urlpatterns = [
     path('categories/', views.lab_test_category_list_view, name='lab_test_categories'),
     path('categories/<int:pk>/', views.lab_test_category_detail_view, name='lab_test_category_detail'),
     path('stats/', views.lab_test_stats_view, name='lab_test_stats'),
+    path('results/abnormal/', views.abnormal_result_list_view, name='abnormal_results'),
+    path('events/', views.lab_test_events_view, name='lab_test_events'),
 ]
 
@@ -2,12 +2,24 @@ from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from django.db.models import Count, Q
-from .models import LabTest, LabTestCategory, LabTestResult
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from asgiref.sync import sync_to_async
+from datetime import datetime, time, timedelta
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from .models import ArchivedLabTest, ArchivedLabTestResult, LabTest, LabTestCategory, LabTestResult
 from .serializers import (
     LabTestSerializer, LabTestCreateSerializer, LabTestCategorySerializer,
-    LabTestResultSerializer
+    LabTestResultSerializer, archived_lab_test_rows, lab_test_rows
 )
+from core.archive import get_with_archive, include_archived, page_with_archive
+from core.replicas import replica_reads
+from reports.dashboard import lab_test_section
+from core.response_cache import cached_response
+from core.idempotency import idempotent
+from .events import stream
 
 
 @api_view(['GET'])
@@ -21,27 +33,17 @@ def lab_test_list_view(request):
         patient_id (int): Filter by patient
         category_id (int): Filter by category
         priority (str): Filter by priority
+        include_archived (bool): true to list archived tests after the current ones
         page (int): Page number
         page_size (int): Items per page
     """
-    tests = LabTest.objects.all().order_by('-ordered_date', '-created_at')
-    
-    # Filters
-    status_filter = request.query_params.get('status')
-    if status_filter:
-        tests = tests.filter(status=status_filter)
-    
-    patient_id = request.query_params.get('patient_id')
-    if patient_id:
-        tests = tests.filter(patient_id=patient_id)
-    
-    category_id = request.query_params.get('category_id')
-    if category_id:
-        tests = tests.filter(category_id=category_id)
-    
-    priority = request.query_params.get('priority')
-    if priority:
-        tests = tests.filter(priority=priority)
+    filters = {}
+    for param, lookup in (('status', 'status'), ('patient_id', 'patient_id'),
+                          ('category_id', 'category_id'), ('priority', 'priority')):
+        value = request.query_params.get(param)
+        if value:
+            filters[lookup] = value
+    tests = LabTest.objects.filter(**filters).order_by('-ordered_date', '-created_at')
     
     # Pagination
     page_number = int(request.query_params.get('page', 1))
@@ -49,13 +51,19 @@ def lab_test_list_view(request):
     start_index = (page_number - 1) * page_size
     end_index = start_index + page_size
     
-    total_tests = tests.count()
-    paginated_tests = tests[start_index:end_index]
+    if include_archived(request):
+        archived_tests = ArchivedLabTest.objects.filter(**filters).order_by('-ordered_date', '-created_at')
+        paginated_tests, paginated_archived, total_tests = page_with_archive(
+            tests, archived_tests, start_index, end_index
+        )
+        rows = lab_test_rows.serialize(paginated_tests) + archived_lab_test_rows.serialize(paginated_archived)
+    else:
+        total_tests = tests.count()
+        rows = lab_test_rows.serialize(tests[start_index:end_index])
     
-    serializer = LabTestSerializer(paginated_tests, many=True)
     return Response({
         'success': True,
-        'tests': serializer.data,
+        'tests': rows,
         'pagination': {
             'total': total_tests,
             'page': page_number,
@@ -67,6 +75,7 @@ def lab_test_list_view(request):
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@idempotent
 def lab_test_create_view(request):
     """
     Create a new lab test
@@ -93,11 +102,11 @@ def lab_test_create_view(request):
 @permission_classes([IsAuthenticated])
 def lab_test_detail_view(request, pk):
     """
-    Get lab test details
+    Get lab test details, including archived tests
     GET /api/lab-tests/<id>/
     """
     try:
-        test = LabTest.objects.get(pk=pk)
+        test = get_with_archive(LabTest.objects, ArchivedLabTest.objects, pk)
         serializer = LabTestSerializer(test)
         return Response({
             'success': True,
@@ -317,6 +326,8 @@ def lab_test_result_detail_view(request, test_id, result_id):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@cached_response(models=[LabTest, LabTestCategory])
+@replica_reads
 def lab_test_stats_view(request):
     """
     Get lab test statistics
@@ -329,51 +340,10 @@ def lab_test_stats_view(request):
             'message': 'Permission denied. Admin or Lab Technician access required.'
         }, status=status.HTTP_403_FORBIDDEN)
     
-    # Overall statistics
-    total_tests = LabTest.objects.count()
-    pending_tests = LabTest.objects.filter(status='pending').count()
-    in_progress_tests = LabTest.objects.filter(status='in_progress').count()
-    completed_tests = LabTest.objects.filter(status='completed').count()
-    
-    # Status breakdown
-    tests_by_status = LabTest.objects.values('status').annotate(count=Count('status'))
-    status_stats = {}
-    for item in tests_by_status:
-        status_stats[item['status']] = {
-            'name': dict(LabTest.STATUS_CHOICES).get(item['status'], item['status']),
-            'count': item['count']
-        }
-    
-    # Priority breakdown
-    tests_by_priority = LabTest.objects.values('priority').annotate(count=Count('priority'))
-    priority_stats = {}
-    for item in tests_by_priority:
-        priority_stats[item['priority']] = {
-            'name': dict(LabTest.PRIORITY_CHOICES).get(item['priority'], item['priority']),
-            'count': item['count']
-        }
-    
-    # Category breakdown
-    tests_by_category = LabTest.objects.values('category__name').annotate(count=Count('category'))
-    category_stats = {}
-    for item in tests_by_category:
-        if item['category__name']:
-            category_stats[item['category__name']] = {
-                'name': item['category__name'],
-                'count': item['count']
-            }
-    
+    # Shared with the dashboard; includes archived tests
     return Response({
         'success': True,
-        'stats': {
-            'total_tests': total_tests,
-            'pending_tests': pending_tests,
-            'in_progress_tests': in_progress_tests,
-            'completed_tests': completed_tests,
-            'by_status': status_stats,
-            'by_priority': priority_stats,
-            'by_category': category_stats,
-        }
+        'stats': lab_test_section()
     }, status=status.HTTP_200_OK)
 
 
@@ -456,6 +426,8 @@ def lab_test_result_detail_view(request, test_id, result_id):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@cached_response(models=[LabTest, LabTestCategory])
+@replica_reads
 def lab_test_stats_view(request):
     """
     Get lab test statistics
@@ -468,50 +440,190 @@ def lab_test_stats_view(request):
             'message': 'Permission denied. Admin or Lab Technician access required.'
         }, status=status.HTTP_403_FORBIDDEN)
     
-    # Overall statistics
-    total_tests = LabTest.objects.count()
-    pending_tests = LabTest.objects.filter(status='pending').count()
-    in_progress_tests = LabTest.objects.filter(status='in_progress').count()
-    completed_tests = LabTest.objects.filter(status='completed').count()
-    
-    # Status breakdown
-    tests_by_status = LabTest.objects.values('status').annotate(count=Count('status'))
-    status_stats = {}
-    for item in tests_by_status:
-        status_stats[item['status']] = {
-            'name': dict(LabTest.STATUS_CHOICES).get(item['status'], item['status']),
-            'count': item['count']
-        }
-    
-    # Priority breakdown
-    tests_by_priority = LabTest.objects.values('priority').annotate(count=Count('priority'))
-    priority_stats = {}
-    for item in tests_by_priority:
-        priority_stats[item['priority']] = {
-            'name': dict(LabTest.PRIORITY_CHOICES).get(item['priority'], item['priority']),
-            'count': item['count']
+    # Shared with the dashboard; includes archived tests
+    return Response({
+        'success': True,
+        'stats': lab_test_section()
+    }, status=status.HTTP_200_OK)
+
+
+def _day_bounds(value, end_of_day=False):
+    """Aware start (or end) of a YYYY-MM-DD day; None if malformed"""
+    try:
+        day = datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        return None
+    return timezone.make_aware(datetime.combine(day, time.max if end_of_day else time.min))
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@replica_reads
+def abnormal_result_list_view(request):
+    """
+    Abnormal or critical lab results in a date range, newest first
+    GET /api/lab-tests/results/abnormal/
+    Query Params:
+        severity (str): abnormal (default, includes critical) or critical
+        start_date (str): YYYY-MM-DD (default: 7 days ago)
+        end_date (str): YYYY-MM-DD, inclusive (default: today)
+        parameter (str): Parameter name, e.g. Potassium
+        min_value (float): numeric value at least this
+        max_value (float): numeric value at most this
+        patient_id (int): Filter by patient
+        include_archived (bool): true to list archived results after the current ones
+        page (int): Page number
+        page_size (int): Items per page
+    """
+    severity = request.query_params.get('severity', 'abnormal')
+    if severity not in ('abnormal', 'critical'):
+        return Response({
+            'success': False,
+            'message': 'severity must be abnormal or critical'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    today = timezone.localdate()
+    start = _day_bounds(request.query_params.get('start_date') or str(today - timedelta(days=7)))
+    end = _day_bounds(request.query_params.get('end_date') or str(today), end_of_day=True)
+    if start is None or end is None:
+        return Response({
+            'success': False,
+            'message': 'Invalid date format. Use YYYY-MM-DD'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    # Served by the (is_abnormal|is_critical, observed_at) indexes
+    flag = 'is_critical' if severity == 'critical' else 'is_abnormal'
+    filters = {flag: True, 'observed_at__gte': start, 'observed_at__lte': end}
+
+    parameter = request.query_params.get('parameter')
+    if parameter:
+        filters['parameter_name__iexact'] = parameter
+
+    try:
+        for name, lookup in (('min_value', 'numeric_value__gte'), ('max_value', 'numeric_value__lte')):
+            value = request.query_params.get(name)
+            if value:
+                filters[lookup] = float(value)
+    except ValueError:
+        return Response({
+            'success': False,
+            'message': 'min_value and max_value must be numbers'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    patient_id = request.query_params.get('patient_id')
+    if patient_id:
+        # Denormalized onto the result, so this does not join lab_tests
+        filters['patient_id'] = patient_id
+
+    page_number = int(request.query_params.get('page', 1))
+    page_size = int(request.query_params.get('page_size', 50))
+    start_index = (page_number - 1) * page_size
+    end_index = start_index + page_size
+
+    columns = (
+        'id', 'test_id', 'test__test_name', 'patient_id', 'patient__first_name',
+        'patient__last_name', 'parameter_name', 'value', 'numeric_value', 'unit', 'normal_range',
+        'range_low', 'range_high', 'is_abnormal', 'is_critical', 'observed_at',
+    )
+    results = LabTestResult.objects.filter(**filters).order_by('-observed_at', '-id')
+    if include_archived(request):
+        archived_results = ArchivedLabTestResult.objects.filter(**filters).order_by('-observed_at', '-id')
+        page, archived_page, total_results = page_with_archive(results, archived_results, start_index, end_index)
+        rows = list(page.values(*columns)) + list(archived_page.values(*columns))
+    else:
+        total_results = results.count()
+        rows = results.values(*columns)[start_index:end_index]
+
+    data = [
+        {
+            'id': row['id'],
+            'test': row['test_id'],
+            'test_name': row['test__test_name'],
+            'patient': row['patient_id'],
+            'patient_name': f"{row['patient__first_name']} {row['patient__last_name']}".strip(),
+            'parameter_name': row['parameter_name'],
+            'value': row['value'],
+            'numeric_value': row['numeric_value'],
+            'unit': row['unit'],
+            'normal_range': row['normal_range'],
+            'range_low': row['range_low'],
+            'range_high': row['range_high'],
+            'is_abnormal': row['is_abnormal'],
+            'is_critical': row['is_critical'],
+            'observed_at': row['observed_at'],
         }
-    
-    # Category breakdown
-    tests_by_category = LabTest.objects.values('category__name').annotate(count=Count('category'))
-    category_stats = {}
-    for item in tests_by_category:
-        if item['category__name']:
-            category_stats[item['category__name']] = {
-                'name': item['category__name'],
-                'count': item['count']
-            }
-    
+        for row in rows
+    ]
     return Response({
         'success': True,
-        'stats': {
-            'total_tests': total_tests,
-            'pending_tests': pending_tests,
-            'in_progress_tests': in_progress_tests,
-            'completed_tests': completed_tests,
-            'by_status': status_stats,
-            'by_priority': priority_stats,
-            'by_category': category_stats,
+        'results': data,
+        'pagination': {
+            'total': total_results,
+            'page': page_number,
+            'page_size': page_size,
+            'total_pages': (total_results + page_size - 1) // page_size,
         }
     }, status=status.HTTP_200_OK)
 
+
+def _int_param(request, name):
+    value = request.GET.get(name)
+    if value in (None, ''):
+        return None
+    return int(value)
+
+
+def _authenticate(request):
+    """JWT from the Authorization header, or ``?token=`` since EventSource cannot send headers"""
+    token = request.GET.get('token')
+    if token and 'HTTP_AUTHORIZATION' not in request.META:
+        request.META['HTTP_AUTHORIZATION'] = f'Bearer {token}'
+    try:
+        result = JWTAuthentication().authenticate(request)
+    except (AuthenticationFailed, InvalidToken):
+        return None
+    return result[0] if result else None
+
+
+async def lab_test_events_view(request):
+    """
+    Stream lab test events as Server-Sent Events (see lab_tests/events.py).
+    Needs an ASGI server; the stream ends after LAB_EVENTS_STREAM_SECONDS and
+    EventSource reconnects with Last-Event-ID.
+    GET /api/lab-tests/events/
+    Query Params:
+        patient_id (int): Only this patient's tests
+        category_id (int): Only this category
+        ordered_by (int): Only tests ordered by this doctor
+        last_event_id (int): Resume after this event (the Last-Event-ID header wins)
+        token (str): Access token, when the Authorization header cannot be set
+    """
+    if request.method != 'GET':
+        return JsonResponse({'success': False, 'message': 'Method not allowed'}, status=status.HTTP_405_METHOD_NOT_ALLOWED)
+
+    user = await sync_to_async(_authenticate)(request)
+    if user is None or not user.is_active:
+        return JsonResponse({
+            'success': False,
+            'message': 'Authentication credentials were not provided or are invalid'
+        }, status=status.HTTP_401_UNAUTHORIZED)
+
+    try:
+        filters = {}
+        for param, field in (('patient_id', 'patient_id'), ('category_id', 'category_id'), ('ordered_by', 'ordered_by_id')):
+            value = _int_param(request, param)
+            if value is not None:
+                filters[field] = value
+        last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        return JsonResponse({
+            'success': False,
+            'message': 'patient_id, category_id, ordered_by and Last-Event-ID must be integers'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    response = StreamingHttpResponse(stream(last_event_id, filters), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Tell nginx not to buffer the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
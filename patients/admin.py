@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Patient
+from .models import Patient, PatientSummary
 
 
 @admin.register(Patient)
@@ -29,3 +29,9 @@ class PatientAdmin(admin.ModelAdmin):
         }),
     )
 
+
+
+@admin.register(PatientSummary)
+class PatientSummaryAdmin(admin.ModelAdmin):
+    list_display = ('patient', 'open_lab_tests', 'last_lab_date', 'outstanding_balance', 'invoice_count')
+    readonly_fields = ('patient', 'open_lab_tests', 'last_lab_date', 'outstanding_balance', 'invoice_count')
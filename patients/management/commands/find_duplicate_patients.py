@@ -0,0 +1,59 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+from django.core.serializers.json import DjangoJSONEncoder
+
+from patients.matching import DUPLICATE_THRESHOLD, MATCH_FIELDS, find_duplicate_clusters
+from patients.models import Patient
+
+
+class Command(BaseCommand):
+    help = 'Find clusters of likely duplicate patients across the whole table, scoring candidate pairs on a process pool'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, help='Scoring processes (default: CPU count)')
+        parser.add_argument('--threshold', type=float, default=DUPLICATE_THRESHOLD,
+                            help=f'Minimum pair score (default {DUPLICATE_THRESHOLD})')
+        parser.add_argument('--max-block-size', type=int, default=200,
+                            help='Skip blocking keys shared by more patients than this')
+        parser.add_argument('--output', help='Write the clusters as JSON to this file')
+        parser.add_argument('--limit', type=int, default=20, help='Clusters to print (default 20)')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        records = {
+            row['id']: row
+            for row in Patient.objects.order_by().values(*MATCH_FIELDS).iterator(chunk_size=10000)
+        }
+        clusters, stats = find_duplicate_clusters(
+            records,
+            workers=options['workers'],
+            threshold=options['threshold'],
+            max_block_size=options['max_block_size'],
+        )
+        elapsed = time.perf_counter() - started
+
+        for cluster in clusters[:options['limit']]:
+            names = ', '.join(
+                f"#{record_id} {records[record_id]['first_name']} {records[record_id]['last_name']}"
+                for record_id in cluster['ids']
+            )
+            best = max(score for _, _, score in cluster['pairs'])
+            self.stdout.write(f'{len(cluster["ids"])} patients (best score {best}): {names}')
+
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                json.dump([
+                    {
+                        'patients': [records[record_id] for record_id in cluster['ids']],
+                        'pairs': [{'a': a, 'b': b, 'score': score} for a, b, score in cluster['pairs']],
+                    }
+                    for cluster in clusters
+                ], fh, cls=DjangoJSONEncoder, indent=2)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(clusters)} clusters from {stats['matched_pairs']} matching pairs "
+            f"({stats['candidate_pairs']} candidate pairs, {stats['records']} patients, "
+            f"{stats['skipped_blocks']} oversized blocks skipped) in {elapsed:.1f}s"
+        ))
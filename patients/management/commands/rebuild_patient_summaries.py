@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from patients.models import Patient, PatientSummary
+from patients.summary import SUMMARY_FIELDS, compute_summaries
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute the per-patient summary counters (open lab tests, last lab date, '
+        'outstanding balance, invoice count) from the lab_tests and invoices tables'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--check', action='store_true', help='Only report patients whose summary is out of date')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        checked = stale = 0
+        last_id = 0
+        while True:
+            patient_ids = list(
+                Patient.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:batch_size]
+            )
+            if not patient_ids:
+                break
+            last_id = patient_ids[-1]
+
+            with transaction.atomic():
+                current = {
+                    row['patient_id']: row
+                    for row in PatientSummary.objects.select_for_update().filter(
+                        patient_id__in=patient_ids
+                    ).values('patient_id', *SUMMARY_FIELDS)
+                }
+                fresh = compute_summaries(patient_ids)
+                changed = [
+                    PatientSummary(patient_id=patient_id, **values)
+                    for patient_id, values in fresh.items()
+                    if any(current.get(patient_id, {}).get(field, object()) != values[field] for field in SUMMARY_FIELDS)
+                ]
+                if changed and not options['check']:
+                    PatientSummary.objects.bulk_create(
+                        changed, update_conflicts=True, unique_fields=['patient'], update_fields=list(SUMMARY_FIELDS),
+                    )
+            checked += len(patient_ids)
+            stale += len(changed)
+
+        if options['check']:
+            self.stdout.write(f'{stale} of {checked} patient summaries are out of date')
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Rebuilt {stale} of {checked} patient summaries'))
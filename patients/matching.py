@@ -0,0 +1,274 @@
+"""
+Duplicate-patient detection.
+
+Every patient stores three blocking keys next to its record (see
+``Patient.set_match_keys``): a Soundex code of the first and of the last
+name, and the last ten digits of the phone number. Together with
+``date_of_birth`` they are indexed, so finding the likely duplicates of a
+new registration is one query over a handful of index ranges: same phonetic
+name, same phone, or same birth date with the same phonetic first or last
+name. Only those candidates are scored in Python.
+
+``find_duplicate_clusters`` applies the same blocking to the whole table
+and scores the candidate pairs on a process pool
+(``manage.py find_duplicate_patients``).
+"""
+import multiprocessing
+import os
+import re
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor
+from difflib import SequenceMatcher
+from itertools import combinations
+
+from django.db.models import Q
+
+# Score at or above which two records are reported as likely the same person
+DUPLICATE_THRESHOLD = 0.6
+
+# Weights of the score components, summing to 1
+WEIGHTS = {
+    'name': 0.45,
+    'date_of_birth': 0.25,
+    'phone': 0.2,
+    'email': 0.1,
+}
+
+PHONE_DIGITS = 10
+
+MATCH_FIELDS = (
+    'id', 'first_name', 'last_name', 'date_of_birth', 'phone_number', 'email',
+    'first_name_key', 'last_name_key', 'phone_digits',
+)
+
+_SOUNDEX_CODES = {
+    **dict.fromkeys('BFPV', '1'),
+    **dict.fromkeys('CGJKQSXZ', '2'),
+    **dict.fromkeys('DT', '3'),
+    'L': '4',
+    **dict.fromkeys('MN', '5'),
+    'R': '6',
+}
+
+
+def normalize_name(name):
+    """Upper-case ASCII letters only: accents folded, spaces and punctuation dropped"""
+    folded = unicodedata.normalize('NFKD', name or '').encode('ascii', 'ignore').decode('ascii')
+    return re.sub(r'[^A-Z]', '', folded.upper())
+
+
+def soundex(name):
+    """American Soundex code of ``name`` ('' for a name without letters)"""
+    letters = normalize_name(name)
+    if not letters:
+        return ''
+    code = letters[0]
+    previous = _SOUNDEX_CODES.get(letters[0], '')
+    for letter in letters[1:]:
+        digit = _SOUNDEX_CODES.get(letter, '')
+        if digit and digit != previous:
+            code += digit
+            if len(code) == 4:
+                break
+        # H and W do not separate letters with the same code, vowels do
+        if letter not in 'HW':
+            previous = digit
+    return code.ljust(4, '0')
+
+
+def phone_digits(phone_number):
+    """Last ten digits, so +234 801 234 5678 and 0801-234-5678 compare equal"""
+    return re.sub(r'\D', '', phone_number or '')[-PHONE_DIGITS:]
+
+
+def match_keys(first_name, last_name, phone_number):
+    return {
+        'first_name_key': soundex(first_name),
+        'last_name_key': soundex(last_name),
+        'phone_digits': phone_digits(phone_number),
+    }
+
+
+def _similarity(a, b):
+    a, b = normalize_name(a), normalize_name(b)
+    if not a or not b:
+        return 0.0
+    return SequenceMatcher(None, a, b).ratio()
+
+
+def score(a, b):
+    """
+    ``(score, matched_on)`` for two records with the ``MATCH_FIELDS`` keys.
+    Names are compared as spelled (also with first and last swapped), the
+    other fields exactly.
+    """
+    straight = (_similarity(a['first_name'], b['first_name']) + _similarity(a['last_name'], b['last_name'])) / 2
+    swapped = (_similarity(a['first_name'], b['last_name']) + _similarity(a['last_name'], b['first_name'])) / 2
+    name = max(straight, swapped * 0.9)
+
+    matched_on = []
+    total = WEIGHTS['name'] * name
+    if name >= 0.8:
+        matched_on.append('name')
+    if a['date_of_birth'] and a['date_of_birth'] == b['date_of_birth']:
+        total += WEIGHTS['date_of_birth']
+        matched_on.append('date_of_birth')
+    if a['phone_digits'] and a['phone_digits'] == b['phone_digits']:
+        total += WEIGHTS['phone']
+        matched_on.append('phone')
+    if a['email'] and b['email'] and a['email'].lower() == b['email'].lower():
+        total += WEIGHTS['email']
+        matched_on.append('email')
+    return round(total, 3), matched_on
+
+
+def find_duplicates(data, exclude_id=None, limit=5, threshold=DUPLICATE_THRESHOLD):
+    """
+    Existing patients that look like ``data`` (a dict with first_name,
+    last_name, date_of_birth, phone_number and optionally email), best match
+    first, as ``[{'patient': row, 'score': ..., 'matched_on': [...]}]``
+    """
+    # models.py imports this module for the key functions
+    from .models import Patient
+
+    record = {
+        'first_name': data.get('first_name'),
+        'last_name': data.get('last_name'),
+        'date_of_birth': data.get('date_of_birth'),
+        'email': data.get('email'),
+        **match_keys(data.get('first_name'), data.get('last_name'), data.get('phone_number')),
+    }
+
+    blocks = Q()
+    if record['first_name_key'] and record['last_name_key']:
+        blocks |= Q(last_name_key=record['last_name_key'], first_name_key=record['first_name_key'])
+        # Swapped first and last name
+        blocks |= Q(last_name_key=record['first_name_key'], first_name_key=record['last_name_key'])
+    if record['phone_digits']:
+        blocks |= Q(phone_digits=record['phone_digits'])
+    if record['date_of_birth']:
+        if record['last_name_key']:
+            blocks |= Q(date_of_birth=record['date_of_birth'], last_name_key=record['last_name_key'])
+        if record['first_name_key']:
+            blocks |= Q(date_of_birth=record['date_of_birth'], first_name_key=record['first_name_key'])
+    if not blocks:
+        return []
+
+    candidates = Patient.objects.filter(blocks)
+    if exclude_id is not None:
+        candidates = candidates.exclude(pk=exclude_id)
+
+    matches = []
+    for row in candidates.order_by().values(*MATCH_FIELDS)[:200]:
+        total, matched_on = score(record, row)
+        if total >= threshold:
+            matches.append({'patient': row, 'score': total, 'matched_on': matched_on})
+    matches.sort(key=lambda match: (-match['score'], match['patient']['id']))
+    return matches[:limit]
+
+
+def blocking_pairs(records, max_block_size=200):
+    """
+    Candidate id pairs sharing a blocking key. Blocks larger than
+    ``max_block_size`` (a clinic's own phone number, a placeholder birth
+    date) carry no signal and would be quadratic, so they are skipped.
+    """
+    blocks = {}
+    for record in records.values():
+        keys = []
+        if record['first_name_key'] and record['last_name_key']:
+            name_key = tuple(sorted((record['first_name_key'], record['last_name_key'])))
+            keys.append(('name', name_key))
+        if record['phone_digits']:
+            keys.append(('phone', record['phone_digits']))
+        if record['date_of_birth']:
+            keys.append(('dob_last', record['date_of_birth'], record['last_name_key']))
+            keys.append(('dob_first', record['date_of_birth'], record['first_name_key']))
+        for key in keys:
+            blocks.setdefault(key, []).append(record['id'])
+
+    pairs = set()
+    skipped = 0
+    for ids in blocks.values():
+        if len(ids) > max_block_size:
+            skipped += 1
+            continue
+        pairs.update(combinations(sorted(ids), 2))
+    return pairs, skipped
+
+
+def _score_pairs(task):
+    """Pool task: ``(records by id, pairs, threshold)`` -> matching ``(a, b, score)``"""
+    records, pairs, threshold = task
+    matches = []
+    for a, b in pairs:
+        total, _ = score(records[a], records[b])
+        if total >= threshold:
+            matches.append((a, b, total))
+    return matches
+
+
+def _clusters(matches):
+    """Connected components of the matched pairs (union-find)"""
+    parent = {}
+
+    def find(node):
+        parent.setdefault(node, node)
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    for a, b, _ in matches:
+        root_a, root_b = find(a), find(b)
+        if root_a != root_b:
+            parent[max(root_a, root_b)] = min(root_a, root_b)
+
+    groups = {}
+    for node in parent:
+        groups.setdefault(find(node), []).append(node)
+    return [sorted(ids) for ids in groups.values()]
+
+
+def find_duplicate_clusters(records, workers=None, threshold=DUPLICATE_THRESHOLD, max_block_size=200, chunk_size=20000):
+    """
+    Group ``{id: record}`` into clusters of likely duplicates. Returns
+    ``(clusters, stats)``; each cluster is ``{'ids': [...], 'pairs': [(a, b, score)]}``.
+    """
+    workers = workers or os.cpu_count() or 1
+    pairs, skipped_blocks = blocking_pairs(records, max_block_size)
+    pairs = sorted(pairs)
+
+    # Each task carries only the records its pairs need
+    tasks = []
+    for start in range(0, len(pairs), chunk_size):
+        chunk = pairs[start:start + chunk_size]
+        needed = {record_id for pair in chunk for record_id in pair}
+        tasks.append(({record_id: records[record_id] for record_id in needed}, chunk, threshold))
+
+    if workers == 1 or len(tasks) < 2:
+        results = map(_score_pairs, tasks)
+        matches = [match for result in results for match in result]
+    else:
+        pool_context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks)), mp_context=pool_context) as pool:
+            matches = [match for result in pool.map(_score_pairs, tasks) for match in result]
+
+    pairs_by_root = {}
+    clusters = []
+    for ids in _clusters(matches):
+        cluster = {'ids': ids, 'pairs': []}
+        clusters.append(cluster)
+        for record_id in ids:
+            pairs_by_root[record_id] = cluster
+    for match in matches:
+        pairs_by_root[match[0]]['pairs'].append(match)
+    clusters.sort(key=lambda cluster: (-len(cluster['ids']), cluster['ids'][0]))
+
+    stats = {
+        'records': len(records),
+        'candidate_pairs': len(pairs),
+        'matched_pairs': len(matches),
+        'skipped_blocks': skipped_blocks,
+    }
+    return clusters, stats
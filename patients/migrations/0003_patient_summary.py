@@ -0,0 +1,61 @@
+# Generated by Django 5.0.3 on 2026-10-19 01:17
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Max, Q, Sum
+
+
+def populate_summaries(apps, schema_editor):
+    Patient = apps.get_model('patients', 'Patient')
+    PatientSummary = apps.get_model('patients', 'PatientSummary')
+    LabTest = apps.get_model('lab_tests', 'LabTest')
+    Invoice = apps.get_model('billing', 'Invoice')
+
+    summaries = {
+        patient_id: PatientSummary(patient_id=patient_id)
+        for patient_id in Patient.objects.values_list('id', flat=True)
+    }
+    lab_tests = LabTest.objects.order_by().values('patient_id').annotate(
+        open_lab_tests=Count('id', filter=Q(status__in=('pending', 'in_progress'))),
+        last_lab_date=Max('ordered_date'),
+    )
+    invoices = Invoice.objects.order_by().values('patient_id').annotate(
+        outstanding_balance=Sum('balance', filter=Q(status__in=('draft', 'pending', 'partial'))),
+        invoice_count=Count('id'),
+    )
+    for rows in (lab_tests, invoices):
+        for row in rows:
+            summary = summaries[row.pop('patient_id')]
+            for field, value in row.items():
+                setattr(summary, field, value)
+            summary.outstanding_balance = summary.outstanding_balance or 0
+    PatientSummary.objects.bulk_create(summaries.values(), batch_size=5000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('patients', '0002_patient_assigned_doctor'),
+        ('lab_tests', '0001_initial'),
+        ('billing', '0002_invoice_invoices_status_due_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PatientSummary',
+            fields=[
+                ('patient', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='summary', serialize=False, to='patients.patient')),
+                ('open_lab_tests', models.PositiveIntegerField(default=0)),
+                ('last_lab_date', models.DateTimeField(blank=True, null=True)),
+                ('outstanding_balance', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('invoice_count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Patient Summary',
+                'verbose_name_plural': 'Patient Summaries',
+                'db_table': 'patient_summaries',
+                'indexes': [models.Index(fields=['outstanding_balance'], name='patient_summ_balance_idx'), models.Index(fields=['open_lab_tests'], name='patient_summ_open_labs_idx'), models.Index(fields=['last_lab_date'], name='patient_summ_last_lab_idx')],
+            },
+        ),
+        migrations.RunPython(populate_summaries, migrations.RunPython.noop),
+    ]
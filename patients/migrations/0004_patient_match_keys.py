@@ -0,0 +1,62 @@
+# Generated by Django 5.0.3 on 2026-10-19 01:20
+
+from django.conf import settings
+from django.db import migrations, models
+
+from patients.matching import match_keys
+
+
+def populate_match_keys(apps, schema_editor):
+    Patient = apps.get_model('patients', 'Patient')
+    batch = []
+    for patient in Patient.objects.only('first_name', 'last_name', 'phone_number').iterator(chunk_size=5000):
+        for field, value in match_keys(patient.first_name, patient.last_name, patient.phone_number).items():
+            setattr(patient, field, value)
+        batch.append(patient)
+        if len(batch) == 5000:
+            Patient.objects.bulk_update(batch, ['first_name_key', 'last_name_key', 'phone_digits'])
+            batch = []
+    Patient.objects.bulk_update(batch, ['first_name_key', 'last_name_key', 'phone_digits'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('patients', '0003_patient_summary'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='patient',
+            name='first_name_key',
+            field=models.CharField(blank=True, default='', editable=False, max_length=4),
+        ),
+        migrations.AddField(
+            model_name='patient',
+            name='last_name_key',
+            field=models.CharField(blank=True, default='', editable=False, max_length=4),
+        ),
+        migrations.AddField(
+            model_name='patient',
+            name='phone_digits',
+            field=models.CharField(blank=True, default='', editable=False, max_length=10),
+        ),
+        migrations.AddIndex(
+            model_name='patient',
+            index=models.Index(fields=['last_name_key', 'first_name_key'], name='patients_name_key_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='patient',
+            index=models.Index(fields=['phone_digits'], name='patients_phone_digits_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='patient',
+            index=models.Index(fields=['date_of_birth', 'last_name_key'], name='patients_dob_last_key_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='patient',
+            index=models.Index(fields=['date_of_birth', 'first_name_key'], name='patients_dob_first_key_idx'),
+        ),
+        migrations.RunPython(populate_match_keys, migrations.RunPython.noop),
+    ]
@@ -1,9 +1,17 @@
 from django.db import models
 from django.contrib.auth import get_user_model
+from .matching import match_keys
 
 User = get_user_model()
 
 
+class PatientManager(models.Manager):
+    """Hides patients that are deleted but not yet purged (core/purge.py)"""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
 class Patient(models.Model):
     """
     Patient model for storing patient information
@@ -71,16 +79,45 @@ class Patient(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='patients_created')
+    # Set by the delete endpoint; the purge job then removes the row and its records
+    deleted_at = models.DateTimeField(blank=True, null=True, editable=False)
+    
+    # Duplicate detection blocking keys, derived on save (patients/matching.py)
+    first_name_key = models.CharField(max_length=4, blank=True, default='', editable=False)
+    last_name_key = models.CharField(max_length=4, blank=True, default='', editable=False)
+    phone_digits = models.CharField(max_length=10, blank=True, default='', editable=False)
+    
+    objects = PatientManager()
+    all_objects = models.Manager()
     
     class Meta:
         db_table = 'patients'
         verbose_name = 'Patient'
         verbose_name_plural = 'Patients'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['last_name_key', 'first_name_key'], name='patients_name_key_idx'),
+            models.Index(fields=['phone_digits'], name='patients_phone_digits_idx'),
+            models.Index(fields=['date_of_birth', 'last_name_key'], name='patients_dob_last_key_idx'),
+            models.Index(fields=['date_of_birth', 'first_name_key'], name='patients_dob_first_key_idx'),
+            # Delta sync (core/sync.py)
+            models.Index(fields=['updated_at', 'id'], name='patients_updated_idx'),
+        ]
     
     def __str__(self):
         return f"{self.full_name} ({self.phone_number})"
     
+    def set_match_keys(self):
+        for field, value in match_keys(self.first_name, self.last_name, self.phone_number).items():
+            setattr(self, field, value)
+    
+    def save(self, *args, **kwargs):
+        self.set_match_keys()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'first_name', 'last_name', 'phone_number'} & set(update_fields):
+            kwargs['update_fields'] = set(update_fields) | {'first_name_key', 'last_name_key', 'phone_digits'}
+        super().save(*args, **kwargs)
+    
     @property
     def full_name(self):
         return f"{self.first_name} {self.last_name}".strip()
@@ -91,3 +128,30 @@ class Patient(models.Model):
         today = date.today()
         return today.year - self.date_of_birth.year - ((today.month, today.day) < (self.date_of_birth.month, self.date_of_birth.day))
 
+
+
+class PatientSummary(models.Model):
+    """
+    Denormalized per-patient counters for headers and lists, kept in step
+    with the patient's lab tests and invoices by patients/summary.py.
+    ``manage.py rebuild_patient_summaries`` recomputes them from scratch.
+    """
+    patient = models.OneToOneField(Patient, on_delete=models.CASCADE, primary_key=True, related_name='summary')
+    open_lab_tests = models.PositiveIntegerField(default=0)
+    last_lab_date = models.DateTimeField(blank=True, null=True)
+    outstanding_balance = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    invoice_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        db_table = 'patient_summaries'
+        verbose_name = 'Patient Summary'
+        verbose_name_plural = 'Patient Summaries'
+        indexes = [
+            # Filters and sort keys of the patient list
+            models.Index(fields=['outstanding_balance'], name='patient_summ_balance_idx'),
+            models.Index(fields=['open_lab_tests'], name='patient_summ_open_labs_idx'),
+            models.Index(fields=['last_lab_date'], name='patient_summ_last_lab_idx'),
+        ]
+
+    def __str__(self):
+        return f"Summary for patient #{self.patient_id}"
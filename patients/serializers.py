@@ -1,16 +1,45 @@
 from rest_framework import serializers
 from .models import Patient
 from django.contrib.auth import get_user_model
+from core.rows import RowSerializer, Computed, age_from_birth_date, user_name_column
+from core.metrics import TimedSerializerMixin
 
 User = get_user_model()
 
 
-class PatientSerializer(serializers.ModelSerializer):
+def validate_unique_email(value, instance=None):
+    """
+    Email uniqueness across every patient row, including deleted patients
+    the purge job has not removed yet: the database still holds their email
+    """
+    if not value:
+        return value
+    others = Patient.all_objects.filter(email=value)
+    if instance is not None:
+        others = others.exclude(pk=instance.pk)
+    deleted_at = list(others.values_list('deleted_at', flat=True))
+    if not deleted_at:
+        return value
+    if all(deleted_at):
+        raise serializers.ValidationError(
+            "A deleted patient with this email is still being removed. Try again once the deletion has finished."
+        )
+    raise serializers.ValidationError("A patient with this email already exists.")
+
+
+class PatientSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Serializer for Patient model"""
     full_name = serializers.ReadOnlyField()
     age = serializers.ReadOnlyField()
     created_by_name = serializers.SerializerMethodField()
     assigned_doctor_name = serializers.SerializerMethodField()
+    # Denormalized counters from PatientSummary (patients/summary.py)
+    open_lab_tests = serializers.IntegerField(source='summary.open_lab_tests', read_only=True)
+    last_lab_date = serializers.DateTimeField(source='summary.last_lab_date', read_only=True)
+    outstanding_balance = serializers.DecimalField(
+        source='summary.outstanding_balance', max_digits=12, decimal_places=2, read_only=True
+    )
+    invoice_count = serializers.IntegerField(source='summary.invoice_count', read_only=True)
     
     class Meta:
         model = Patient
@@ -21,9 +50,14 @@ class PatientSerializer(serializers.ModelSerializer):
             'emergency_contact_phone', 'emergency_contact_relationship',
             'allergies', 'medical_conditions', 'medications', 'insurance_provider',
             'insurance_policy_number', 'notes', 'is_active', 'assigned_doctor',
-            'assigned_doctor_name', 'created_at', 'updated_at', 'created_by', 'created_by_name'
+            'assigned_doctor_name', 'open_lab_tests', 'last_lab_date', 'outstanding_balance',
+            'invoice_count', 'created_at', 'updated_at', 'created_by', 'created_by_name'
         )
         read_only_fields = ('id', 'created_at', 'updated_at', 'created_by')
+
+    def validate_email(self, value):
+        """Validate email uniqueness if provided"""
+        return validate_unique_email(value, self.instance)
     
     def get_created_by_name(self, obj):
         if obj.created_by:
@@ -36,7 +70,16 @@ class PatientSerializer(serializers.ModelSerializer):
         return None
 
 
-class PatientCreateSerializer(serializers.ModelSerializer):
+# Fast read path for list endpoints, same output as PatientSerializer
+patient_rows = RowSerializer(PatientSerializer, computed={
+    'full_name': Computed(('first_name', 'last_name'), lambda first, last: f"{first} {last}".strip()),
+    'age': Computed(('date_of_birth',), age_from_birth_date),
+    'assigned_doctor_name': user_name_column('assigned_doctor'),
+    'created_by_name': user_name_column('created_by'),
+})
+
+
+class PatientCreateSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Serializer for creating a new patient"""
     
     class Meta:
@@ -52,10 +95,7 @@ class PatientCreateSerializer(serializers.ModelSerializer):
     
     def validate_email(self, value):
         """Validate email uniqueness if provided"""
-        if value:
-            if Patient.objects.filter(email=value).exists():
-                raise serializers.ValidationError("A patient with this email already exists.")
-        return value
+        return validate_unique_email(value)
     
     def validate_phone_number(self, value):
         """Validate phone number is provided"""
@@ -0,0 +1,30 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from billing.models import Invoice
+from lab_tests.models import LabTest
+from .models import Patient, PatientSummary
+from .summary import refresh_summary
+
+
+@receiver(post_save, sender=Patient)
+def create_patient_summary(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        PatientSummary.objects.create(patient=instance)
+
+
+@receiver(post_save, sender=LabTest)
+@receiver(post_save, sender=Invoice)
+def refresh_summary_on_save(sender, instance, raw=False, **kwargs):
+    if not raw:
+        refresh_summary(instance.patient_id)
+
+
+@receiver(post_delete, sender=LabTest)
+@receiver(post_delete, sender=Invoice)
+def refresh_summary_on_delete(sender, instance, origin=None, **kwargs):
+    if isinstance(origin, Patient) or getattr(origin, 'model', None) is Patient:
+        # Cascading from the patient's own deletion, the summary goes with it
+        return
+    refresh_summary(instance.patient_id, create=False)
+
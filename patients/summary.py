@@ -0,0 +1,108 @@
+"""
+Per-patient summary counters (``PatientSummary``).
+
+Every save or delete of a lab test or invoice (payments re-save their
+invoice) recomputes its patient's row inside the same transaction: the summary row is locked first,
+so concurrent writers for one patient queue up and each recount sees the
+other's committed rows. The recount is two aggregate queries over a single
+patient's rows, which keeps the counters exact across status changes
+without tracking deltas.
+
+Archived lab tests and invoices (core/archive.py) still count towards
+``last_lab_date`` and ``invoice_count``, which costs one more indexed
+aggregate per archive table. The archive never holds open tests or unpaid
+invoices, so the other counters only need the hot tables.
+
+Writes that bypass model signals (``bulk_create``, queryset ``update()``)
+are not tracked; run ``manage.py rebuild_patient_summaries`` after them.
+"""
+from django.db import transaction
+from django.db.models import Count, Max, Q, Sum
+
+from billing.models import ArchivedInvoice, Invoice
+from lab_tests.models import ArchivedLabTest, LabTest
+from .models import Patient, PatientSummary
+
+# Lab tests still waiting for a result
+OPEN_LAB_TEST_STATUSES = ('pending', 'in_progress')
+
+# Invoice statuses that still expect a payment
+OPEN_INVOICE_STATUSES = ('draft', 'pending', 'partial')
+
+SUMMARY_FIELDS = ('open_lab_tests', 'last_lab_date', 'outstanding_balance', 'invoice_count')
+
+
+def lab_test_aggregates():
+    return {
+        'open_lab_tests': Count('id', filter=Q(status__in=OPEN_LAB_TEST_STATUSES)),
+        'last_lab_date': Max('ordered_date'),
+    }
+
+
+def invoice_aggregates():
+    return {
+        'outstanding_balance': Sum('balance', filter=Q(status__in=OPEN_INVOICE_STATUSES)),
+        'invoice_count': Count('id'),
+    }
+
+
+def archived_aggregates():
+    return {
+        ArchivedLabTest: {'last_lab_date': Max('ordered_date')},
+        ArchivedInvoice: {'invoice_count': Count('id')},
+    }
+
+
+def _add_archived(summary, archived):
+    if archived.get('last_lab_date') and (
+        summary['last_lab_date'] is None or archived['last_lab_date'] > summary['last_lab_date']
+    ):
+        summary['last_lab_date'] = archived['last_lab_date']
+    summary['invoice_count'] += archived.get('invoice_count') or 0
+
+
+def empty_summary():
+    return {'open_lab_tests': 0, 'last_lab_date': None, 'outstanding_balance': 0, 'invoice_count': 0}
+
+
+def compute_summary(patient_id):
+    values = LabTest.objects.filter(patient_id=patient_id).aggregate(**lab_test_aggregates())
+    values.update(Invoice.objects.filter(patient_id=patient_id).aggregate(**invoice_aggregates()))
+    values['outstanding_balance'] = values['outstanding_balance'] or 0
+    for model, aggregates in archived_aggregates().items():
+        _add_archived(values, model.objects.filter(patient_id=patient_id).aggregate(**aggregates))
+    return values
+
+
+def compute_summaries(patient_ids):
+    """``{patient id: summary values}`` for many patients, in four grouped queries"""
+    summaries = {patient_id: empty_summary() for patient_id in patient_ids}
+    for model, aggregates in ((LabTest, lab_test_aggregates()), (Invoice, invoice_aggregates())):
+        rows = model.objects.filter(patient_id__in=patient_ids).order_by().values('patient_id').annotate(**aggregates)
+        for row in rows:
+            summary = summaries[row.pop('patient_id')]
+            summary.update(row)
+            summary['outstanding_balance'] = summary['outstanding_balance'] or 0
+    for model, aggregates in archived_aggregates().items():
+        rows = model.objects.filter(patient_id__in=patient_ids).order_by().values('patient_id').annotate(**aggregates)
+        for row in rows:
+            _add_archived(summaries[row.pop('patient_id')], row)
+    return summaries
+
+
+def refresh_summary(patient_id, create=True):
+    """
+    Recount one patient's summary in the current transaction, creating the
+    row if it is missing (unless ``create`` is False, as when deleting)
+    """
+    with transaction.atomic():
+        locked = bool(list(
+            PatientSummary.objects.select_for_update().filter(patient_id=patient_id).values_list('pk', flat=True)
+        ))
+        if not locked and not create:
+            return
+        values = compute_summary(patient_id)
+        if locked:
+            PatientSummary.objects.filter(patient_id=patient_id).update(**values)
+        elif create and Patient.objects.filter(pk=patient_id).exists():
+            PatientSummary.objects.create(patient_id=patient_id, **values)
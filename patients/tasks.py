@@ -0,0 +1,16 @@
+from core.purge import purge
+from jobs.queue import report_progress
+from jobs.registry import register
+from .models import Patient, PatientSummary
+
+
+@register('patients.purge', max_attempts=5)
+def purge_patient_job(params, job):
+    patient = Patient.all_objects.filter(pk=params['patient_id'], deleted_at__isnull=False).first()
+    if patient is None:
+        # Already purged by an earlier attempt
+        return None
+    # Dropped first, so deleting the lab tests and invoices does not recount it each time
+    PatientSummary.objects.filter(patient=patient).delete()
+    counts = purge(patient, on_progress=lambda **progress: report_progress(job, **progress))
+    return {'patient_id': params['patient_id'], 'purged': counts}
@@ -0,0 +1,59 @@
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from jobs.models import Job
+from .models import Patient
+
+User = get_user_model()
+
+
+class DeletedPatientEmailTests(TestCase):
+    """A deleted patient keeps their email in the table until the purge job runs"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            username='admin', email='admin@example.com', password='secret-pass', role='admin'
+        )
+
+    def setUp(self):
+        token = RefreshToken.for_user(self.admin).access_token
+        self.client.defaults.update(HTTP_HOST='localhost', HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def patient_data(self, **overrides):
+        return {
+            'first_name': 'Ada', 'last_name': 'Obi', 'date_of_birth': '1990-01-01',
+            'gender': 'female', 'phone_number': '0800000000', 'email': 'ada@example.com',
+            **overrides,
+        }
+
+    def test_recreating_a_deleted_patient_before_the_purge_is_a_400(self):
+        patient = Patient.objects.create(
+            first_name='Ada', last_name='Obi', date_of_birth=date(1990, 1, 1),
+            gender='female', phone_number='0800000000', email='ada@example.com',
+        )
+        response = self.client.delete(f'/api/patients/{patient.pk}/delete/')
+        self.assertEqual(response.status_code, 202)
+        self.assertTrue(Job.objects.filter(kind='patients.purge', status='queued').exists())
+
+        response = self.client.post('/api/patients/create/', self.patient_data(), content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('still being removed', str(response.json()))
+
+    def test_updating_to_a_deleted_patients_email_is_a_400(self):
+        deleted = Patient.objects.create(
+            first_name='Ada', last_name='Obi', date_of_birth=date(1990, 1, 1),
+            gender='female', phone_number='0800000000', email='ada@example.com',
+        )
+        self.client.delete(f'/api/patients/{deleted.pk}/delete/')
+        other = Patient.objects.create(
+            first_name='Bola', last_name='Ade', date_of_birth=date(1985, 5, 5),
+            gender='male', phone_number='0800000001',
+        )
+        response = self.client.put(
+            f'/api/patients/{other.pk}/update/', {'email': 'ada@example.com'}, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 400)
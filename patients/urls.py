@@ -8,6 +8,8 @@ urlpatterns = [
     path('create/', views.patient_create_view, name='patient_create'),
     path('stats/', views.patient_stats_view, name='patient_stats'),
     path('<int:pk>/', views.patient_detail_view, name='patient_detail'),
+    path('<int:pk>/chart/', views.patient_chart_view, name='patient_chart'),
+    path('<int:pk>/lab-trends/', views.patient_lab_trends_view, name='patient_lab_trends'),
     path('<int:pk>/update/', views.patient_update_view, name='patient_update'),
     path('<int:pk>/delete/', views.patient_delete_view, name='patient_delete'),
 ]
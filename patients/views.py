@@ -2,9 +2,34 @@ from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from django.db.models import Q
+from datetime import datetime, time
+from decimal import Decimal, InvalidOperation
+from django.db.models import Count, F, Prefetch, Q, Sum
+from django.utils import timezone
 from .models import Patient
-from .serializers import PatientSerializer, PatientCreateSerializer
+from .matching import find_duplicates
+from .summary import OPEN_INVOICE_STATUSES
+from .serializers import PatientSerializer, PatientCreateSerializer, patient_rows
+from billing.models import Invoice, InvoiceItem, Payment
+from billing.serializers import InvoiceSerializer
+from lab_tests.models import LabTest
+from lab_tests.serializers import lab_test_rows
+from lab_tests.trends import MAX_PARAMETERS, available_parameters, trend_series
+from core.replicas import replica_reads
+from core.response_cache import cached_response
+from core.idempotency import idempotent
+from jobs.queue import enqueue
+from jobs.serializers import JobSerializer
+
+# ?ordering= keys of the patient list (prefix with - for descending)
+PATIENT_ORDERING = {
+    'created_at': 'created_at',
+    'last_name': 'last_name',
+    'outstanding_balance': 'summary__outstanding_balance',
+    'open_lab_tests': 'summary__open_lab_tests',
+    'last_lab_date': 'summary__last_lab_date',
+    'invoice_count': 'summary__invoice_count',
+}
 
 
 @api_view(['GET'])
@@ -19,6 +44,11 @@ def patient_list_view(request):
         is_active (bool): Filter by active status
         assigned_doctor_id (int): Filter by assigned doctor
         my_patients (bool): If true and user is doctor, show only their assigned patients
+        has_balance (bool): Only patients with (true) or without (false) an outstanding balance
+        min_balance (decimal): Outstanding balance at least this amount
+        has_open_lab_tests (bool): Only patients with (true) or without (false) open lab tests
+        ordering (str): created_at, last_name, outstanding_balance, open_lab_tests,
+            last_lab_date or invoice_count; prefix with - for descending (default -created_at)
         page (int): Page number
         page_size (int): Number of items per page
     """
@@ -52,6 +82,39 @@ def patient_list_view(request):
         is_active_bool = is_active.lower() == 'true'
         patients = patients.filter(is_active=is_active_bool)
     
+    # Summary counter filters
+    has_balance = request.query_params.get('has_balance')
+    if has_balance is not None:
+        balance_filter = Q(summary__outstanding_balance__gt=0)
+        patients = patients.filter(balance_filter if has_balance.lower() == 'true' else ~balance_filter)
+    
+    min_balance = request.query_params.get('min_balance')
+    if min_balance:
+        try:
+            patients = patients.filter(summary__outstanding_balance__gte=Decimal(min_balance))
+        except InvalidOperation:
+            return Response({
+                'success': False,
+                'message': 'min_balance must be a number'
+            }, status=status.HTTP_400_BAD_REQUEST)
+    
+    has_open_lab_tests = request.query_params.get('has_open_lab_tests')
+    if has_open_lab_tests is not None:
+        open_filter = Q(summary__open_lab_tests__gt=0)
+        patients = patients.filter(open_filter if has_open_lab_tests.lower() == 'true' else ~open_filter)
+    
+    ordering = request.query_params.get('ordering')
+    if ordering:
+        descending = ordering.startswith('-')
+        field = PATIENT_ORDERING.get(ordering.lstrip('-'))
+        if field is None:
+            return Response({
+                'success': False,
+                'message': f"Invalid ordering. Use one of: {', '.join(PATIENT_ORDERING)}"
+            }, status=status.HTTP_400_BAD_REQUEST)
+        order_by = F(field).desc(nulls_last=True) if descending else F(field).asc(nulls_last=True)
+        patients = patients.order_by(order_by, '-id')
+    
     # Pagination
     page_number = int(request.query_params.get('page', 1))
     page_size = int(request.query_params.get('page_size', 20))
@@ -61,10 +124,9 @@ def patient_list_view(request):
     total_patients = patients.count()
     paginated_patients = patients[start_index:end_index]
     
-    serializer = PatientSerializer(paginated_patients, many=True)
     return Response({
         'success': True,
-        'patients': serializer.data,
+        'patients': patient_rows.serialize(paginated_patients),
         'pagination': {
             'total': total_patients,
             'page': page_number,
@@ -74,21 +136,49 @@ def patient_list_view(request):
     }, status=status.HTTP_200_OK)
 
 
+def _duplicate_rows(data, exclude_id=None):
+    return [
+        {
+            'id': match['patient']['id'],
+            'full_name': f"{match['patient']['first_name']} {match['patient']['last_name']}".strip(),
+            'date_of_birth': match['patient']['date_of_birth'],
+            'phone_number': match['patient']['phone_number'],
+            'email': match['patient']['email'],
+            'score': match['score'],
+            'matched_on': match['matched_on'],
+        }
+        for match in find_duplicates(data, exclude_id=exclude_id)
+    ]
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@idempotent
 def patient_create_view(request):
     """
     Create a new patient
     POST /api/patients/create/
+    Query Params:
+        dry_run (bool): If true, only validate and return possible duplicates
+
+    The response lists existing patients that look like the new one
+    (``possible_duplicates``, best match first).
     """
     serializer = PatientCreateSerializer(data=request.data)
     
     if serializer.is_valid():
+        if request.query_params.get('dry_run', '').lower() == 'true':
+            return Response({
+                'success': True,
+                'possible_duplicates': _duplicate_rows(serializer.validated_data),
+            }, status=status.HTTP_200_OK)
+        
         patient = serializer.save(created_by=request.user)
         return Response({
             'success': True,
             'message': 'Patient created successfully',
-            'patient': PatientSerializer(patient).data
+            'patient': PatientSerializer(patient).data,
+            'possible_duplicates': _duplicate_rows(serializer.validated_data, exclude_id=patient.pk),
         }, status=status.HTTP_201_CREATED)
     
     # Return detailed error messages
@@ -115,7 +205,7 @@ def patient_detail_view(request, pk):
     GET /api/patients/<id>/
     """
     try:
-        patient = Patient.objects.get(pk=pk)
+        patient = Patient.objects.select_related('summary', 'assigned_doctor', 'created_by').get(pk=pk)
         serializer = PatientSerializer(patient)
         return Response({
             'success': True,
@@ -128,6 +218,138 @@ def patient_detail_view(request, pk):
         }, status=status.HTTP_404_NOT_FOUND)
 
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def patient_chart_view(request, pk):
+    """
+    Everything needed to open a patient in one request
+    GET /api/patients/<id>/chart/
+    Query Params:
+        lab_tests_limit (int): Most recent lab tests to include (default 10, max 50)
+        invoices_limit (int): Open invoices to include (default 10, max 50)
+
+    Built from a fixed set of queries regardless of how much history the
+    patient has: the patient, one page of lab tests plus their results, one
+    page of open invoices plus their items and payments, and two grouped
+    queries for the summary counts.
+    """
+    lab_tests_limit = min(int(request.query_params.get('lab_tests_limit', 10)), 50)
+    invoices_limit = min(int(request.query_params.get('invoices_limit', 10)), 50)
+    
+    patient = patient_rows.serialize(Patient.objects.filter(pk=pk))
+    if not patient:
+        return Response({
+            'success': False,
+            'message': 'Patient not found'
+        }, status=status.HTTP_404_NOT_FOUND)
+    
+    lab_tests = lab_test_rows.serialize(
+        LabTest.objects.filter(patient_id=pk).order_by('-ordered_date', '-created_at')[:lab_tests_limit]
+    )
+    
+    open_invoices = Invoice.objects.filter(
+        patient_id=pk, status__in=OPEN_INVOICE_STATUSES
+    ).select_related('patient', 'created_by').prefetch_related(
+        Prefetch('items', queryset=InvoiceItem.objects.select_related('service')),
+        Prefetch('payments', queryset=Payment.objects.select_related('processed_by')),
+    ).order_by('-invoice_date', '-created_at')[:invoices_limit]
+    
+    lab_tests_by_status = {
+        item['status']: item['count']
+        for item in LabTest.objects.filter(patient_id=pk).values('status').annotate(count=Count('id'))
+    }
+    invoice_totals = Invoice.objects.filter(patient_id=pk).aggregate(
+        total=Count('id'),
+        open=Count('id', filter=Q(status__in=OPEN_INVOICE_STATUSES)),
+        outstanding_balance=Sum('balance', filter=Q(status__in=OPEN_INVOICE_STATUSES)),
+    )
+    
+    return Response({
+        'success': True,
+        'chart': {
+            'patient': patient[0],
+            'lab_tests': lab_tests,
+            'open_invoices': InvoiceSerializer(open_invoices, many=True).data,
+            'summary': {
+                'lab_tests': {
+                    'total': sum(lab_tests_by_status.values()),
+                    'by_status': lab_tests_by_status,
+                },
+                'invoices': {
+                    'total': invoice_totals['total'],
+                    'open': invoice_totals['open'],
+                    'outstanding_balance': float(invoice_totals['outstanding_balance'] or 0),
+                },
+            },
+        }
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def patient_lab_trends_view(request, pk):
+    """
+    Time series of a patient's numeric lab results
+    GET /api/patients/<id>/lab-trends/
+    Query Params:
+        parameters (str): Comma-separated parameter names, e.g. HbA1c,Creatinine
+            (omit to list the parameters the patient has results for)
+        start_date (str): YYYY-MM-DD
+        end_date (str): YYYY-MM-DD, inclusive
+        max_points (int): Downsample each series to at most this many points
+
+    Each series is parallel arrays: ``t`` (epoch milliseconds), ``v`` and
+    ``flags`` (0 normal, 1 abnormal, 2 critical).
+    """
+    if not Patient.objects.filter(pk=pk).exists():
+        return Response({
+            'success': False,
+            'message': 'Patient not found'
+        }, status=status.HTTP_404_NOT_FOUND)
+
+    parameters = [name.strip() for name in request.query_params.get('parameters', '').split(',') if name.strip()]
+    if not parameters:
+        return Response({
+            'success': True,
+            'parameters': available_parameters(pk),
+        }, status=status.HTTP_200_OK)
+    if len(parameters) > MAX_PARAMETERS:
+        return Response({
+            'success': False,
+            'message': f'At most {MAX_PARAMETERS} parameters per request'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    bounds = {}
+    for name, end_of_day in (('start_date', False), ('end_date', True)):
+        value = request.query_params.get(name)
+        if value:
+            try:
+                day = datetime.strptime(value, '%Y-%m-%d').date()
+            except ValueError:
+                return Response({
+                    'success': False,
+                    'message': 'Invalid date format. Use YYYY-MM-DD'
+                }, status=status.HTTP_400_BAD_REQUEST)
+            bounds[name] = timezone.make_aware(datetime.combine(day, time.max if end_of_day else time.min))
+
+    max_points = request.query_params.get('max_points')
+    if max_points is not None:
+        if not max_points.isdigit() or int(max_points) < 3:
+            return Response({
+                'success': False,
+                'message': 'max_points must be an integer of at least 3'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        max_points = int(max_points)
+
+    return Response({
+        'success': True,
+        'patient': pk,
+        'series': trend_series(
+            pk, parameters, start=bounds.get('start_date'), end=bounds.get('end_date'), max_points=max_points,
+        ),
+    }, status=status.HTTP_200_OK)
+
+
 @api_view(['PUT', 'PATCH'])
 @permission_classes([IsAuthenticated])
 def patient_update_view(request, pk):
@@ -136,7 +358,7 @@ def patient_update_view(request, pk):
     PUT/PATCH /api/patients/<id>/update/
     """
     try:
-        patient = Patient.objects.get(pk=pk)
+        patient = Patient.objects.select_related('summary', 'assigned_doctor', 'created_by').get(pk=pk)
         serializer = PatientSerializer(patient, data=request.data, partial=True)
         
         if serializer.is_valid():
@@ -162,16 +384,20 @@ def patient_update_view(request, pk):
 @permission_classes([IsAuthenticated])
 def patient_delete_view(request, pk):
     """
-    Delete patient
+    Delete patient. The patient disappears at once; their lab tests and
+    invoices are removed by a background job whose progress can be polled.
     DELETE /api/patients/<id>/delete/
     """
     try:
         patient = Patient.objects.get(pk=pk)
-        patient.delete()
+        patient.deleted_at = timezone.now()
+        patient.save(update_fields=['deleted_at', 'updated_at'])
+        job = enqueue('patients.purge', {'patient_id': patient.pk}, user=request.user)
         return Response({
             'success': True,
-            'message': 'Patient deleted successfully'
-        }, status=status.HTTP_200_OK)
+            'message': 'Patient deleted successfully',
+            'job': JobSerializer(job).data
+        }, status=status.HTTP_202_ACCEPTED)
     except Patient.DoesNotExist:
         return Response({
             'success': False,
@@ -181,13 +407,13 @@ def patient_delete_view(request, pk):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@cached_response(models=[Patient])
+@replica_reads
 def patient_stats_view(request):
     """
     Get patient statistics
     GET /api/patients/stats/
     """
-    from django.db.models import Count
-    
     total_patients = Patient.objects.count()
     active_patients = Patient.objects.filter(is_active=True).count()
     inactive_patients = Patient.objects.filter(is_active=False).count()
@@ -0,0 +1,162 @@
+"""
+Admin home-screen dashboard (``/api/reports/dashboard/``).
+
+Carries the figures of the patient, staff, lab test and billing stats
+endpoints, but each section is one grouped or conditional aggregate query
+instead of a count per figure (plus one over the archive table for lab
+tests and invoices, see core/archive.py), so the whole dashboard is six
+queries. Sections can be requested on their own (``?sections=billing``) to
+refresh a single panel.
+"""
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from billing.models import ArchivedInvoice, Invoice
+from lab_tests.models import ArchivedLabTest, LabTest
+from patients.models import Patient
+
+User = get_user_model()
+
+
+def _breakdown(rows, key, choices):
+    """Grouped rows -> ``{code: {name, count}}`` summed over the other group columns"""
+    names = dict(choices)
+    stats = {}
+    for row in rows:
+        code = row[key]
+        if code is None:
+            continue
+        entry = stats.setdefault(code, {'name': names.get(code, code), 'count': 0})
+        entry['count'] += row['count']
+    return stats
+
+
+def patient_section():
+    rows = list(Patient.objects.order_by().values('gender', 'is_active').annotate(count=Count('id')))
+    active = sum(row['count'] for row in rows if row['is_active'])
+    total = sum(row['count'] for row in rows)
+    return {
+        'total_patients': total,
+        'active_patients': active,
+        'inactive_patients': total - active,
+        'by_gender': _breakdown(rows, 'gender', Patient.GENDER_CHOICES),
+    }
+
+
+def staff_section():
+    rows = list(User.objects.order_by().values('role', 'is_active').annotate(count=Count('id')))
+    active = sum(row['count'] for row in rows if row['is_active'])
+    total = sum(row['count'] for row in rows)
+    counts = _breakdown(rows, 'role', User.ROLE_CHOICES)
+    return {
+        'total_staff': total,
+        'active_staff': active,
+        'inactive_staff': total - active,
+        'by_role': {
+            code: {'name': name, 'count': counts.get(code, {}).get('count', 0)}
+            for code, name in User.ROLE_CHOICES
+        },
+    }
+
+
+def lab_test_section():
+    rows = []
+    for model in (LabTest, ArchivedLabTest):
+        rows.extend(
+            model.objects.order_by()
+            .values('status', 'priority', 'category__name')
+            .annotate(count=Count('id'))
+        )
+    by_status = _breakdown(rows, 'status', LabTest.STATUS_CHOICES)
+
+    def status_count(code):
+        return by_status.get(code, {}).get('count', 0)
+
+    return {
+        'total_tests': sum(row['count'] for row in rows),
+        'pending_tests': status_count('pending'),
+        'in_progress_tests': status_count('in_progress'),
+        'completed_tests': status_count('completed'),
+        'by_status': by_status,
+        'by_priority': _breakdown(rows, 'priority', LabTest.PRIORITY_CHOICES),
+        'by_category': _breakdown(rows, 'category__name', ()),
+    }
+
+
+def _month_starts(today, months):
+    """First days of the last ``months`` calendar months, oldest first"""
+    starts = []
+    year, month = today.year, today.month
+    for _ in range(months):
+        starts.append(date(year, month, 1))
+        year, month = (year - 1, 12) if month == 1 else (year, month - 1)
+    return starts[::-1]
+
+
+def billing_section(months=6):
+    today = timezone.now().date()
+    month_starts = _month_starts(today, months)
+    month_ends = [start - timedelta(days=1) for start in month_starts[1:]] + [None]
+
+    aggregates = {
+        'total_invoices': Count('id'),
+        'total_revenue': Sum('total_amount'),
+        'total_paid': Sum('paid_amount'),
+        'recent_revenue': Sum('total_amount', filter=Q(invoice_date__gte=today - timedelta(days=30))),
+    }
+    for code, _ in Invoice.STATUS_CHOICES:
+        aggregates[f'status_{code}'] = Count('id', filter=Q(status=code))
+    for index, (start, end) in enumerate(zip(month_starts, month_ends)):
+        month = Q(invoice_date__gte=start)
+        if end is not None:
+            month &= Q(invoice_date__lte=end)
+        aggregates[f'month_{index}'] = Sum('total_amount', filter=month)
+
+    row = Invoice.objects.aggregate(**aggregates)
+    for key, value in ArchivedInvoice.objects.aggregate(**aggregates).items():
+        if value is not None:
+            row[key] = value if row[key] is None else row[key] + value
+    total_revenue = row['total_revenue'] or 0
+    total_paid = row['total_paid'] or 0
+    return {
+        'total_invoices': row['total_invoices'],
+        'total_revenue': float(total_revenue),
+        'total_paid': float(total_paid),
+        'total_pending': float(total_revenue - total_paid),
+        'recent_revenue': float(row['recent_revenue'] or 0),
+        'by_status': {
+            code: {'name': name, 'count': row[f'status_{code}']}
+            for code, name in Invoice.STATUS_CHOICES
+            if row[f'status_{code}']
+        },
+        'monthly_revenue': [
+            {'month': start.strftime('%Y-%m'), 'revenue': float(row[f'month_{index}'] or 0)}
+            for index, start in enumerate(month_starts)
+        ],
+    }
+
+
+# name -> (builder, roles allowed besides admins)
+SECTIONS = {
+    'patients': (patient_section, None),
+    'staff': (staff_section, ()),
+    'lab_tests': (lab_test_section, ('lab_technician',)),
+    'billing': (billing_section, ()),
+}
+
+
+def allowed_sections(user):
+    """Sections ``user`` may see; ``None`` as roles means every authenticated user"""
+    if user.role == 'admin' or user.is_superuser:
+        return list(SECTIONS)
+    return [
+        name for name, (_, roles) in SECTIONS.items()
+        if roles is None or user.role in roles
+    ]
+
+
+def build_dashboard(sections):
+    return {name: SECTIONS[name][0]() for name in sections}
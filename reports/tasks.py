@@ -0,0 +1,33 @@
+"""
+Background versions of the report endpoints, queued with ``async=true``.
+They read from the replica when one is fresh enough, like the views.
+"""
+from contextlib import nullcontext
+
+from core.replicas import replica_available, replica_configured, use_replica
+from jobs.registry import register
+from .builders import build_analytics_overview, build_patient_report, build_staff_report
+
+
+def _reads():
+    if replica_configured() and replica_available():
+        return use_replica()
+    return nullcontext()
+
+
+@register('reports.analytics', submittable=True)
+def analytics_overview_job(params, job):
+    with _reads():
+        return {'analytics': build_analytics_overview(params.get('start_date'), params.get('end_date'))}
+
+
+@register('reports.staff', submittable=True)
+def staff_report_job(params, job):
+    with _reads():
+        return {'report': build_staff_report()}
+
+
+@register('reports.patients', submittable=True)
+def patient_report_job(params, job):
+    with _reads():
+        return {'report': build_patient_report(params.get('start_date'), params.get('end_date'))}
@@ -1,11 +1,12 @@
 from rest_framework import serializers
 from .models import SystemSettings
 from django.contrib.auth import get_user_model
+from core.metrics import TimedSerializerMixin
 
 User = get_user_model()
 
 
-class SystemSettingsSerializer(serializers.ModelSerializer):
+class SystemSettingsSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Serializer for SystemSettings model"""
     updated_by_name = serializers.SerializerMethodField()
     